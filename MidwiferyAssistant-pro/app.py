@@ -26,6 +26,70 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_pre_ping": True,
 }
 
+# SQLite mode: WAL, tuned pragmas and a queue of the writers of each process
+app.config["SQLITE_TUNING"] = os.environ.get("SQLITE_TUNING", "1") == "1"
+app.config["SQLITE_BUSY_TIMEOUT"] = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))  # milliseconds
+app.config["SQLITE_MMAP_SIZE"] = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))  # bytes
+app.config["SQLITE_CACHE_SIZE"] = int(os.environ.get("SQLITE_CACHE_SIZE", 64 * 1024))  # KiB per connection
+app.config["SQLITE_SERIALIZED_WRITES"] = os.environ.get("SQLITE_SERIALIZED_WRITES", "1") == "1"
+
+# Keyset pagination of the list APIs
+app.config["API_PAGE_SIZE"] = int(os.environ.get("API_PAGE_SIZE", 50))
+app.config["API_MAX_PAGE_SIZE"] = int(os.environ.get("API_MAX_PAGE_SIZE", 500))
+
+# Maximum number of examinations scored by one batch biometry request
+app.config["ULTRASOUND_BATCH_MAX_SIZE"] = int(os.environ.get("ULTRASOUND_BATCH_MAX_SIZE", 10000))
+
+# Maximum number of readings accepted by one bulk blood pressure request
+app.config["BP_BULK_MAX_SIZE"] = int(os.environ.get("BP_BULK_MAX_SIZE", 5000))
+
+# Patients inserted per transaction by the CSV import
+app.config["PATIENT_IMPORT_CHUNK_SIZE"] = int(os.environ.get("PATIENT_IMPORT_CHUNK_SIZE", 500))
+
+# Number of patients whose blood pressure trends are kept in memory
+app.config["BP_TREND_CACHE_SIZE"] = int(os.environ.get("BP_TREND_CACHE_SIZE", 1024))
+
+# Per-process cache of the authenticated user snapshots
+app.config["USER_CACHE_SIZE"] = int(os.environ.get("USER_CACHE_SIZE", 1024))
+app.config["USER_CACHE_TTL"] = int(os.environ.get("USER_CACHE_TTL", 300))
+
+# Request profiling: per-endpoint timings and SQL counts, slow requests logged with their statements
+app.config["PROFILING_ENABLED"] = os.environ.get("PROFILING_ENABLED", "0") == "1"
+app.config["SLOW_REQUEST_MS"] = int(os.environ.get("SLOW_REQUEST_MS", 500))
+
+# Comma-separated usernames allowed on the admin pages (metrics)
+app.config["ADMIN_USERNAMES"] = {name.strip() for name in os.environ.get("ADMIN_USERNAMES", "").split(",") if name.strip()}
+
+# Background creation of the postnatal schedule reminders (J1, J3, J8, 6 weeks, vaccinations)
+app.config["REMINDER_SCHEDULER_ENABLED"] = os.environ.get("REMINDER_SCHEDULER_ENABLED", "1") == "1"
+app.config["REMINDER_SCHEDULER_INTERVAL"] = int(os.environ.get("REMINDER_SCHEDULER_INTERVAL", 3600))  # seconds
+app.config["REMINDER_LOOKAHEAD_DAYS"] = int(os.environ.get("REMINDER_LOOKAHEAD_DAYS", 14))
+app.config["REMINDER_MAX_LATE_DAYS"] = int(os.environ.get("REMINDER_MAX_LATE_DAYS", 14))
+
+# Server-sent events: an open stream holds its worker, so they are only enabled
+# with cooperative workers (gunicorn -k gevent, see the "push" extra)
+app.config["SSE_ENABLED"] = os.environ.get("SSE_ENABLED", "0") == "1"
+# Events kept per user for the reconnections, heartbeat and retry delays, and how
+# long a stream stays open before the browser reconnects with its Last-Event-ID
+app.config["SSE_HISTORY_SIZE"] = int(os.environ.get("SSE_HISTORY_SIZE", 200))
+app.config["SSE_HEARTBEAT_INTERVAL"] = float(os.environ.get("SSE_HEARTBEAT_INTERVAL", 15))  # seconds
+app.config["SSE_RETRY_MS"] = int(os.environ.get("SSE_RETRY_MS", 5000))
+app.config["SSE_MAX_DURATION"] = float(os.environ.get("SSE_MAX_DURATION", 300))  # seconds
+
+# Offline synchronization: records per delta page, changes per upload, and how far
+# behind the clock deltas stop so that transactions still in flight are not skipped
+app.config["SYNC_PAGE_SIZE"] = int(os.environ.get("SYNC_PAGE_SIZE", 1000))
+app.config["SYNC_MAX_CHANGES"] = int(os.environ.get("SYNC_MAX_CHANGES", 500))
+app.config["SYNC_SAFETY_LAG"] = float(os.environ.get("SYNC_SAFETY_LAG", 5))  # seconds
+
+# Audit log buffering: events are flushed in bulk by a background thread
+app.config["AUDIT_ASYNC"] = os.environ.get("AUDIT_ASYNC", "1") == "1"
+app.config["AUDIT_BATCH_SIZE"] = int(os.environ.get("AUDIT_BATCH_SIZE", 100))
+app.config["AUDIT_FLUSH_INTERVAL"] = float(os.environ.get("AUDIT_FLUSH_INTERVAL", 2.0))
+app.config["AUDIT_MAX_QUEUE_SIZE"] = int(os.environ.get("AUDIT_MAX_QUEUE_SIZE", 10000))
+app.config["AUDIT_RETRY_MAX_INTERVAL"] = float(os.environ.get("AUDIT_RETRY_MAX_INTERVAL", 60.0))  # seconds between retries of a failed batch
+app.config["AUDIT_SPOOL_DIR"] = os.environ.get("AUDIT_SPOOL_DIR", os.path.join(app.instance_path, "audit_spool"))
+
 # Initialize the database
 db.init_app(app)
 
@@ -36,15 +100,48 @@ login_manager.login_view = 'login'
 login_manager.login_message = 'Veuillez vous connecter pour accéder à cette page.'
 login_manager.login_message_category = 'info'
 
-# Import models and create tables
+# Import models and apply the pending schema migrations
 with app.app_context():
+    # Configure the SQLite connections before the first one is opened
+    if app.config["SQLITE_TUNING"] and db.engine.dialect.name == 'sqlite':
+        from sqlite_mode import enable_sqlite_mode
+        enable_sqlite_mode(
+            db.engine,
+            busy_timeout=app.config["SQLITE_BUSY_TIMEOUT"],
+            mmap_size=app.config["SQLITE_MMAP_SIZE"],
+            cache_size=app.config["SQLITE_CACHE_SIZE"],
+            serialized_writes=app.config["SQLITE_SERIALIZED_WRITES"]
+        )
+
     import models
-    db.create_all()
+    from migrations import upgrade_database
+    upgrade_database()
 
-    # Load the User model for the login manager
+    # Replay the audit events left in the journal by a crashed process
+    from audit import audit_writer
+    audit_writer.recover()
+
+    # Encode the JSON responses with orjson when it is installed, dates in ISO 8601
+    from serialization import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    # Instrument the requests when profiling is enabled
+    if app.config["PROFILING_ENABLED"]:
+        from profiling import init_profiling
+        init_profiling()
+
+    # Load a cached snapshot of the user for the login manager
+    from identity import load_user_snapshot
+    
     @login_manager.user_loader
     def load_user(user_id):
-        return models.User.query.get(int(user_id))
+        return load_user_snapshot(int(user_id))
 
 # Import routes after app is created
 from routes import *
+
+# Register the batch jobs run from the command line
+import screening
+import export
+import ingestion
+import reminders
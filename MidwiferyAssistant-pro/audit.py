@@ -0,0 +1,399 @@
+import os
+import glob
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+from flask import has_request_context, request
+from flask_login import current_user
+from sqlalchemy import insert
+from app import app, db
+from models import AuditLog
+
+class AuditWriter:
+    """
+    Buffered audit log writer flushing events to the database from a background thread.
+
+    Events are appended to a per-process journal file (append-only JSON lines)
+    before being queued, so that events still in memory when the process dies
+    are replayed by recover() at the next startup. The worker bulk-inserts the
+    queued events every flush_interval seconds or as soon as batch_size events
+    are waiting. A batch that fails is retried, with a delay doubling up to
+    retry_max_interval, until it is stored; batches are stored in journal order,
+    so the journal is only cut up to the end of the last stored batch.
+
+    Backpressure: when max_queue_size events are waiting, log() writes the
+    event synchronously instead of queuing it, which slows the producers down
+    until the worker catches up.
+
+    Delivery is at-least-once: a crash between a bulk insert and the journal
+    cut replays the stored events still in the journal.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=2.0, max_queue_size=10000, spool_dir=None, asynchronous=True,
+                 retry_max_interval=60.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.retry_max_interval = retry_max_interval
+        self.spool_dir = spool_dir
+        self.asynchronous = asynchronous
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._journal = None
+        self._thread = None
+        self._stopping = None
+        self._pid = None
+
+        # Journal positions, in bytes since the journal was opened: the lines
+        # before _journal_start were cut, those before _stored_offset are in the database
+        self._journal_start = 0
+        self._journal_end = 0
+        self._stored_offset = 0
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.spool_dir, f"audit-spool-{os.getpid()}.jsonl")
+
+    def log(self, user_id, action, details=None, ip_address=None):
+        """
+        Record an audit event without waiting for the database.
+
+        Args:
+            user_id (int): Author of the action
+            action (str): Audit action label
+            details (str, optional): Free-text details
+            ip_address (str, optional): Client IP address
+        """
+        event = {
+            'user_id': user_id,
+            'action': action,
+            'details': details,
+            'ip_address': ip_address,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+        if not self.asynchronous:
+            self._insert([event])
+            return
+
+        self._ensure_started()
+
+        with self._lock:
+            if self._queue.qsize() < self.max_queue_size:
+                line = json.dumps(event) + '\n'
+                self._journal.write(line)
+                self._journal.flush()
+                # json.dumps escapes non-ASCII characters: one character per byte
+                self._journal_end += len(line)
+                self._queue.put_nowait((event, self._journal_end))
+                return
+
+        # Queue full: the caller pays for the write until the worker catches up
+        logging.warning("File d'audit saturée, écriture synchrone")
+        self._insert([event])
+
+    def flush(self):
+        """Block until every queued event has been written."""
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def stop(self):
+        """Flush the pending events and stop the worker thread."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def recover(self):
+        """
+        Replay the journals left behind by processes that did not shut down cleanly.
+
+        A journal is claimed by renaming it to *.<pid>.recovering, and claimed
+        journals whose claiming process died are claimed again. If a batch cannot
+        be stored, the claimed journal keeps the events not stored yet for the
+        next recovery, and the recovery stops without raising.
+
+        Returns:
+            int: Number of events replayed
+        """
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return 0
+
+        replayed = 0
+        for path in self._orphan_journals():
+            # Claim the file so that concurrent workers do not replay it twice
+            journal_name = os.path.basename(path).split('.')[0]
+            claimed = os.path.join(self.spool_dir, f"{journal_name}.jsonl.{os.getpid()}.recovering")
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+
+            with open(claimed, encoding='utf-8') as journal:
+                lines = [line for line in journal if line.strip()]
+
+            for start in range(0, len(lines), self.batch_size):
+                batch = lines[start:start + self.batch_size]
+                try:
+                    self._insert(_read_events(batch))
+                except Exception:
+                    logging.exception(f"Échec de la récupération du journal d'audit {os.path.basename(claimed)}, "
+                                      f"{len(lines) - start} événements conservés")
+                    _rewrite(claimed, lines[start:])
+                    replayed += start
+                    break
+            else:
+                os.remove(claimed)
+                replayed += len(lines)
+                continue
+
+            # The database is unavailable: the other journals wait for the next recovery
+            break
+
+        if replayed:
+            logging.info(f"{replayed} événements d'audit récupérés du journal")
+
+        return replayed
+
+    def _orphan_journals(self):
+        # Journals of dead processes, and journals claimed by a recovery that died
+        journals = []
+        for path in glob.glob(os.path.join(self.spool_dir, 'audit-spool-*.jsonl')):
+            pid = int(os.path.basename(path)[len('audit-spool-'):-len('.jsonl')])
+            if pid == os.getpid():
+                # Our own live journal, or one left by a dead process with the same PID
+                if self._pid == pid:
+                    continue
+            elif _process_alive(pid):
+                continue
+            journals.append(path)
+
+        for path in glob.glob(os.path.join(self.spool_dir, 'audit-spool-*.jsonl.*.recovering')):
+            pid = int(path.rsplit('.', 2)[1])
+            # Our own PID: left by a failed recovery of ours, or by a dead process with the same PID
+            if pid != os.getpid() and _process_alive(pid):
+                continue
+            journals.append(path)
+
+        return journals
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, each worker process starts its own
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self._queue = queue.Queue()
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal_start = self._journal_end = self._stored_offset = 0
+            self._stopping = threading.Event()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        with app.app_context():
+            stored = True
+            while True:
+                batch = self._next_batch()
+
+                if batch:
+                    # Once a batch is given up, the next ones stay in the journal as well
+                    if stored:
+                        stored = self._write_batch(batch)
+                    else:
+                        for _ in batch:
+                            self._queue.task_done()
+
+                if self._stopping.is_set() and self._queue.empty():
+                    break
+
+            # Events that could not be stored stay in the journal for recover()
+            self._cut_journal(force=True)
+            self._journal.close()
+            if self._stored_offset == self._journal_end:
+                os.remove(self.journal_path)
+
+    def _next_batch(self):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+        except queue.Empty:
+            return batch
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _write_batch(self, batch):
+        # Returns False when the batch is given up because the writer is stopping
+        events = [event for event, _ in batch]
+        delay = self.flush_interval
+        try:
+            while True:
+                try:
+                    self._insert(events)
+                except Exception:
+                    logging.exception(f"Échec de l'écriture du journal d'audit, nouvel essai dans {delay:.0f} s")
+                    # Stopping: the events stay in the journal and are replayed by recover()
+                    if self._stopping.wait(delay):
+                        return False
+                    delay = min(delay * 2, self.retry_max_interval)
+                else:
+                    self._stored_offset = batch[-1][1]
+                    self._cut_journal()
+                    return True
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _cut_journal(self, force=False):
+        """
+        Remove the stored events from the head of the journal.
+
+        The journal is emptied when every event it holds is stored. Otherwise
+        the events still to store are copied to a new journal that replaces the
+        old one, when the stored part is larger than them (or when force is set).
+        """
+        with self._lock:
+            stored = self._stored_offset - self._journal_start
+            pending = self._journal_end - self._stored_offset
+            if stored == 0:
+                return
+
+            if pending == 0:
+                self._journal.truncate(0)
+                self._journal.seek(0)
+            elif force or stored >= pending:
+                with open(self.journal_path, encoding='utf-8') as journal:
+                    journal.seek(stored)
+                    remaining = journal.read()
+
+                replacement = f"{self.journal_path}.tmp"
+                with open(replacement, 'w', encoding='utf-8') as journal:
+                    journal.write(remaining)
+                    journal.flush()
+                    os.fsync(journal.fileno())
+
+                self._journal.close()
+                os.replace(replacement, self.journal_path)
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            else:
+                return
+
+            self._journal_start = self._stored_offset
+
+    def _insert(self, events):
+        rows = [dict(event, timestamp=datetime.fromisoformat(event['timestamp'])) for event in events]
+        with db.engine.begin() as connection:
+            connection.execute(insert(AuditLog), rows)
+
+def _read_events(lines):
+    events = []
+    for line in lines:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            # Line cut short by the crash of the process writing it
+            logging.warning(f"Ligne illisible ignorée dans le journal d'audit : {line[:100]!r}")
+    return events
+
+def _rewrite(path, lines):
+    # Replace the content of a journal, atomically
+    replacement = f"{path}.tmp"
+    with open(replacement, 'w', encoding='utf-8') as journal:
+        journal.writelines(lines)
+        journal.flush()
+        os.fsync(journal.fileno())
+    os.replace(replacement, path)
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+audit_writer = AuditWriter(
+    batch_size=app.config["AUDIT_BATCH_SIZE"],
+    flush_interval=app.config["AUDIT_FLUSH_INTERVAL"],
+    max_queue_size=app.config["AUDIT_MAX_QUEUE_SIZE"],
+    spool_dir=app.config["AUDIT_SPOOL_DIR"],
+    asynchronous=app.config["AUDIT_ASYNC"],
+    retry_max_interval=app.config["AUDIT_RETRY_MAX_INTERVAL"]
+)
+atexit.register(audit_writer.stop)
+
+class UnitOfWork:
+    """
+    Write a clinical record and any derived rows in one transaction, then log the action.
+
+    Everything added inside the block is committed once when the block exits
+    normally; the audit event is handed to the buffered audit writer after the
+    commit, so the request does not wait for the audit insert. If the block
+    raises, the whole transaction is rolled back and nothing is logged.
+    Validation that may abort the request must happen before entering the block.
+
+    Usage:
+        with UnitOfWork("Création de patient", details=f"Patient: {name}") as uow:
+            uow.add(new_patient)
+
+    Args:
+        action (str): Audit action label
+        details (str, optional): Audit details, can also be set inside the block
+        user_id (int, optional): Author of the action, defaults to the current user (required outside a request)
+    """
+
+    def __init__(self, action, details=None, user_id=None):
+        self.action = action
+        self.details = details
+        self.user_id = user_id
+
+    def add(self, *objects):
+        db.session.add_all(objects)
+
+    def flush(self):
+        """Send pending rows to the database to obtain their IDs, without committing."""
+        db.session.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            db.session.rollback()
+            return False
+
+        # Read before the commit, which expires the loaded instances
+        user_id = self.user_id if self.user_id is not None else current_user.id
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        audit_writer.log(
+            user_id=user_id,
+            action=self.action,
+            details=self.details,
+            ip_address=request.remote_addr if has_request_context() else None
+        )
+
+        return False
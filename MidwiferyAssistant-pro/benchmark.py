@@ -0,0 +1,634 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+# Rows accumulated per table before a bulk insert while generating
+GENERATE_BATCH_SIZE = 10000
+
+BENCHMARK_PASSWORD = 'benchmark'
+
+def _load_app(database_url):
+    # The database must be chosen before the app module reads DATABASE_URL
+    os.environ['DATABASE_URL'] = database_url
+    # Background reminder runs would write in the middle of the measurements
+    os.environ.setdefault('REMINDER_SCHEDULER_ENABLED', '0')
+    logging.disable(logging.INFO)
+    import app as application
+    import routes
+    return application.app, application.db
+
+class _BulkWriter:
+    # Accumulates rows per table and writes them with one executemany per batch
+    def __init__(self, db):
+        self.db = db
+        self.rows = {}
+        self.counts = {}
+
+    def add(self, model, **values):
+        """Queue a row and return its ID; absent columns get their scalar default or NULL."""
+        table = model.__table__
+        row_id = self.counts.get(table.name, 0) + 1
+        self.counts[table.name] = row_id
+
+        row = {'id': row_id}
+        for column in table.columns:
+            if column.key in values:
+                row[column.key] = values[column.key]
+            elif not column.primary_key:
+                row[column.key] = column.default.arg if column.default is not None and column.default.is_scalar else None
+
+        # Last update of a generated record: its creation
+        if 'updated_at' in row and row['updated_at'] is None:
+            row['updated_at'] = values.get('created_at') or values.get('recorded_at')
+
+        rows = self.rows.setdefault(table, [])
+        rows.append(row)
+        if len(rows) >= GENERATE_BATCH_SIZE:
+            self.flush()
+        return row_id
+
+    def flush(self):
+        # Every table at once, parents first, so foreign keys always point to written rows
+        from sqlalchemy import insert
+
+        for table in self.db.metadata.sorted_tables:
+            if self.rows.get(table):
+                self.db.session.execute(insert(table), self.rows[table])
+                self.rows[table] = []
+        self.db.session.commit()
+
+def generate(args):
+    """
+    Fill an empty database with a reproducible synthetic practice.
+
+    IDs are assigned here, in insertion order, so that the rows can be
+    written with bulk inserts; the same seed always gives the same data
+    relative to the generation date.
+    """
+    app, db = _load_app(args.database)
+    from werkzeug.security import generate_password_hash
+    from models import (User, Patient, BloodPressureRecord, BiomedicalRecord, DeliveryRecord, BabyRecord,
+                        PostnatalCheckup, VaccinationRecord, BreastfeedingRecord, PostnatalCareReminder)
+    import summary
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    start = now - timedelta(days=365 * args.years)
+
+    with app.app_context():
+        if db.session.query(User.id).first() is not None:
+            sys.exit("La base contient déjà des données, utiliser une base vide")
+
+        writer = _BulkWriter(db)
+        password_hash = generate_password_hash(BENCHMARK_PASSWORD)
+        started = time.perf_counter()
+
+        for midwife in range(1, args.midwives + 1):
+            user_id = writer.add(User, username=f'bench{midwife}', email=f'bench{midwife}@example.org',
+                                 password_hash=password_hash, created_at=start, default_cycle_length=28)
+
+            for _ in range(args.patients):
+                # 60% of the patients are pregnant today, the others delivered during the period
+                pregnant = rng.random() < 0.6
+                if pregnant:
+                    last_period = now - timedelta(days=rng.randint(20, 285))
+                else:
+                    delivery_date = now - timedelta(days=rng.uniform(3, 365 * args.years / 2))
+                    last_period = delivery_date - timedelta(days=280)
+                followed_from = max(start, last_period - timedelta(days=rng.uniform(0, 365)))
+                hypertensive = rng.random() < 0.1
+
+                patient_id = writer.add(
+                    Patient,
+                    first_name=rng.choice(['Awa', 'Fatou', 'Mariam', 'Aminata', 'Claire', 'Sophie', 'Nadia', 'Inès']),
+                    last_name=f'Patiente{rng.randint(1, 999999):06d}',
+                    date_of_birth=date(rng.randint(1980, 2005), rng.randint(1, 12), rng.randint(1, 28)),
+                    last_period_date=last_period.date(),
+                    cycle_length=rng.choice([26, 28, 28, 28, 30, 32]),
+                    notes='',
+                    created_at=followed_from,
+                    user_id=user_id
+                )
+
+                # Home blood pressure readings every 2 to 4 days
+                recorded_at = followed_from
+                while recorded_at < now:
+                    systolic = int(rng.gauss(142 if hypertensive else 118, 12))
+                    diastolic = int(rng.gauss(92 if hypertensive else 76, 8))
+                    writer.add(BloodPressureRecord, systolic=systolic, diastolic=diastolic,
+                               heart_rate=int(rng.gauss(80, 8)), notes=None, recorded_at=recorded_at,
+                               patient_id=patient_id, user_id=user_id)
+                    recorded_at += timedelta(days=rng.uniform(2, 4))
+
+                # Blood results every two months
+                recorded_at = followed_from
+                while recorded_at < now:
+                    writer.add(BiomedicalRecord, hemoglobin=round(rng.gauss(11.8, 1.2), 1),
+                               platelets=int(rng.gauss(240000, 60000)), ferritin=round(rng.gauss(40, 15), 1),
+                               hematocrit=round(rng.gauss(35, 3), 1), ldh=round(rng.gauss(380, 120)),
+                               alt=round(rng.gauss(25, 15)), ast=round(rng.gauss(25, 15)), notes=None,
+                               recorded_at=recorded_at, patient_id=patient_id)
+                    recorded_at += timedelta(days=rng.uniform(45, 75))
+
+                if pregnant:
+                    continue
+
+                delivery_id = writer.add(DeliveryRecord, delivery_date=delivery_date,
+                                         delivery_type=rng.choice(['vaginal', 'vaginal', 'cesarean', 'instrumental']),
+                                         delivery_location=rng.choice(['Maternité', 'Clinique', 'Domicile']),
+                                         blood_loss=int(rng.gauss(400, 150)), delivery_duration=rng.randint(60, 900),
+                                         created_at=delivery_date, patient_id=patient_id, user_id=user_id)
+
+                for _ in range(2 if rng.random() < 0.03 else 1):
+                    baby_id = writer.add(BabyRecord, first_name=rng.choice(['Moussa', 'Léa', 'Adam', 'Aïcha', None]),
+                                         birth_date=delivery_date, gender=rng.choice(['M', 'F']),
+                                         birth_weight=round(rng.gauss(3200, 450)), apgar_1min=rng.randint(6, 10),
+                                         apgar_5min=rng.randint(8, 10), created_at=delivery_date,
+                                         mother_id=patient_id, delivery_id=delivery_id)
+
+                    # Postnatal follow-up: day 3, day 8 and week 6, for the mother and the baby
+                    for day in (3, 8, 42):
+                        checkup_date = delivery_date + timedelta(days=day)
+                        if checkup_date > now:
+                            break
+                        writer.add(PostnatalCheckup, checkup_date=checkup_date, checkup_type='mother',
+                                   temperature=round(rng.gauss(36.9, 0.3), 1), heart_rate=int(rng.gauss(78, 8)),
+                                   blood_pressure_systolic=int(rng.gauss(118, 10)),
+                                   blood_pressure_diastolic=int(rng.gauss(75, 8)), weight=round(rng.gauss(68, 10), 1),
+                                   created_at=checkup_date, patient_id=patient_id, user_id=user_id)
+                        writer.add(PostnatalCheckup, checkup_date=checkup_date, checkup_type='baby',
+                                   temperature=round(rng.gauss(36.8, 0.3), 1), heart_rate=int(rng.gauss(140, 10)),
+                                   weight=round(rng.gauss(3.3 + day * 0.025, 0.4), 2),
+                                   created_at=checkup_date, baby_id=baby_id, user_id=user_id)
+
+                    for vaccine, day in (('BCG', 0), ('Hépatite B', 0), ('VPO', 0), ('Pentavalent 1', 42)):
+                        administered = delivery_date + timedelta(days=day)
+                        if administered <= now:
+                            writer.add(VaccinationRecord, vaccine_name=vaccine, date_administered=administered,
+                                       dose='1', route='IM', created_at=administered, baby_id=baby_id, user_id=user_id)
+
+                    # Weekly breastfeeding follow-up during three months
+                    for week in range(12):
+                        feeding_date = delivery_date + timedelta(days=7 * week + 1)
+                        if feeding_date > now:
+                            break
+                        writer.add(BreastfeedingRecord, feeding_date=feeding_date,
+                                   feeding_type=rng.choice(['exclusive breastfeeding', 'mixed', 'formula']),
+                                   duration=rng.randint(5, 40), created_at=feeding_date,
+                                   mother_id=patient_id, baby_id=baby_id, user_id=user_id)
+
+                    for title, day, reminder_type in (('Visite J3', 3, 'both'), ('Visite J8', 8, 'both'),
+                                                      ('Visite 6 semaines', 42, 'mother'),
+                                                      ('Vaccination 6 semaines', 42, 'baby')):
+                        reminder_date = delivery_date + timedelta(days=day)
+                        writer.add(PostnatalCareReminder, title=title, reminder_date=reminder_date,
+                                   reminder_type=reminder_type, priority='normal',
+                                   completed=reminder_date < now - timedelta(days=2), created_at=delivery_date,
+                                   patient_id=patient_id, baby_id=baby_id, user_id=user_id)
+
+        writer.flush()
+        summary.rebuild_summaries()
+
+        print(f"Données générées en {time.perf_counter() - started:.1f} s")
+        for table, count in writer.counts.items():
+            print(f"  {table}: {count}")
+
+def _percentile(durations, percent):
+    import numpy as np
+    return round(float(np.percentile(durations, percent)) * 1000, 2)
+
+def _scenarios():
+    # name: function(rng, ids) -> (method, url, json body)
+    today = date.today()
+    return {
+        'dashboard': lambda rng, ids: ('GET', '/dashboard', None),
+        'reminder_feed': lambda rng, ids: ('GET', '/api/postnatal/reminders?status=pending', None),
+        'baby_detail': lambda rng, ids: ('GET', f"/api/postnatal/baby/{rng.choice(ids['babies'])}", None),
+        'mother_checkups': lambda rng, ids: ('GET', f"/api/postnatal/mother-checkups/{rng.choice(ids['mothers'])}", None),
+        'breastfeeding': lambda rng, ids: ('GET', f"/api/postnatal/breastfeeding/{rng.choice(ids['babies'])}", None),
+        'vaccinations': lambda rng, ids: ('GET', f"/api/postnatal/vaccinations/{rng.choice(ids['babies'])}", None),
+        'blood_pressure_trend': lambda rng, ids: ('GET', f"/api/patients/{rng.choice(ids['patients'])}/blood_pressure_trend", None),
+        'name_search': lambda rng, ids: ('GET', f"/api/search?q={rng.choice(['aw', 'fat', 'mari', 'patiente1', 'léa', 'mou'])}", None),
+        'active_pregnancies': lambda rng, ids: ('GET', '/api/pregnancies/active', None),
+        'record_blood_pressure': lambda rng, ids: ('POST', '/api/record_blood_pressure', {
+            'patientId': rng.choice(ids['patients']), 'systolic': rng.randint(100, 160), 'diastolic': rng.randint(60, 100)
+        }),
+        'record_checkup': lambda rng, ids: ('POST', '/api/postnatal/checkup', {
+            'checkup_type': 'mother', 'patient_id': rng.choice(ids['mothers']),
+            'checkup_date': datetime.utcnow().strftime('%Y-%m-%dT%H:%M'), 'temperature': '36.8'
+        }),
+        'create_reminder': lambda rng, ids: ('POST', '/api/postnatal/reminder', {
+            'title': 'Rappel de test', 'reminder_date': (today + timedelta(days=rng.randint(1, 30))).isoformat(),
+            'reminder_type': 'mother', 'patient_id': rng.choice(ids['patients'])
+        })
+    }
+
+def run(args):
+    """
+    Time the scenarios through the Flask test client, for every generated midwife in turn.
+
+    Requests are sent one at a time, so the throughput is that of a single
+    worker. The write scenarios add rows: regenerate the database before a
+    run meant to be compared with a baseline.
+    """
+    app, db = _load_app(args.database)
+    from models import User, Patient, BabyRecord
+
+    rng = random.Random(args.seed)
+    scenarios = _scenarios()
+    selected = args.scenarios.split(',') if args.scenarios else list(scenarios)
+
+    with app.app_context():
+        users = db.session.query(User.id, User.username).filter(User.username.like('bench%')).order_by(User.id).all()
+        if not users:
+            sys.exit("Aucune donnée de test, lancer d'abord : python benchmark.py generate")
+
+        contexts = []
+        for user_id, username in users:
+            ids = {
+                'patients': [row[0] for row in db.session.query(Patient.id).filter(Patient.user_id == user_id)],
+                'mothers': [row[0] for row in db.session.query(BabyRecord.mother_id).join(Patient).filter(Patient.user_id == user_id).distinct()],
+                'babies': [row[0] for row in db.session.query(BabyRecord.id).join(Patient).filter(Patient.user_id == user_id)]
+            }
+            client = app.test_client()
+            client.post('/login', data={'username': username, 'password': BENCHMARK_PASSWORD})
+            contexts.append((client, ids))
+        database = db.engine.dialect.name
+        db.session.remove()
+
+    results = {}
+    for name in selected:
+        build = scenarios[name]
+        durations = []
+        errors = 0
+
+        for index in range(args.warmup + args.requests):
+            client, ids = contexts[index % len(contexts)]
+            method, url, body = build(rng, ids)
+
+            started = time.perf_counter()
+            response = client.open(url, method=method, json=body)
+            response.get_data()
+            elapsed = time.perf_counter() - started
+
+            if index < args.warmup:
+                continue
+            durations.append(elapsed)
+            if response.status_code >= 400:
+                errors += 1
+
+        results[name] = {
+            'requests': len(durations),
+            'errors': errors,
+            'p50_ms': _percentile(durations, 50),
+            'p95_ms': _percentile(durations, 95),
+            'p99_ms': _percentile(durations, 99),
+            'mean_ms': round(sum(durations) / len(durations) * 1000, 2),
+            'throughput_rps': round(len(durations) / sum(durations), 1)
+        }
+
+    print(f"{'Scénario':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'erreurs':>10}")
+    for name, result in results.items():
+        print(f"{name:<24}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+              f"{result['throughput_rps']:>10}{result['errors']:>10}")
+
+    report = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'database': database,
+            'python': platform.python_version(),
+            'midwives': len(contexts),
+            'requests': args.requests,
+            'seed': args.seed
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        print(f"Résultats enregistrés dans {args.output}")
+
+    if args.compare:
+        sys.exit(compare(report, args.compare, args.tolerance))
+
+def load_worker(args):
+    """
+    One worker process of the concurrency benchmark, printing its measurements as JSON.
+
+    Each thread logs in as one of the generated midwives; once they all are,
+    the worker prints "ready" and waits for a line on stdin, then sends reads
+    (dashboard, reminder feed, postnatal details) and blood pressure writes
+    for the given duration.
+    """
+    app, db = _load_app(args.database)
+    from models import User, Patient, BabyRecord
+
+    with app.app_context():
+        users = db.session.query(User.id, User.username).filter(User.username.like('bench%')).order_by(User.id).all()
+        ids = {}
+        for user_id, username in users:
+            ids[username] = {
+                'patients': [row[0] for row in db.session.query(Patient.id).filter(Patient.user_id == user_id)],
+                'mothers': [row[0] for row in db.session.query(BabyRecord.mother_id).join(Patient).filter(Patient.user_id == user_id).distinct()],
+                'babies': [row[0] for row in db.session.query(BabyRecord.id).join(Patient).filter(Patient.user_id == user_id)]
+            }
+        db.session.remove()
+
+    scenarios = _scenarios()
+    reads = ['dashboard', 'reminder_feed', 'baby_detail', 'mother_checkups', 'vaccinations']
+    measurements = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+    lock = threading.Lock()
+    logged_in = threading.Barrier(args.threads + 1)
+    go = threading.Event()
+    deadline = []
+
+    def load(thread_index):
+        rng = random.Random(args.seed * 1000 + thread_index)
+        username = users[thread_index % len(users)][1]
+        client = app.test_client()
+        client.post('/login', data={'username': username, 'password': BENCHMARK_PASSWORD})
+
+        local = {'read': [], 'write': []}
+        local_errors = {'read': 0, 'write': 0}
+        logged_in.wait()
+        go.wait()
+
+        while time.time() < deadline[0]:
+            kind = 'write' if rng.random() < args.write_ratio else 'read'
+            name = 'record_blood_pressure' if kind == 'write' else rng.choice(reads)
+            method, url, body = scenarios[name](rng, ids[username])
+
+            started = time.perf_counter()
+            response = client.open(url, method=method, json=body)
+            response.get_data()
+            local[kind].append(time.perf_counter() - started)
+            if response.status_code >= 500:
+                local_errors[kind] += 1
+
+        with lock:
+            for kind in local:
+                measurements[kind].extend(local[kind])
+                errors[kind] += local_errors[kind]
+
+    threads = [threading.Thread(target=load, args=(index,)) for index in range(args.threads)]
+    for thread in threads:
+        thread.start()
+
+    logged_in.wait()
+    print('ready', flush=True)
+    sys.stdin.readline()
+    deadline.append(time.time() + args.duration)
+    go.set()
+
+    for thread in threads:
+        thread.join()
+
+    print(json.dumps({'measurements': measurements, 'errors': errors}))
+
+def concurrency(args):
+    """
+    Run the same concurrent mixed load with the default SQLite configuration and with the SQLite mode.
+
+    Several worker processes, like gunicorn workers, each run several
+    threads. The default run switches the database back to the rollback
+    journal first, since WAL is a persistent property of the file.
+    """
+    from sqlalchemy.engine import make_url
+
+    url = make_url(args.database)
+    if url.get_backend_name() != 'sqlite':
+        sys.exit("Le test de concurrence compare des configurations SQLite")
+
+    modes = {}
+    for mode, tuning in (('default', '0'), ('sqlite_mode', '1')):
+        if tuning == '0':
+            connection = sqlite3.connect(url.database)
+            connection.execute('PRAGMA journal_mode = DELETE')
+            connection.close()
+
+        workers = [
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), '--database', args.database,
+                              '--seed', str(args.seed + index), 'load-worker', '--threads', str(args.threads),
+                              '--duration', str(args.duration), '--write-ratio', str(args.write_ratio)],
+                             env=dict(os.environ, SQLITE_TUNING=tuning),
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            for index in range(args.workers)
+        ]
+
+        # Start the load together once every worker has imported the app and logged in
+        for worker in workers:
+            if worker.stdout.readline().strip() != b'ready':
+                sys.exit("Un processus de test n'a pas démarré")
+        for worker in workers:
+            worker.stdin.write(b'go\n')
+            worker.stdin.flush()
+
+        measurements = {'read': [], 'write': []}
+        errors = {'read': 0, 'write': 0}
+        for worker in workers:
+            output = json.loads(worker.communicate()[0].decode().strip().splitlines()[-1])
+            for kind in measurements:
+                measurements[kind].extend(output['measurements'][kind])
+                errors[kind] += output['errors'][kind]
+
+        modes[mode] = {
+            kind: {
+                'requests': len(durations),
+                'errors': errors[kind],
+                'throughput_rps': round(len(durations) / args.duration, 1),
+                'p50_ms': _percentile(durations, 50) if durations else None,
+                'p95_ms': _percentile(durations, 95) if durations else None,
+                'p99_ms': _percentile(durations, 99) if durations else None
+            }
+            for kind, durations in measurements.items()
+        }
+
+    print(f"{args.workers} processus x {args.threads} threads, {args.duration} s, {args.write_ratio:.0%} d'écritures")
+    print(f"{'Configuration':<16}{'Type':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erreurs':>10}")
+    for mode, kinds in modes.items():
+        for kind, result in kinds.items():
+            print(f"{mode:<16}{kind:<8}{result['throughput_rps']:>10}{result['p50_ms']:>10}"
+                  f"{result['p95_ms']:>10}{result['p99_ms']:>10}{result['errors']:>10}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump({'meta': vars(args) | {'handler': None}, 'results': modes}, output, indent=2)
+        print(f"Résultats enregistrés dans {args.output}")
+
+def writes(args):
+    """
+    Compare the write throughput of a record committed with or apart from its audit entry.
+
+    Each mode writes blood pressure readings of the generated patients, one
+    transaction at a time like the write routes:
+    - two_commits commits the reading, then its audit entry;
+    - one_commit commits both in one transaction;
+    - unit_of_work goes through audit.UnitOfWork, which commits the reading and
+      hands the audit entry to the buffered audit writer. The writer is flushed
+      before the mode's throughput is computed.
+    The readings are added to the database: regenerate it before a run meant
+    to be compared with another.
+    """
+    app, db = _load_app(args.database)
+    from audit import UnitOfWork, audit_writer
+    from models import User, Patient, BloodPressureRecord, AuditLog
+
+    with app.app_context():
+        user_id = db.session.query(User.id).filter(User.username.like('bench%')).order_by(User.id).scalar()
+        if user_id is None:
+            sys.exit("Aucune donnée de test, lancer d'abord : python benchmark.py generate")
+        patients = [row[0] for row in db.session.query(Patient.id).filter(Patient.user_id == user_id)]
+        database = db.engine.dialect.name
+        db.session.remove()
+
+    def reading(rng):
+        return BloodPressureRecord(patient_id=rng.choice(patients), user_id=user_id,
+                                   systolic=rng.randint(100, 160), diastolic=rng.randint(60, 100))
+
+    def audit_entry(record):
+        return AuditLog(user_id=user_id, action="Enregistrement tension artérielle",
+                        details=f"Patient ID: {record.patient_id}, TA: {record.systolic}/{record.diastolic}")
+
+    def two_commits(rng):
+        record = reading(rng)
+        db.session.add(record)
+        db.session.commit()
+        db.session.add(audit_entry(record))
+        db.session.commit()
+
+    def one_commit(rng):
+        record = reading(rng)
+        db.session.add_all([record, audit_entry(record)])
+        db.session.commit()
+
+    def unit_of_work(rng):
+        record = reading(rng)
+        with UnitOfWork("Enregistrement tension artérielle", user_id=user_id,
+                        details=f"Patient ID: {record.patient_id}, TA: {record.systolic}/{record.diastolic}") as uow:
+            uow.add(record)
+
+    results = {}
+    for name, write in (('two_commits', two_commits), ('one_commit', one_commit), ('unit_of_work', unit_of_work)):
+        rng = random.Random(args.seed)
+        durations = []
+
+        with app.app_context():
+            for index in range(args.warmup + args.writes):
+                started = time.perf_counter()
+                write(rng)
+                elapsed = time.perf_counter() - started
+                if index >= args.warmup:
+                    durations.append(elapsed)
+
+            # The audit entries still buffered are part of the cost of the writes
+            flush_started = time.perf_counter()
+            audit_writer.flush()
+            total = sum(durations) + time.perf_counter() - flush_started
+            db.session.remove()
+
+        results[name] = {
+            'writes': len(durations),
+            'p50_ms': _percentile(durations, 50),
+            'p95_ms': _percentile(durations, 95),
+            'p99_ms': _percentile(durations, 99),
+            'throughput_wps': round(len(durations) / total, 1)
+        }
+
+    print(f"{'Mode':<16}{'écritures/s':>14}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<16}{result['throughput_wps']:>14}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump({'meta': {'database': database, 'python': platform.python_version(), 'writes': args.writes,
+                                'seed': args.seed},
+                       'results': results}, output, indent=2)
+        print(f"Résultats enregistrés dans {args.output}")
+
+def compare(report, baseline_path, tolerance):
+    """
+    Compare the p95 latencies of a run with a saved baseline.
+
+    Args:
+        report (dict): Results of the current run
+        baseline_path (str): JSON file written by a previous run with --output
+        tolerance (float): Allowed relative slowdown, 0.2 for 20%
+
+    Returns:
+        int: 1 if a scenario regressed beyond the tolerance, 0 otherwise
+    """
+    with open(baseline_path, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)['results']
+
+    regressions = 0
+    print(f"\n{'Scénario':<24}{'p95 réf.':>10}{'p95':>10}{'écart':>10}")
+    for name, result in report['results'].items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['p95_ms'], result['p95_ms']
+        change = (after - before) / before if before else 0.0
+        # Sub-millisecond differences are noise, whatever their ratio
+        regressed = change > tolerance and after - before > 1.0
+        regressions += regressed
+        print(f"{name:<24}{before:>10}{after:>10}{change:>+10.0%}{'  RÉGRESSION' if regressed else ''}")
+
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Jeu de données synthétique et mesures de performance des routes")
+    parser.add_argument('--database', default='sqlite:///benchmark.db',
+                        help="URL de la base de test (jamais la base de production)")
+    parser.add_argument('--seed', type=int, default=42)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = commands.add_parser('generate', help="Remplir une base vide")
+    generate_parser.add_argument('--midwives', type=int, default=5)
+    generate_parser.add_argument('--patients', type=int, default=200, help="Patientes par sage-femme")
+    generate_parser.add_argument('--years', type=int, default=2, help="Années de suivi")
+    generate_parser.set_defaults(handler=generate)
+
+    run_parser = commands.add_parser('run', help="Mesurer les routes")
+    run_parser.add_argument('--requests', type=int, default=200, help="Requêtes mesurées par scénario")
+    run_parser.add_argument('--warmup', type=int, default=10, help="Requêtes non mesurées par scénario")
+    run_parser.add_argument('--scenarios', help="Liste de scénarios séparés par des virgules (tous par défaut)")
+    run_parser.add_argument('--output', help="Enregistrer les résultats en JSON (référence)")
+    run_parser.add_argument('--compare', help="Comparer avec une référence JSON")
+    run_parser.add_argument('--tolerance', type=float, default=0.2, help="Ralentissement toléré du p95 (0.2 = 20 %%)")
+    run_parser.set_defaults(handler=run)
+
+    concurrency_parser = commands.add_parser('concurrency', help="Comparer la configuration SQLite par défaut et le mode SQLite sous charge concurrente")
+    concurrency_parser.add_argument('--workers', type=int, default=4, help="Processus, comme les workers gunicorn")
+    concurrency_parser.add_argument('--threads', type=int, default=4, help="Threads par processus")
+    concurrency_parser.add_argument('--duration', type=float, default=10, help="Durée de chaque mesure en secondes")
+    concurrency_parser.add_argument('--write-ratio', type=float, default=0.2, help="Part des requêtes d'écriture")
+    concurrency_parser.add_argument('--output', help="Enregistrer les résultats en JSON")
+    concurrency_parser.set_defaults(handler=concurrency)
+
+    writes_parser = commands.add_parser('writes', help="Comparer le débit d'écriture avec un ou deux commits par enregistrement")
+    writes_parser.add_argument('--writes', type=int, default=1000, help="Écritures mesurées par mode")
+    writes_parser.add_argument('--warmup', type=int, default=20, help="Écritures non mesurées par mode")
+    writes_parser.add_argument('--output', help="Enregistrer les résultats en JSON")
+    writes_parser.set_defaults(handler=writes)
+
+    worker_parser = commands.add_parser('load-worker')
+    worker_parser.add_argument('--threads', type=int, required=True)
+    worker_parser.add_argument('--duration', type=float, required=True)
+    worker_parser.add_argument('--write-ratio', type=float, required=True)
+    worker_parser.set_defaults(handler=load_worker)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
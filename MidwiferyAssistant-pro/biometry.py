@@ -0,0 +1,250 @@
+import numpy as np
+from reference_data import ULTRASOUND_WEEKS, ULTRASOUND_CURVES
+
+MEASUREMENTS = ('bpd', 'hc', 'ac', 'fl', 'efw')
+
+MEASUREMENT_LABELS = {
+    'bpd': 'Diamètre bipariétal (BPD)',
+    'hc': 'Circonférence crânienne (HC)',
+    'ac': 'Circonférence abdominale (AC)',
+    'fl': 'Longueur fémorale (FL)',
+    'efw': 'Poids fœtal estimé (EFW)'
+}
+
+class BiometryReference:
+    """
+    Reference curves of the fetal biometry as arrays indexed by gestational day.
+
+    The weekly reference curves give the mean and the -2SD/+2SD bounds of each
+    measurement. The lower and upper standard deviations are kept separately
+    so that skewed curves (estimated weight) are scored on the right side.
+    The arrays are read-only, an instance is shared by every request.
+    """
+
+    def __init__(self, weeks, curves):
+        self.days = _read_only(np.array(weeks, dtype=float) * 7)
+        self.mean = {}
+        self.lower_sd = {}
+        self.upper_sd = {}
+
+        for name in MEASUREMENTS:
+            mean = np.array(curves[name]['mean'], dtype=float)
+            self.mean[name] = _read_only(mean)
+            self.lower_sd[name] = _read_only((mean - np.array(curves[name]['lower'], dtype=float)) / 2)
+            self.upper_sd[name] = _read_only((np.array(curves[name]['upper'], dtype=float) - mean) / 2)
+
+    @property
+    def first_day(self):
+        return int(self.days[0])
+
+    @property
+    def last_day(self):
+        return int(self.days[-1])
+
+    def interpolate(self, name, gestational_days):
+        """
+        Interpolate the reference curve of a measurement linearly between weeks.
+
+        Args:
+            name (str): Measurement ('bpd', 'hc', 'ac', 'fl' or 'efw')
+            gestational_days (ndarray): Gestational ages in days
+
+        Returns:
+            tuple: (mean, lower_sd, upper_sd) arrays, NaN outside the reference range
+        """
+        in_range = (gestational_days >= self.days[0]) & (gestational_days <= self.days[-1])
+        curves = []
+        for curve in (self.mean[name], self.lower_sd[name], self.upper_sd[name]):
+            curves.append(np.where(in_range, np.interp(gestational_days, self.days, curve), np.nan))
+        return tuple(curves)
+
+def _read_only(array):
+    array.setflags(write=False)
+    return array
+
+_reference = BiometryReference(ULTRASOUND_WEEKS, ULTRASOUND_CURVES)
+
+def get_biometry_reference():
+    """Get the biometry reference curves, built once per process."""
+    return _reference
+
+def _normal_cdf(z):
+    # Abramowitz & Stegun 7.1.26 approximation of erf (error < 1.5e-7), vectorized
+    x = np.abs(z) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * x)
+    polynomial = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - polynomial * np.exp(-x * x)
+    return 0.5 * (1 + np.sign(z) * erf)
+
+def _as_measurement_array(values, size):
+    if values is None:
+        return np.full(size, np.nan)
+    array = np.asarray(values, dtype=float)
+    # Unmeasured values are sent as 0 or null by the forms
+    return np.where(array > 0, array, np.nan)
+
+def estimate_fetal_weight(bpd=None, hc=None, ac=None, fl=None):
+    """
+    Estimate the fetal weight with the Hadlock formulas, for arrays of measurements.
+
+    The most complete formula available is used for each fetus: BPD-HC-AC-FL,
+    then HC-AC-FL, then AC-FL. Measurements are in mm.
+
+    Returns:
+        ndarray: Estimated weights in grams, NaN when AC or FL is missing
+    """
+    size = np.broadcast(*[np.asarray(v, dtype=float) for v in (ac, fl) if v is not None]).shape
+    # The Hadlock coefficients expect centimetres
+    bpd, hc, ac, fl = (_as_measurement_array(v, size) / 10 for v in (bpd, hc, ac, fl))
+
+    with np.errstate(invalid='ignore'):
+        log_ac_fl = 1.304 + 0.05281 * ac + 0.1938 * fl - 0.004 * ac * fl
+        log_hc_ac_fl = 1.326 - 0.00326 * ac * fl + 0.0107 * hc + 0.0438 * ac + 0.158 * fl
+        log_bpd_hc_ac_fl = 1.3596 - 0.00386 * ac * fl + 0.0064 * hc + 0.00061 * bpd * ac + 0.0424 * ac + 0.174 * fl
+
+        log_weight = np.where(
+            ~np.isnan(log_bpd_hc_ac_fl), log_bpd_hc_ac_fl,
+            np.where(~np.isnan(log_hc_ac_fl), log_hc_ac_fl, log_ac_fl)
+        )
+
+    return np.round(10 ** log_weight)
+
+def score_biometry(gestational_days, reference=None, **measurements):
+    """
+    Compute z-scores and percentiles of fetal measurements, for any number of fetuses at once.
+
+    Args:
+        gestational_days (array-like): Gestational age of each examination in days
+        reference (BiometryReference, optional): Reference curves, defaults to
+            get_biometry_reference()
+        **measurements: Arrays of 'bpd', 'hc', 'ac', 'fl' (mm) and 'efw' (g),
+            aligned on gestational_days; 0, null or NaN means not measured
+
+    Returns:
+        dict: For each measurement given, {'mean', 'z_score', 'percentile'} arrays.
+              NaN when the value is missing or the age is outside the reference range
+    """
+    if reference is None:
+        reference = get_biometry_reference()
+
+    gestational_days = np.atleast_1d(np.asarray(gestational_days, dtype=float))
+    scores = {}
+
+    for name, values in measurements.items():
+        if name not in MEASUREMENTS:
+            raise ValueError(f"Mesure inconnue : {name}")
+
+        values = _as_measurement_array(values, gestational_days.shape)
+        mean, lower_sd, upper_sd = reference.interpolate(name, gestational_days)
+
+        with np.errstate(invalid='ignore'):
+            z_score = (values - mean) / np.where(values < mean, lower_sd, upper_sd)
+
+        scores[name] = {
+            'mean': mean,
+            'z_score': z_score,
+            'percentile': 100 * _normal_cdf(z_score)
+        }
+
+    return scores
+
+def analyze_ultrasound(gestational_days, bpd=None, hc=None, ac=None, fl=None, efw=None,
+                       amniotic_fluid_index=None, placenta_location=None):
+    """
+    Interpret the measurements of one ultrasound examination.
+
+    Args:
+        gestational_days (int): Gestational age in days
+        bpd, hc, ac, fl (float, optional): Biometry in mm
+        efw (float, optional): Estimated fetal weight in g, computed from the biometry if omitted
+        amniotic_fluid_index (float, optional): Amniotic fluid index in cm
+        placenta_location (str, optional): Placenta location
+
+    Returns:
+        dict: efw, measurements (value, mean, z_score, percentile for each measurement),
+              concerns and recommendations
+    """
+    if not efw and ac and fl:
+        efw = int(estimate_fetal_weight([bpd], [hc], [ac], [fl])[0])
+
+    values = {'bpd': bpd, 'hc': hc, 'ac': ac, 'fl': fl, 'efw': efw}
+    scores = score_biometry([gestational_days], **{name: [value] for name, value in values.items()})
+
+    results = {
+        'efw': _to_number(efw),
+        'measurements': {},
+        'concerns': [],
+        'recommendations': []
+    }
+
+    for name in MEASUREMENTS:
+        if not values[name]:
+            continue
+
+        results['measurements'][name] = {
+            'value': values[name],
+            'mean': _to_number(scores[name]['mean'][0], 1),
+            'z_score': _to_number(scores[name]['z_score'][0], 2),
+            'percentile': _to_number(scores[name]['percentile'][0], 1)
+        }
+
+    percentile = {name: data['percentile'] for name, data in results['measurements'].items()
+                  if data['percentile'] is not None}
+
+    # Growth concerns
+    if percentile.get('ac', 100) < 10 or percentile.get('efw', 100) < 10:
+        results['concerns'].append("Biométrie abdominale ou poids estimé < 10e percentile : suspicion de RCIU")
+        results['recommendations'].append("Contrôle de la croissance et Doppler ombilical dans 2 à 3 semaines")
+    if percentile.get('efw', 0) > 90:
+        results['concerns'].append("Poids fœtal estimé > 90e percentile : suspicion de macrosomie")
+        results['recommendations'].append("Dépistage diabète gestationnel")
+    for name in ('bpd', 'hc', 'fl'):
+        if name in percentile and (percentile[name] < 3 or percentile[name] > 97):
+            results['concerns'].append(f"{MEASUREMENT_LABELS[name]} hors des normes ({percentile[name]:.0f}e percentile)")
+
+    # Common recommendations based on gestational age
+    weeks = gestational_days // 7
+    if weeks < 20:
+        results['recommendations'].append("Confirmer la vitalité et l'âge gestationnel")
+        results['recommendations'].append("Évaluer l'anatomie fœtale")
+    elif weeks < 24:
+        results['recommendations'].append("Évaluation morphologique détaillée")
+        results['recommendations'].append("Vérifier la position placentaire")
+    elif weeks < 34:
+        results['recommendations'].append("Surveillance de la croissance fœtale")
+        results['recommendations'].append("Évaluation du col utérin si risque de prématurité")
+    else:
+        results['recommendations'].append("Vérifier la présentation fœtale")
+        results['recommendations'].append("Évaluation du bien-être fœtal")
+        results['recommendations'].append("Estimer le poids fœtal")
+
+    # Amniotic fluid
+    if amniotic_fluid_index:
+        if amniotic_fluid_index < 5:
+            results['concerns'].append("Oligoamnios (AFI < 5 cm)")
+            results['recommendations'].append("Rechercher une rupture des membranes")
+            results['recommendations'].append("Évaluer la fonction rénale fœtale")
+        elif amniotic_fluid_index > 25:
+            results['concerns'].append("Hydramnios (AFI > 25 cm)")
+            results['recommendations'].append("Rechercher une anomalie fœtale")
+            results['recommendations'].append("Dépistage diabète gestationnel")
+
+    # Placenta
+    if placenta_location and ('praevia' in placenta_location or 'bas' in placenta_location):
+        results['concerns'].append("Placenta bas-inséré ou praevia")
+        results['recommendations'].append("Contrôle échographique à 32 SA")
+
+    # Remove duplicates while keeping the order
+    results['recommendations'] = list(dict.fromkeys(results['recommendations']))
+
+    return results
+
+def _to_number(value, digits=0):
+    if value is None or np.isnan(value):
+        return None
+    return round(float(value), digits) if digits else int(round(float(value)))
+
+def to_json_list(array, digits=2):
+    """Convert an array to a JSON-serializable list, NaN becoming null."""
+    rounded = np.round(np.asarray(array, dtype=float), digits)
+    return [None if np.isnan(value) else value for value in rounded.tolist()]
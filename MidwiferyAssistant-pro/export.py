@@ -0,0 +1,129 @@
+import csv
+import json
+import sys
+from datetime import date, datetime
+import click
+from sqlalchemy import or_, select
+from app import app, db
+from models import (Patient, BloodPressureRecord, BiomedicalRecord, UltrasoundRecord, DeliveryRecord,
+                    BabyRecord, PostnatalCheckup, VaccinationRecord, BreastfeedingRecord)
+
+# Rows fetched per round trip by the server-side cursors
+EXPORT_BATCH_SIZE = 1000
+
+# Lines are sent in chunks of about this many characters rather than one by one
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+class _Echo:
+    # File-like object for csv.writer that hands each line back instead of buffering it
+    def write(self, value):
+        return value
+
+def _sections(patient_ids):
+    # (record type, model, filter) of every part of the clinical record, patient_ids being a subquery
+    baby_ids = select(BabyRecord.id).where(BabyRecord.mother_id.in_(patient_ids))
+    return [
+        ('patient', Patient, Patient.id.in_(patient_ids)),
+        ('blood_pressure', BloodPressureRecord, BloodPressureRecord.patient_id.in_(patient_ids)),
+        ('biomedical', BiomedicalRecord, BiomedicalRecord.patient_id.in_(patient_ids)),
+        ('ultrasound', UltrasoundRecord, UltrasoundRecord.patient_id.in_(patient_ids)),
+        ('delivery', DeliveryRecord, DeliveryRecord.patient_id.in_(patient_ids)),
+        ('baby', BabyRecord, BabyRecord.mother_id.in_(patient_ids)),
+        ('checkup', PostnatalCheckup, or_(PostnatalCheckup.patient_id.in_(patient_ids),
+                                          PostnatalCheckup.baby_id.in_(baby_ids))),
+        ('vaccination', VaccinationRecord, VaccinationRecord.baby_id.in_(baby_ids)),
+        ('breastfeeding', BreastfeedingRecord, BreastfeedingRecord.mother_id.in_(patient_ids))
+    ]
+
+def _value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def iter_clinical_records(patient_ids):
+    """
+    Stream every record of a set of patients, section by section.
+
+    Each section is read with one query on a server-side cursor (yield_per)
+    selecting plain columns, so no ORM instance is kept in the session and
+    memory use does not depend on the number of rows.
+
+    Args:
+        patient_ids: Select of the patient IDs to export
+
+    Yields:
+        tuple: (record type, column names, row values with ISO dates)
+    """
+    for record_type, model, condition in _sections(patient_ids):
+        columns = list(model.__table__.columns)
+        names = [column.key for column in columns]
+        query = select(*columns).where(condition).order_by(model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+        for row in db.session.execute(query):
+            yield record_type, names, [_value(value) for value in row]
+
+def generate_ndjson(patient_ids):
+    """Yield the records as NDJSON lines, each object holding its record type."""
+    for record_type, names, values in iter_clinical_records(patient_ids):
+        yield json.dumps({'record_type': record_type, **dict(zip(names, values))}, ensure_ascii=False) + '\n'
+
+def generate_csv(patient_ids):
+    """Yield the records as CSV lines, with a header line at the start of each section."""
+    writer = csv.writer(_Echo())
+    current_type = None
+
+    for record_type, names, values in iter_clinical_records(patient_ids):
+        if record_type != current_type:
+            current_type = record_type
+            yield writer.writerow(['record_type'] + names)
+        yield writer.writerow([record_type] + ['' if value is None else value for value in values])
+
+def generate_export(patient_ids, export_format):
+    """
+    Stream an export in chunks of whole lines.
+
+    Args:
+        patient_ids: Select of the patient IDs to export
+        export_format (str): 'ndjson' or 'csv'
+
+    Yields:
+        str: Consecutive lines of the export, about EXPORT_CHUNK_SIZE characters at a time
+    """
+    lines = generate_csv(patient_ids) if export_format == 'csv' else generate_ndjson(patient_ids)
+
+    chunk = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+
+    if chunk:
+        yield ''.join(chunk)
+
+@app.cli.command('export-records')
+@click.option('--patient-id', type=int, default=None, help="Exporter le dossier de cette patiente")
+@click.option('--user-id', type=int, default=None, help="Exporter les dossiers de toutes les patientes de cet utilisateur")
+@click.option('--format', 'export_format', type=click.Choice(list(FORMATS)), default='ndjson', help="Format de l'export")
+@click.option('--output', type=click.File('w', encoding='utf-8'), default=None, help="Fichier de sortie (sortie standard par défaut)")
+def export_records_command(patient_id, user_id, export_format, output):
+    """Stream the full clinical record of a patient or of a whole practice."""
+    if (patient_id is None) == (user_id is None):
+        raise click.UsageError("Indiquer --patient-id ou --user-id")
+
+    if patient_id is not None:
+        patient_ids = select(Patient.id).where(Patient.id == patient_id)
+    else:
+        patient_ids = select(Patient.id).where(Patient.user_id == user_id)
+
+    output = output or sys.stdout
+    for chunk in generate_export(patient_ids, export_format):
+        output.write(chunk)
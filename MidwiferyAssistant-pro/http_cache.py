@@ -0,0 +1,82 @@
+import hashlib
+from collections import namedtuple
+from flask import request
+from sqlalchemy import func, select, true
+from app import app, db
+
+Version = namedtuple('Version', ['etag', 'last_modified'])
+
+def collection_version(user_id, *collections, updated_at=()):
+    """
+    Compute the version of a response from the rows it is built from, with one aggregate query.
+
+    The count, the highest ID and the latest update of each collection (its
+    latest creation for the records that are never modified) change whenever
+    the response would.
+    The user, the query string (?fields=) and the extra timestamps are part
+    of the ETag as well.
+
+    Args:
+        user_id (int): ID of the midwife, responses are private
+        collections: (model, [conditions]) pairs, one per collection in the response
+        updated_at (tuple): Other timestamps the response depends on (parent record)
+
+    Returns:
+        Version: Strong ETag and Last-Modified (None when there is no timestamp)
+    """
+    aggregates = []
+    for model, conditions in collections:
+        changed_at = model.updated_at if hasattr(model, 'updated_at') else model.created_at
+        aggregates.append(select(
+            func.count(model.id), func.max(model.id), func.max(changed_at)
+        ).where(*conditions).subquery())
+
+    values = []
+    if aggregates:
+        # Each aggregate is a single row, joining them gives one row of values
+        source = aggregates[0]
+        for aggregate in aggregates[1:]:
+            source = source.join(aggregate, true())
+        row = db.session.execute(
+            select(*[column for aggregate in aggregates for column in aggregate.c]).select_from(source)
+        ).one()
+        values = list(row)
+
+    timestamps = [value for value in values[2::3] if value is not None] + [value for value in updated_at if value is not None]
+    last_modified = max(timestamps) if timestamps else None
+
+    token = repr((user_id, request.path, request.query_string, values, list(updated_at)))
+    return Version(hashlib.sha256(token.encode()).hexdigest()[:20], last_modified)
+
+def not_modified(version):
+    """
+    Answer a conditional GET whose cached copy is still current.
+
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+
+    Args:
+        version (Version): Current version of the response
+
+    Returns:
+        Response: An empty 304 response, or None when the full response must be sent
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(version.etag)
+    elif request.if_modified_since and version.last_modified:
+        # HTTP dates have a one-second resolution
+        fresh = version.last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+
+    return with_version(app.response_class(status=304), version)
+
+def with_version(response, version):
+    """Add the validators of a version to a response; the browser revalidates on every use."""
+    response.set_etag(version.etag)
+    if version.last_modified:
+        response.last_modified = version.last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,86 @@
+import time
+import threading
+from collections import OrderedDict
+from flask_login import UserMixin
+from app import app, db
+from models import User
+
+class UserSnapshot(UserMixin):
+    """
+    Lightweight read-only copy of the user fields used on every request.
+
+    It is what current_user holds: routes that change the user must load the
+    User row itself (see profile) and call invalidate_user() afterwards.
+    """
+
+    def __init__(self, id, username, default_cycle_length):
+        self.id = id
+        self.username = username
+        self.default_cycle_length = default_cycle_length
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.username}>'
+
+class IdentityCache:
+    """
+    Per-process LRU cache of user snapshots with a time-to-live.
+
+    Changes made in this process are visible at once through invalidate();
+    the TTL bounds how long another worker process can serve a stale snapshot.
+    """
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id, snapshot):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+identity_cache = IdentityCache(app.config["USER_CACHE_SIZE"], app.config["USER_CACHE_TTL"])
+
+def load_user_snapshot(user_id):
+    """
+    Get the snapshot of a user, from the cache or with one query on the primary key.
+
+    Args:
+        user_id (int): ID of the user
+
+    Returns:
+        UserSnapshot: The snapshot, or None if the user does not exist
+    """
+    snapshot = identity_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+
+    row = db.session.query(User.id, User.username, User.default_cycle_length).filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    snapshot = UserSnapshot(*row)
+    identity_cache.put(user_id, snapshot)
+    return snapshot
+
+def invalidate_user(user_id):
+    """Drop the cached snapshot of a user after their account was changed."""
+    identity_cache.invalidate(user_id)
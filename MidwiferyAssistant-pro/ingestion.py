@@ -0,0 +1,300 @@
+import csv
+import json
+from datetime import date, datetime, timezone
+import click
+from sqlalchemy import insert
+from app import app, db
+from models import Patient, BloodPressureRecord
+from utils import classify_blood_pressure
+from audit import UnitOfWork
+import summary
+
+# Plausible ranges of a home measurement, anything outside is a device or typing error
+SYSTOLIC_RANGE = (50, 300)
+DIASTOLIC_RANGE = (20, 200)
+
+# Accepted menstrual cycle lengths in days
+CYCLE_LENGTH_RANGE = (20, 45)
+
+# Date formats accepted in imported files: ISO and French
+IMPORT_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y')
+
+class BatchTooLarge(ValueError):
+    """Raised when a bulk request holds more items than allowed."""
+
+def parse_ndjson(stream, max_items):
+    """
+    Read newline-delimited JSON objects from a binary stream, one per line.
+
+    Lines that are not valid JSON are kept as None so that their position in
+    the per-item status array is preserved.
+
+    Raises:
+        BatchTooLarge: If the stream holds more than max_items lines
+    """
+    items = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+
+        if len(items) >= max_items:
+            raise BatchTooLarge(max_items)
+
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append(None)
+
+    return items
+
+def _parse_reading(item, now):
+    # Returns (row, error)
+    if not isinstance(item, dict):
+        return None, 'Format invalide'
+
+    try:
+        patient_id = int(item['patientId'])
+        systolic = int(item['systolic'])
+        diastolic = int(item['diastolic'])
+        heart_rate = int(item['heartRate']) if item.get('heartRate') else None
+    except (KeyError, TypeError, ValueError):
+        return None, 'patientId, systolic et diastolic sont obligatoires et numériques'
+
+    if not SYSTOLIC_RANGE[0] <= systolic <= SYSTOLIC_RANGE[1] or not DIASTOLIC_RANGE[0] <= diastolic <= DIASTOLIC_RANGE[1]:
+        return None, 'Valeurs tensionnelles hors limites'
+
+    recorded_at = now
+    if item.get('recordedAt'):
+        try:
+            recorded_at = datetime.fromisoformat(item['recordedAt'])
+        except (TypeError, ValueError):
+            return None, 'recordedAt doit être une date ISO 8601'
+
+        # Stored as naive UTC like the other timestamps
+        if recorded_at.tzinfo is not None:
+            recorded_at = recorded_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return {
+        'patient_id': patient_id,
+        'systolic': systolic,
+        'diastolic': diastolic,
+        'heart_rate': heart_rate,
+        'notes': item.get('notes') or None,
+        'recorded_at': recorded_at
+    }, None
+
+def ingest_blood_pressure_readings(user_id, items):
+    """
+    Validate, classify and insert a batch of blood pressure readings.
+
+    Patient ownership is checked for the whole batch with one query, the
+    readings are classified with classify_blood_pressure and the valid ones
+    are written with a single bulk insert in the current transaction; the
+    caller commits (UnitOfWork).
+
+    Args:
+        user_id (int): ID of the midwife sending the readings
+        items (list): Readings {patientId, systolic, diastolic, heartRate, recordedAt, notes}
+
+    Returns:
+        dict: saved (count), statuses (one per item, 'error' for rejected items)
+              and errors ({index: message})
+    """
+    now = datetime.utcnow()
+    statuses = ['error'] * len(items)
+    errors = {}
+    rows = []
+    positions = []
+
+    for index, item in enumerate(items):
+        row, error = _parse_reading(item, now)
+        if error:
+            errors[index] = error
+            continue
+        rows.append(row)
+        positions.append(index)
+
+    # Keep only the readings of the midwife's own patients
+    patient_ids = {row['patient_id'] for row in rows}
+    owned = set()
+    if patient_ids:
+        owned = {patient_id for (patient_id,) in db.session.query(Patient.id).filter(
+            Patient.user_id == user_id,
+            Patient.id.in_(patient_ids)
+        )}
+
+    valid_rows = []
+    valid_positions = []
+    for row, index in zip(rows, positions):
+        if row['patient_id'] in owned:
+            valid_rows.append(dict(row, user_id=user_id))
+            valid_positions.append(index)
+        else:
+            errors[index] = 'Patient non trouvé'
+
+    if valid_rows:
+        classes = classify_blood_pressure(
+            [row['systolic'] for row in valid_rows],
+            [row['diastolic'] for row in valid_rows]
+        )
+        for index, status in zip(valid_positions, classes.tolist()):
+            statuses[index] = status
+
+        db.session.execute(insert(BloodPressureRecord), valid_rows)
+        summary.record_blood_pressure_batch(
+            user_id, [row['recorded_at'] for row, status in zip(valid_rows, classes) if status == 'critical']
+        )
+
+    return {
+        'saved': len(valid_rows),
+        'statuses': statuses,
+        'errors': errors
+    }
+
+class InvalidImportFile(ValueError):
+    """Raised when an import file does not have the expected header."""
+
+def _parse_import_date(value, label, today):
+    # Returns (date, error), None for an empty cell
+    value = (value or '').strip()
+    if not value:
+        return None, None
+
+    for date_format in IMPORT_DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(value, date_format).date()
+            break
+        except ValueError:
+            continue
+    else:
+        return None, f'{label} doit être au format AAAA-MM-JJ ou JJ/MM/AAAA'
+
+    if parsed > today:
+        return None, f'{label} ne peut pas être dans le futur'
+
+    return parsed, None
+
+def _parse_patient_row(row, user_id, today):
+    # Returns (row, error)
+    first_name = (row.get('first_name') or '').strip()
+    last_name = (row.get('last_name') or '').strip()
+    if not first_name or not last_name:
+        return None, 'first_name et last_name sont obligatoires'
+    if len(first_name) > 64 or len(last_name) > 64:
+        return None, 'first_name et last_name sont limités à 64 caractères'
+
+    date_of_birth, error = _parse_import_date(row.get('date_of_birth'), 'date_of_birth', today)
+    if error:
+        return None, error
+
+    last_period_date, error = _parse_import_date(row.get('last_period_date'), 'last_period_date', today)
+    if error:
+        return None, error
+
+    cycle_length = 28
+    if (row.get('cycle_length') or '').strip():
+        try:
+            cycle_length = int(row['cycle_length'])
+        except ValueError:
+            return None, 'cycle_length doit être un nombre entier'
+        if not CYCLE_LENGTH_RANGE[0] <= cycle_length <= CYCLE_LENGTH_RANGE[1]:
+            return None, f'cycle_length doit être entre {CYCLE_LENGTH_RANGE[0]} et {CYCLE_LENGTH_RANGE[1]} jours'
+
+    return {
+        'first_name': first_name,
+        'last_name': last_name,
+        'date_of_birth': date_of_birth,
+        'last_period_date': last_period_date,
+        'cycle_length': cycle_length,
+        'notes': (row.get('notes') or '').strip(),
+        'user_id': user_id
+    }, None
+
+def _insert_patients(user_id, rows, first_line, last_line):
+    # One transaction and one audit entry per chunk
+    with UnitOfWork(
+        "Import de patients",
+        details=f"{len(rows)} patients importés (lignes {first_line} à {last_line})",
+        user_id=user_id
+    ):
+        # Core insert on the table: the ORM bulk insert would split the batch wherever the optional dates are None
+        db.session.execute(insert(Patient.__table__), rows)
+        summary.record_patients_batch(user_id, [(row['last_period_date'], row['cycle_length']) for row in rows])
+
+def import_patients_csv(user_id, lines, chunk_size=500):
+    """
+    Import patients from a CSV file, validating each row and inserting them in chunks.
+
+    The file needs a header line with first_name and last_name; date_of_birth,
+    last_period_date, cycle_length and notes are optional. The file is read
+    row by row and every chunk of valid rows is written with one bulk insert
+    and committed with one audit entry, so memory use is bounded by the chunk
+    size and an error in one row never aborts the import.
+
+    Args:
+        user_id (int): ID of the midwife the patients belong to
+        lines: Iterable of text lines (open file or decoded stream)
+        chunk_size (int): Patients inserted per transaction
+
+    Returns:
+        dict: imported (count), chunks (count) and errors ({line number: message})
+
+    Raises:
+        InvalidImportFile: If the header lacks the first_name or last_name column
+    """
+    reader = csv.DictReader(lines)
+    header = [name.strip() for name in reader.fieldnames or []]
+    if 'first_name' not in header or 'last_name' not in header:
+        raise InvalidImportFile("L'en-tête doit contenir au moins first_name et last_name")
+    reader.fieldnames = header
+
+    today = date.today()
+    imported = 0
+    chunks = 0
+    errors = {}
+    rows = []
+    first_line = None
+
+    for row in reader:
+        line = reader.line_num
+        parsed, error = _parse_patient_row(row, user_id, today)
+        if error:
+            errors[line] = error
+            continue
+
+        if not rows:
+            first_line = line
+        rows.append(parsed)
+
+        if len(rows) >= chunk_size:
+            _insert_patients(user_id, rows, first_line, line)
+            imported += len(rows)
+            chunks += 1
+            rows = []
+
+    if rows:
+        _insert_patients(user_id, rows, first_line, reader.line_num)
+        imported += len(rows)
+        chunks += 1
+
+    return {
+        'imported': imported,
+        'chunks': chunks,
+        'errors': errors
+    }
+
+@app.cli.command('import-patients')
+@click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--user-id', type=int, required=True, help="Utilisateur auquel rattacher les patientes")
+@click.option('--chunk-size', type=int, default=None, help="Nombre de patientes insérées par transaction")
+def import_patients_command(csv_file, user_id, chunk_size):
+    """Import patients from a CSV file (first_name, last_name, date_of_birth, last_period_date, cycle_length, notes)."""
+    try:
+        result = import_patients_csv(user_id, csv_file, chunk_size or app.config["PATIENT_IMPORT_CHUNK_SIZE"])
+    except InvalidImportFile as error:
+        raise click.ClickException(str(error))
+
+    for line, error in result['errors'].items():
+        print(f"Ligne {line} : {error}")
+    print(f"Import terminé : {result['imported']} patientes en {result['chunks']} lots, {len(result['errors'])} lignes rejetées")
@@ -0,0 +1,206 @@
+import logging
+from datetime import datetime
+from functools import partial
+from sqlalchemy import func, inspect, or_
+from sqlalchemy.exc import IntegrityError
+from app import app, db
+from models import SchemaMigration
+
+def _create_tables():
+    """
+    Create the initial schema (every table that does not exist yet).
+    """
+    db.create_all()
+
+# Indexes introduced by each migration. A migration only creates its own
+# indexes: one declared later may cover a column that a later migration adds.
+HOT_PATH_INDEXES = (
+    'ix_blood_pressure_record_patient_id_recorded_at',
+    'ix_biomedical_record_patient_id_recorded_at',
+    'ix_ultrasound_record_patient_id_recorded_at',
+    'ix_delivery_record_patient_id_delivery_date',
+    'ix_baby_record_mother_id',
+    'ix_baby_record_delivery_id',
+    'ix_postnatal_checkup_patient_id_type_date',
+    'ix_postnatal_checkup_baby_id_type_date',
+    'ix_vaccination_record_baby_id_date_administered',
+    'ix_breastfeeding_record_baby_id_feeding_date',
+    'ix_postnatal_care_reminder_user_id_completed_date',
+    'ix_postnatal_care_reminder_user_id_date',
+    'ix_audit_log_user_id_timestamp',
+)
+PATIENT_PAGINATION_INDEXES = ('ix_patient_user_id_last_name_id',)
+SUMMARY_INDEXES = ('ix_blood_pressure_record_user_id_recorded_at',)
+REMINDER_SCHEDULE_INDEXES = (
+    'ix_postnatal_care_reminder_schedule_key',
+    'ix_delivery_record_delivery_date',
+    'ix_baby_record_birth_date',
+    'ix_postnatal_checkup_next_checkup_date',
+)
+CHANGE_TRACKING_INDEXES = (
+    'ix_patient_user_id_updated_at',
+    'ix_patient_user_id_client_id',
+    'ix_blood_pressure_record_user_id_updated_at',
+    'ix_blood_pressure_record_user_id_client_id',
+    'ix_postnatal_checkup_user_id_updated_at',
+    'ix_postnatal_checkup_user_id_client_id',
+    'ix_vaccination_record_user_id_updated_at',
+    'ix_vaccination_record_user_id_client_id',
+    'ix_breastfeeding_record_user_id_updated_at',
+    'ix_breastfeeding_record_user_id_client_id',
+    'ix_postnatal_care_reminder_user_id_updated_at',
+    'ix_postnatal_care_reminder_user_id_client_id',
+)
+PREGNANCY_INDEXES = ('ix_patient_user_id_last_period_date',)
+
+def _create_indexes(names):
+    """
+    Create indexes declared on the models that are missing from an existing database.
+
+    Databases created before the indexes were declared only have the primary keys
+    and unique constraints, so each index is created with checkfirst.
+
+    Args:
+        names (tuple): Names of the indexes to create
+    """
+    indexes = {index.name: index for table in db.metadata.sorted_tables for index in table.indexes}
+    for name in names:
+        indexes[name].create(bind=db.engine, checkfirst=True)
+
+def _add_missing_columns():
+    """
+    Add the columns declared on the models that are missing from existing tables.
+
+    create_all() never alters an existing table, so new nullable columns are
+    added with ALTER TABLE ... ADD COLUMN.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}')
+
+def _add_reminder_schedule_key():
+    """
+    Add the schedule key of the reminders, then its unique index and the scheduler's date indexes.
+    """
+    _add_missing_columns()
+    _create_indexes(REMINDER_SCHEDULE_INDEXES)
+
+def _add_change_tracking():
+    """
+    Add the change tracking columns of the synchronized records and backfill them.
+
+    Existing rows get version 1 and their creation time (recording time for
+    the blood pressure readings) as last update, so that the first
+    synchronization of a client returns them in their creation order.
+    """
+    _add_missing_columns()
+
+    now = datetime.utcnow()
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if 'updated_at' not in table.c or 'version' not in table.c:
+                continue
+
+            # Both columns in one statement: an UPDATE leaving out updated_at would set it to now (onupdate)
+            created = table.c.created_at if 'created_at' in table.c else table.c.recorded_at
+            connection.execute(
+                table.update()
+                .where(or_(table.c.updated_at.is_(None), table.c.version.is_(None)))
+                .values(updated_at=func.coalesce(table.c.updated_at, created, now), version=func.coalesce(table.c.version, 1))
+            )
+
+    _create_indexes(CHANGE_TRACKING_INDEXES)
+
+def _create_search_index():
+    """
+    Create the name search index of the patients and babies (FTS5 or trigram).
+    """
+    from search import create_search_index
+
+    create_search_index()
+
+def _build_summaries():
+    """
+    Create the dashboard summary tables and fill them from the existing records.
+    """
+    from summary import rebuild_summaries
+
+    _create_tables()
+    _create_indexes(SUMMARY_INDEXES)
+    rebuild_summaries()
+
+def _rebuild_summaries():
+    """
+    Recount the pregnancies of the dashboard summaries with the cycle adjustment of calculate_gestational_age.
+    """
+    from summary import rebuild_summaries
+
+    rebuild_summaries()
+
+# Ordered list of (version, description, function). Each migration must be
+# idempotent: a fresh database gets the full schema from the first one.
+MIGRATIONS = [
+    (1, "Schéma initial", _create_tables),
+    (2, "Index des filtres et tris fréquents", partial(_create_indexes, HOT_PATH_INDEXES)),
+    (3, "Index de pagination des patientes", partial(_create_indexes, PATIENT_PAGINATION_INDEXES)),
+    (4, "Tables de synthèse du tableau de bord", _build_summaries),
+    (5, "Âge gestationnel en jours des échographies", _add_missing_columns),
+    (6, "Suivi du dépistage nocturne des risques", _create_tables),
+    (7, "Clé d'unicité des rappels du calendrier postnatal", _add_reminder_schedule_key),
+    (8, "Suivi des modifications pour la synchronisation hors ligne", _add_change_tracking),
+    (9, "Index de recherche des noms des patientes et des bébés", _create_search_index),
+    (10, "Index des grossesses en cours par date des dernières règles", partial(_create_indexes, PREGNANCY_INDEXES)),
+    (11, "Synthèses du tableau de bord avec l'ajustement du cycle de la règle de Naegele", _rebuild_summaries),
+    (12, "Index de recherche des noms découpés en mots", _create_search_index),
+]
+
+def upgrade_database():
+    """
+    Apply the schema migrations that have not been applied yet, in order.
+
+    Returns:
+        list: Versions applied during this call
+    """
+    SchemaMigration.__table__.create(bind=db.engine, checkfirst=True)
+    applied = {version for (version,) in db.session.query(SchemaMigration.version).all()}
+
+    newly_applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+
+        logging.info(f"Migration {version}: {description}")
+        migrate()
+
+        db.session.add(SchemaMigration(version=version, description=description))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker recorded this migration at the same time
+            db.session.rollback()
+            continue
+
+        newly_applied.append(version)
+
+    return newly_applied
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Apply the pending schema migrations."""
+    applied = upgrade_database()
+    if applied:
+        print(f"Migrations appliquées : {', '.join(str(v) for v in applied)}")
+    else:
+        print("Base de données à jour.")
@@ -29,6 +29,13 @@ class User(UserMixin, db.Model):
         return f'<User {self.username}>'
 
 class Patient(db.Model):
+    __table_args__ = (
+        db.Index('ix_patient_user_id_last_name_id', 'user_id', 'last_name', 'id'),
+        db.Index('ix_patient_user_id_updated_at', 'user_id', 'updated_at', 'id'),
+        db.Index('ix_patient_user_id_client_id', 'user_id', 'client_id', unique=True),
+        db.Index('ix_patient_user_id_last_period_date', 'user_id', 'last_period_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(64), nullable=False)
     last_name = db.Column(db.String(64), nullable=False)
@@ -37,7 +44,13 @@ class Patient(db.Model):
     cycle_length = db.Column(db.Integer, default=28)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, default=1)
+    client_id = db.Column(db.String(36))  # generated by the offline client, makes replayed creations idempotent
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    # Every update checks and increments version: a row changed since it was read is a conflict
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationships
     blood_pressure_records = db.relationship('BloodPressureRecord', backref='patient', lazy='dynamic')
@@ -48,19 +61,35 @@ class Patient(db.Model):
         return f'<Patient {self.first_name} {self.last_name}>'
 
 class BloodPressureRecord(db.Model):
+    __table_args__ = (
+        db.Index('ix_blood_pressure_record_patient_id_recorded_at', 'patient_id', 'recorded_at'),
+        db.Index('ix_blood_pressure_record_user_id_recorded_at', 'user_id', 'recorded_at'),
+        db.Index('ix_blood_pressure_record_user_id_updated_at', 'user_id', 'updated_at', 'id'),
+        db.Index('ix_blood_pressure_record_user_id_client_id', 'user_id', 'client_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     systolic = db.Column(db.Integer, nullable=False)
     diastolic = db.Column(db.Integer, nullable=False)
     heart_rate = db.Column(db.Integer)
     notes = db.Column(db.Text)
     recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, default=1)
+    client_id = db.Column(db.String(36))
     patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    __mapper_args__ = {'version_id_col': version}
+
     def __repr__(self):
         return f'<BloodPressureRecord {self.systolic}/{self.diastolic}>'
 
 class BiomedicalRecord(db.Model):
+    __table_args__ = (
+        db.Index('ix_biomedical_record_patient_id_recorded_at', 'patient_id', 'recorded_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     hemoglobin = db.Column(db.Float)
     platelets = db.Column(db.Integer)
@@ -77,8 +106,13 @@ class BiomedicalRecord(db.Model):
         return f'<BiomedicalRecord for patient {self.patient_id}>'
 
 class UltrasoundRecord(db.Model):
+    __table_args__ = (
+        db.Index('ix_ultrasound_record_patient_id_recorded_at', 'patient_id', 'recorded_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     gestational_age = db.Column(db.Integer)  # in weeks
+    gestational_days = db.Column(db.Integer)  # total age in days, used for the biometry percentiles
     bpd = db.Column(db.Float)  # Biparietal Diameter
     fl = db.Column(db.Float)   # Femur Length
     ac = db.Column(db.Float)   # Abdominal Circumference
@@ -94,6 +128,11 @@ class UltrasoundRecord(db.Model):
         return f'<UltrasoundRecord at {self.gestational_age} weeks>'
 
 class DeliveryRecord(db.Model):
+    __table_args__ = (
+        db.Index('ix_delivery_record_patient_id_delivery_date', 'patient_id', 'delivery_date'),
+        db.Index('ix_delivery_record_delivery_date', 'delivery_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     delivery_date = db.Column(db.DateTime, nullable=False)
     delivery_type = db.Column(db.String(50), nullable=False)  # 'vaginal', 'cesarean', 'instrumental', etc.
@@ -115,6 +154,12 @@ class DeliveryRecord(db.Model):
         return f'<DeliveryRecord {self.delivery_type} on {self.delivery_date}>'
 
 class BabyRecord(db.Model):
+    __table_args__ = (
+        db.Index('ix_baby_record_mother_id', 'mother_id'),
+        db.Index('ix_baby_record_delivery_id', 'delivery_id'),
+        db.Index('ix_baby_record_birth_date', 'birth_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(64))
     last_name = db.Column(db.String(64))
@@ -145,6 +190,14 @@ class BabyRecord(db.Model):
         return f'<BabyRecord {name} born on {self.birth_date}>'
 
 class PostnatalCheckup(db.Model):
+    __table_args__ = (
+        db.Index('ix_postnatal_checkup_patient_id_type_date', 'patient_id', 'checkup_type', 'checkup_date'),
+        db.Index('ix_postnatal_checkup_baby_id_type_date', 'baby_id', 'checkup_type', 'checkup_date'),
+        db.Index('ix_postnatal_checkup_next_checkup_date', 'next_checkup_date'),
+        db.Index('ix_postnatal_checkup_user_id_updated_at', 'user_id', 'updated_at', 'id'),
+        db.Index('ix_postnatal_checkup_user_id_client_id', 'user_id', 'client_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     checkup_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     checkup_type = db.Column(db.String(50), nullable=False)  # 'mother' or 'baby'
@@ -161,9 +214,14 @@ class PostnatalCheckup(db.Model):
     next_checkup_date = db.Column(db.DateTime)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, default=1)
+    client_id = db.Column(db.String(36))
     patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'))  # for mother
     baby_id = db.Column(db.Integer, db.ForeignKey('baby_record.id'))  # for baby
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationships
     patient = db.relationship('Patient', backref=db.backref('postnatal_checkups', lazy='dynamic'))
@@ -174,6 +232,12 @@ class PostnatalCheckup(db.Model):
         return f'<PostnatalCheckup for {self.checkup_type} on {self.checkup_date}>'
 
 class VaccinationRecord(db.Model):
+    __table_args__ = (
+        db.Index('ix_vaccination_record_baby_id_date_administered', 'baby_id', 'date_administered'),
+        db.Index('ix_vaccination_record_user_id_updated_at', 'user_id', 'updated_at', 'id'),
+        db.Index('ix_vaccination_record_user_id_client_id', 'user_id', 'client_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     vaccine_name = db.Column(db.String(100), nullable=False)  # BCG, VPO, Vitamin K, etc.
     date_administered = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -185,8 +249,13 @@ class VaccinationRecord(db.Model):
     reaction = db.Column(db.Text)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, default=1)
+    client_id = db.Column(db.String(36))
     baby_id = db.Column(db.Integer, db.ForeignKey('baby_record.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationships
     baby = db.relationship('BabyRecord', backref=db.backref('vaccinations', lazy='dynamic'))
@@ -196,6 +265,12 @@ class VaccinationRecord(db.Model):
         return f'<VaccinationRecord {self.vaccine_name} for baby {self.baby_id}>'
 
 class BreastfeedingRecord(db.Model):
+    __table_args__ = (
+        db.Index('ix_breastfeeding_record_baby_id_feeding_date', 'baby_id', 'feeding_date'),
+        db.Index('ix_breastfeeding_record_user_id_updated_at', 'user_id', 'updated_at', 'id'),
+        db.Index('ix_breastfeeding_record_user_id_client_id', 'user_id', 'client_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     feeding_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     feeding_type = db.Column(db.String(50), nullable=False)  # 'exclusive breastfeeding', 'mixed', 'formula'
@@ -203,9 +278,14 @@ class BreastfeedingRecord(db.Model):
     issues = db.Column(db.Text)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, default=1)
+    client_id = db.Column(db.String(36))
     mother_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
     baby_id = db.Column(db.Integer, db.ForeignKey('baby_record.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationships
     mother = db.relationship('Patient', backref=db.backref('breastfeeding_records', lazy='dynamic'))
@@ -216,6 +296,14 @@ class BreastfeedingRecord(db.Model):
         return f'<BreastfeedingRecord for baby {self.baby_id} on {self.feeding_date}>'
 
 class PostnatalCareReminder(db.Model):
+    __table_args__ = (
+        db.Index('ix_postnatal_care_reminder_user_id_completed_date', 'user_id', 'completed', 'reminder_date'),
+        db.Index('ix_postnatal_care_reminder_user_id_date', 'user_id', 'reminder_date'),
+        db.Index('ix_postnatal_care_reminder_schedule_key', 'schedule_key', unique=True),
+        db.Index('ix_postnatal_care_reminder_user_id_updated_at', 'user_id', 'updated_at', 'id'),
+        db.Index('ix_postnatal_care_reminder_user_id_client_id', 'user_id', 'client_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
@@ -224,9 +312,15 @@ class PostnatalCareReminder(db.Model):
     priority = db.Column(db.String(50), default='normal')  # 'high', 'normal', 'low'
     completed = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, default=1)
+    client_id = db.Column(db.String(36))
+    schedule_key = db.Column(db.String(64))  # set on the reminders of the postnatal schedule, one per source record and step
     patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'))
     baby_id = db.Column(db.Integer, db.ForeignKey('baby_record.id'))
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationships
     patient = db.relationship('Patient', backref=db.backref('postnatal_reminders', lazy='dynamic'))
@@ -237,6 +331,10 @@ class PostnatalCareReminder(db.Model):
         return f'<PostnatalCareReminder {self.title} on {self.reminder_date}>'
 
 class AuditLog(db.Model):
+    __table_args__ = (
+        db.Index('ix_audit_log_user_id_timestamp', 'user_id', db.text('timestamp DESC')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     action = db.Column(db.String(128), nullable=False)
@@ -249,3 +347,44 @@ class AuditLog(db.Model):
 
     def __repr__(self):
         return f'<AuditLog {self.action}>'
+
+class UserSummary(db.Model):
+    # Dashboard counters maintained incrementally by the record-writing routes
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    patient_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<UserSummary for user {self.user_id}>'
+
+class DailySummary(db.Model):
+    # Per-day dashboard counters, read over a bounded window of days
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    pregnancies_started = db.Column(db.Integer, nullable=False, default=0)  # patients whose cycle-adjusted LMP is this day
+    pending_reminders = db.Column(db.Integer, nullable=False, default=0)  # uncompleted reminders due this day
+    critical_bp_alerts = db.Column(db.Integer, nullable=False, default=0)
+    hellp_alerts = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailySummary for user {self.user_id} on {self.day}>'
+
+class ScreeningRun(db.Model):
+    # Progress of the population risk screening job, used as its checkpoint
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    since = db.Column(db.DateTime)  # only results recorded after this time are screened (None: all)
+    last_patient_id = db.Column(db.Integer, nullable=False, default=0)  # patients up to this ID are done
+    patients_screened = db.Column(db.Integer, nullable=False, default=0)
+    reminders_created = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ScreeningRun {self.id} at patient {self.last_patient_id}>'
+
+class SchemaMigration(db.Model):
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(128), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SchemaMigration {self.version}>'
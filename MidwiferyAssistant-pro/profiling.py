@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from app import app, db
+from serialization import FastJSONProvider
+
+# Upper bounds of the request duration histogram, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statements kept per request for the slow-request log
+MAX_LOGGED_STATEMENTS = 50
+
+class RequestMetrics:
+    """
+    Thread-safe per-endpoint aggregates of the profiled requests.
+
+    The values are kept in this process only: with several worker processes
+    each one exposes its own counters, to be summed by the scraper.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = defaultdict(lambda: {
+            'count': 0,
+            'duration': 0.0,
+            'buckets': [0] * len(self.buckets),
+            'sql_queries': 0,
+            'sql_duration': 0.0,
+            'serialization': 0.0,
+            'response_bytes': 0
+        })
+
+    def observe(self, endpoint, method, status, duration, sql_queries, sql_duration, serialization, response_bytes):
+        with self._lock:
+            series = self._series[(endpoint, method, status)]
+            series['count'] += 1
+            series['duration'] += duration
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    series['buckets'][index] += 1
+            series['sql_queries'] += sql_queries
+            series['sql_duration'] += sql_duration
+            series['serialization'] += serialization
+            series['response_bytes'] += response_bytes
+
+    def render(self):
+        """
+        Format the aggregates in the Prometheus text exposition format.
+
+        Returns:
+            str: One family per measurement, labelled by endpoint, method and status
+        """
+        with self._lock:
+            series = sorted((key, dict(value, buckets=list(value['buckets']))) for key, value in self._series.items())
+
+        def labels(key, **extra):
+            endpoint, method, status = key
+            pairs = [('endpoint', endpoint), ('method', method), ('status', str(status))] + list(extra.items())
+            return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+        lines = [
+            '# HELP http_request_duration_seconds Wall time of the requests',
+            '# TYPE http_request_duration_seconds histogram'
+        ]
+        for key, value in series:
+            for bound, count in zip(self.buckets, value['buckets']):
+                lines.append(f'http_request_duration_seconds_bucket{labels(key, le=bound)} {count}')
+            lines.append(f'http_request_duration_seconds_bucket{labels(key, le="+Inf")} {value["count"]}')
+            lines.append(f'http_request_duration_seconds_sum{labels(key)} {value["duration"]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{labels(key)} {value["count"]}')
+
+        counters = [
+            ('http_request_sql_queries_total', 'SQL statements executed by the requests', 'sql_queries', '{}'),
+            ('http_request_sql_duration_seconds_total', 'Time spent in SQL statements', 'sql_duration', '{:.6f}'),
+            ('http_request_serialization_seconds_total', 'Time spent serializing JSON responses', 'serialization', '{:.6f}'),
+            ('http_response_size_bytes_total', 'Size of the response bodies (streamed bodies excluded)', 'response_bytes', '{}')
+        ]
+        for name, description, field, number_format in counters:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} counter')
+            for key, value in series:
+                lines.append(f'{name}{labels(key)} {number_format.format(value[field])}')
+
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RequestMetrics()
+
+class ProfiledJSONProvider(FastJSONProvider):
+    """JSON provider that adds the time spent in dumps to the current request profile."""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            if has_request_context() and 'profile' in g:
+                g.profile['serialization'] += time.perf_counter() - started
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_started']
+
+    if not has_request_context() or 'profile' not in g:
+        return
+
+    profile = g.profile
+    profile['sql_queries'] += 1
+    profile['sql_duration'] += duration
+    if len(profile['statements']) < MAX_LOGGED_STATEMENTS:
+        profile['statements'].append((duration, statement))
+
+def _start_profile():
+    g.profile = {
+        'started': time.perf_counter(),
+        'sql_queries': 0,
+        'sql_duration': 0.0,
+        'serialization': 0.0,
+        'statements': []
+    }
+
+def _finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+
+    duration = time.perf_counter() - profile['started']
+    endpoint = request.endpoint or 'not_found'
+    response_bytes = 0 if response.is_streamed else response.calculate_content_length() or 0
+
+    request_metrics.observe(
+        endpoint, request.method, response.status_code, duration,
+        profile['sql_queries'], profile['sql_duration'], profile['serialization'], response_bytes
+    )
+
+    response.headers['Server-Timing'] = (
+        f"app;dur={duration * 1000:.1f}, db;dur={profile['sql_duration'] * 1000:.1f}, "
+        f"json;dur={profile['serialization'] * 1000:.1f}"
+    )
+
+    if duration * 1000 >= app.config["SLOW_REQUEST_MS"]:
+        lines = [
+            f"Requête lente : {request.method} {request.path} ({endpoint}) {duration * 1000:.0f} ms, "
+            f"{profile['sql_queries']} requêtes SQL en {profile['sql_duration'] * 1000:.0f} ms"
+        ]
+        lines.extend(
+            f"  {statement_duration * 1000:.1f} ms  {' '.join(statement.split())}"
+            for statement_duration, statement in profile['statements']
+        )
+        logging.warning('\n'.join(lines))
+
+    return response
+
+def init_profiling():
+    """
+    Instrument every request: wall time, SQL statements and time, JSON serialization time and response size.
+
+    Must be called in an application context, before the first request.
+    """
+    app.json = ProfiledJSONProvider(app)
+    event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
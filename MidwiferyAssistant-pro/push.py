@@ -0,0 +1,149 @@
+import os
+import time
+import uuid
+import threading
+from collections import deque
+from app import app
+
+class _Channel:
+    # Recent events of one user and the condition their connections wait on
+    def __init__(self, history_size):
+        self.condition = threading.Condition()
+        self.history = deque(maxlen=history_size)  # (sequence, formatted message)
+        self.last_sequence = 0
+
+    def since(self, sequence):
+        return [message for event_sequence, message in self.history if event_sequence > sequence]
+
+class EventBroker:
+    """
+    In-process publish/subscribe of the server-sent events, one channel per user.
+
+    publish() formats the message once and wakes only the connections of that
+    user; each connection is a generator waiting on the channel's condition,
+    with no thread of its own. Under a gevent worker (gunicorn -k gevent),
+    waiting connections are greenlets and a worker holds hundreds of them.
+    A stream ends after max_duration, so that a connection never holds a
+    worker indefinitely; the browser reconnects and resumes after its
+    Last-Event-ID.
+
+    Event IDs are "<process epoch>:<sequence>". A client reconnecting with a
+    Last-Event-ID of this process receives the events it missed from the
+    channel history; an ID of another process (restart, other worker) or
+    older than the history gets a "resync" event, after which the client
+    reloads its data. Events are only kept for the users who opened a
+    connection on this process.
+
+    Args:
+        history_size (int): Events kept per user for the reconnections
+        heartbeat_interval (float): Seconds between two comments on an idle connection
+        retry (int): Reconnection delay suggested to the browsers, in milliseconds
+        max_duration (float): Seconds after which a stream ends
+    """
+
+    def __init__(self, history_size=200, heartbeat_interval=15, retry=5000, max_duration=300):
+        self.history_size = history_size
+        self.heartbeat_interval = heartbeat_interval
+        self.retry = retry
+        self.max_duration = max_duration
+
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._token = uuid.uuid4().hex[:8]
+
+    @property
+    def epoch(self):
+        # Forked workers share the token of the master but not their sequences
+        return f"{os.getpid()}-{self._token}"
+
+    def publish(self, user_id, event, data):
+        """
+        Send an event to the connections of a user.
+
+        Args:
+            user_id (int): Recipient midwife
+            event (str): Event type ('reminder', 'reminders', 'alert')
+            data: JSON-serializable payload
+        """
+        channel = self._channels.get(user_id)
+        if channel is None:
+            return
+
+        payload = app.json.dumps(data)
+        with channel.condition:
+            channel.last_sequence += 1
+            message = f"id: {self.epoch}:{channel.last_sequence}\nevent: {event}\ndata: {payload}\n\n"
+            channel.history.append((channel.last_sequence, message))
+            channel.condition.notify_all()
+
+    def stream(self, user_id, last_event_id=None):
+        """
+        Generate the event stream of a connection.
+
+        Args:
+            user_id (int): Connected midwife
+            last_event_id (str, optional): Last-Event-ID header sent by a reconnecting browser
+
+        Yields:
+            str: Server-sent event messages and heartbeat comments
+        """
+        channel = self._channel(user_id)
+        deadline = time.monotonic() + self.max_duration
+        yield f"retry: {self.retry}\n\n"
+
+        with channel.condition:
+            cursor = self._resume_point(channel, last_event_id)
+            if cursor is None:
+                cursor = channel.last_sequence
+                resync = f"id: {self.epoch}:{cursor}\nevent: resync\ndata: {{}}\n\n"
+            else:
+                resync = None
+        if resync:
+            yield resync
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+
+            with channel.condition:
+                messages = channel.since(cursor)
+                if not messages:
+                    channel.condition.wait(min(self.heartbeat_interval, remaining))
+                    messages = channel.since(cursor)
+                cursor = channel.last_sequence
+
+            if messages:
+                yield ''.join(messages)
+            else:
+                # Keeps the proxies from closing the connection and detects closed clients
+                yield ": heartbeat\n\n"
+
+    def _resume_point(self, channel, last_event_id):
+        # Sequence to resume after, or None when the missed events are not available
+        if not last_event_id:
+            return channel.last_sequence
+
+        epoch, _, sequence = last_event_id.rpartition(':')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+
+        sequence = int(sequence)
+        oldest = channel.history[0][0] if channel.history else channel.last_sequence + 1
+        if sequence > channel.last_sequence or sequence < oldest - 1:
+            return None
+        return sequence
+
+    def _channel(self, user_id):
+        with self._lock:
+            channel = self._channels.get(user_id)
+            if channel is None:
+                channel = self._channels[user_id] = _Channel(self.history_size)
+            return channel
+
+event_broker = EventBroker(
+    history_size=app.config["SSE_HISTORY_SIZE"],
+    heartbeat_interval=app.config["SSE_HEARTBEAT_INTERVAL"],
+    retry=app.config["SSE_RETRY_MS"],
+    max_duration=app.config["SSE_MAX_DURATION"]
+)
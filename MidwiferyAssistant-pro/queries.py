@@ -0,0 +1,275 @@
+import json
+import base64
+from datetime import date, datetime
+from sqlalchemy import or_, tuple_
+from sqlalchemy.orm import aliased, contains_eager
+from app import db
+from models import Patient, BabyRecord, DeliveryRecord, PostnatalCareReminder
+
+# Mother of the baby a reminder is about, distinct from the reminder's own patient
+BabyMother = aliased(Patient, name='baby_mother')
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+def encode_cursor(values):
+    """
+    Encode the sort key of the last row of a page as an opaque cursor.
+
+    Args:
+        values (list): Sort key values (dates are stored as ISO strings)
+
+    Returns:
+        str: URL-safe cursor
+    """
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor, columns):
+    """
+    Decode a cursor produced by encode_cursor for the given sort columns.
+
+    Args:
+        cursor (str): Cursor sent by the client
+        columns (list): Sort columns the cursor was built from
+
+    Returns:
+        list: Sort key values converted back to the column types
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(cursor) from e
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursor(cursor)
+
+    decoded = []
+    for column, value in zip(columns, values):
+        try:
+            decoded.append(_cursor_value(column, value))
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor(cursor) from e
+
+    return decoded
+
+def _cursor_value(column, value):
+    # Dates come back from their ISO string, other values must already have the column's type
+    if value is None:
+        return None
+    if isinstance(column.type, db.DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, db.Date):
+        return date.fromisoformat(value)
+
+    if isinstance(column.type, db.Boolean):
+        expected = (bool,)
+    elif isinstance(column.type, db.Integer):
+        expected = (int,)
+    elif isinstance(column.type, db.Numeric):
+        expected = (int, float)
+    elif isinstance(column.type, db.String):
+        expected = (str,)
+    else:
+        expected = (str, int, float)
+
+    # JSON true/false decode to bool, a subclass of int
+    if not isinstance(value, expected) or (isinstance(value, bool) and bool not in expected):
+        raise TypeError(f"{column.key}: {type(value).__name__}")
+    return value
+
+def keyset_page(query, columns, cursor=None, limit=50, descending=False):
+    """
+    Fetch one page of a query ordered by the given columns, after the cursor.
+
+    The last column must be unique (the primary key) so that the ordering is
+    stable and no row is skipped or repeated between pages. The page is found
+    with a row-value comparison on the sort key, which an index on the same
+    columns serves without scanning the previous pages.
+
+    Args:
+        query: SQLAlchemy query to paginate
+        columns (list): Sort columns, ending with the primary key
+        cursor (str, optional): Cursor returned with the previous page
+        limit (int): Page size
+        descending (bool): Sort direction, applied to every column
+
+    Returns:
+        tuple: (rows, next_cursor), next_cursor is None on the last page
+    """
+    if cursor:
+        key = tuple_(*columns)
+        bound = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < bound if descending else key > bound)
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+
+    return rows, next_cursor
+
+def _name_filter(search, *columns):
+    pattern = f"%{search.strip()}%"
+    return or_(*[column.ilike(pattern) for column in columns])
+
+def _select(model, columns):
+    # Whole instances, or only the given columns (rows) when a schema selects them
+    if columns is None:
+        return model.query
+    return db.session.query(*columns).select_from(model)
+
+def get_patients_page(user_id, search=None, cursor=None, limit=50, columns=None):
+    """
+    Load one page of a midwife's patients, ordered by last name.
+
+    Args:
+        user_id (int): ID of the midwife
+        search (str, optional): Text searched in the first and last names
+        columns (list, optional): Columns to select instead of Patient instances;
+                                  must include the sort key (last_name, id)
+
+    Returns:
+        tuple: (patients, next_cursor)
+    """
+    query = _select(Patient, columns).filter(Patient.user_id == user_id)
+
+    if search:
+        query = query.filter(_name_filter(search, Patient.first_name, Patient.last_name))
+
+    return keyset_page(query, [Patient.last_name, Patient.id], cursor, limit)
+
+def get_babies_page(user_id, search=None, mother_id=None, cursor=None, limit=50, columns=None):
+    """
+    Load one page of the babies of a midwife's patients, most recent births first.
+
+    The mother is loaded by the same query.
+
+    Args:
+        user_id (int): ID of the midwife
+        search (str, optional): Text searched in the baby's and the mother's names
+        mother_id (int, optional): Restrict to the babies of one mother
+        columns (list, optional): Columns of BabyRecord and Patient (the mother) to select
+                                  instead of instances; must include the sort key (birth_date, id)
+
+    Returns:
+        tuple: (babies, next_cursor)
+    """
+    query = _select(BabyRecord, columns).join(BabyRecord.mother)
+    if columns is None:
+        query = query.options(contains_eager(BabyRecord.mother))
+    query = query.filter(Patient.user_id == user_id)
+
+    if mother_id:
+        query = query.filter(BabyRecord.mother_id == mother_id)
+
+    if search:
+        query = query.filter(_name_filter(
+            search, BabyRecord.first_name, BabyRecord.last_name, Patient.first_name, Patient.last_name
+        ))
+
+    return keyset_page(query, [BabyRecord.birth_date, BabyRecord.id], cursor, limit, descending=True)
+
+def get_deliveries_page(user_id, search=None, delivery_type=None, patient_id=None, cursor=None, limit=50, columns=None):
+    """
+    Load one page of the deliveries of a midwife's patients, most recent first.
+
+    The patient is loaded by the same query.
+
+    Args:
+        user_id (int): ID of the midwife
+        search (str, optional): Text searched in the patient's name and the location
+        delivery_type (str, optional): Restrict to one delivery type
+        patient_id (int, optional): Restrict to one patient
+        columns (list, optional): Columns of DeliveryRecord and Patient to select instead
+                                  of instances; must include the sort key (delivery_date, id)
+
+    Returns:
+        tuple: (deliveries, next_cursor)
+    """
+    query = _select(DeliveryRecord, columns).join(DeliveryRecord.patient)
+    if columns is None:
+        query = query.options(contains_eager(DeliveryRecord.patient))
+    query = query.filter(Patient.user_id == user_id)
+
+    if delivery_type:
+        query = query.filter(DeliveryRecord.delivery_type == delivery_type)
+
+    if patient_id:
+        query = query.filter(DeliveryRecord.patient_id == patient_id)
+
+    if search:
+        query = query.filter(_name_filter(
+            search, Patient.first_name, Patient.last_name, DeliveryRecord.delivery_location
+        ))
+
+    return keyset_page(query, [DeliveryRecord.delivery_date, DeliveryRecord.id], cursor, limit, descending=True)
+
+def get_reminder_feed(user_id, reminder_type='all', priority='all', status='all', search=None, cursor=None, limit=50, columns=None):
+    """
+    Load one page of the postnatal reminders of a midwife together with the names they display.
+
+    The patient, the baby and the baby's mother are resolved with outer joins in a
+    single projection query, so the number of SQL round-trips stays the same
+    whatever the number of reminders.
+
+    Args:
+        user_id (int): ID of the midwife owning the reminders
+        reminder_type (str): 'mother', 'baby', 'both' or 'all'
+        priority (str): 'high', 'normal', 'low' or 'all'
+        status (str): 'pending', 'completed' or 'all'
+        search (str, optional): Text searched in the reminder title
+        cursor (str, optional): Cursor returned with the previous page
+        limit (int): Page size
+        columns (list, optional): Columns to select instead of the default ones, from
+                                  the reminder, Patient, BabyRecord and BabyMother;
+                                  must include the sort key (reminder_date, id)
+
+    Returns:
+        tuple: (rows, next_cursor). By default rows expose the reminder columns
+               plus patient_first_name, patient_last_name, baby_first_name and
+               mother_last_name
+    """
+    query = db.session.query(*(columns or [
+        PostnatalCareReminder.id,
+        PostnatalCareReminder.title,
+        PostnatalCareReminder.description,
+        PostnatalCareReminder.reminder_date,
+        PostnatalCareReminder.reminder_type,
+        PostnatalCareReminder.priority,
+        PostnatalCareReminder.completed,
+        PostnatalCareReminder.patient_id,
+        PostnatalCareReminder.baby_id,
+        Patient.first_name.label('patient_first_name'),
+        Patient.last_name.label('patient_last_name'),
+        BabyRecord.first_name.label('baby_first_name'),
+        BabyMother.last_name.label('mother_last_name')
+    ])).select_from(PostnatalCareReminder).outerjoin(
+        Patient, Patient.id == PostnatalCareReminder.patient_id
+    ).outerjoin(
+        BabyRecord, BabyRecord.id == PostnatalCareReminder.baby_id
+    ).outerjoin(
+        BabyMother, BabyMother.id == BabyRecord.mother_id
+    ).filter(PostnatalCareReminder.user_id == user_id)
+
+    if reminder_type != 'all':
+        query = query.filter(PostnatalCareReminder.reminder_type == reminder_type)
+
+    if priority != 'all':
+        query = query.filter(PostnatalCareReminder.priority == priority)
+
+    if status == 'pending':
+        query = query.filter(PostnatalCareReminder.completed == False)
+    elif status == 'completed':
+        query = query.filter(PostnatalCareReminder.completed == True)
+
+    if search:
+        query = query.filter(_name_filter(search, PostnatalCareReminder.title))
+
+    return keyset_page(query, [PostnatalCareReminder.reminder_date, PostnatalCareReminder.id], cursor, limit)
@@ -0,0 +1,175 @@
+import json
+import hashlib
+from types import MappingProxyType
+
+def _freeze(value):
+    # Read-only views so that no caller can alter the shared reference data
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value):
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+# Fetal biometry reference curves, one value per week of ULTRASOUND_WEEKS.
+# mean, lower (-2SD) and upper (+2SD) in mm, efw in g
+ULTRASOUND_WEEKS = tuple(range(12, 41))
+
+ULTRASOUND_CURVES = _freeze({
+    'bpd': {
+        'mean': (21.9, 25.2, 28.5, 31.8, 35.1, 38.4, 41.7, 45.0, 48.3, 51.6, 54.9, 58.2, 61.5, 64.8, 68.1, 71.4, 74.7, 78.0, 81.3, 84.6, 87.9, 91.2, 94.5, 97.8, 101.1, 104.4, 107.7, 111.0, 114.3),
+        'lower': (19.0, 22.3, 25.6, 28.9, 32.2, 35.5, 38.8, 42.1, 45.4, 48.7, 52.0, 55.3, 58.6, 61.9, 65.2, 68.5, 71.8, 75.1, 78.4, 81.7, 85.0, 88.3, 91.6, 94.9, 98.2, 101.5, 104.8, 108.1, 111.4),
+        'upper': (24.8, 28.1, 31.4, 34.7, 38.0, 41.3, 44.6, 47.9, 51.2, 54.5, 57.8, 61.1, 64.4, 67.7, 71.0, 74.3, 77.6, 80.9, 84.2, 87.5, 90.8, 94.1, 97.4, 100.7, 104.0, 107.3, 110.6, 113.9, 117.2),
+    },
+    'hc': {
+        'mean': (78.8, 91.3, 103.8, 116.3, 128.8, 141.3, 153.8, 166.3, 178.8, 191.3, 203.8, 216.3, 228.8, 241.3, 253.8, 266.3, 278.8, 291.3, 303.8, 316.3, 328.8, 341.3, 353.8, 366.3, 378.8, 391.3, 403.8, 416.3, 428.8),
+        'lower': (69.3, 81.8, 94.3, 106.8, 119.3, 131.8, 144.3, 156.8, 169.3, 181.8, 194.3, 206.8, 219.3, 231.8, 244.3, 256.8, 269.3, 281.8, 294.3, 306.8, 319.3, 331.8, 344.3, 356.8, 369.3, 381.8, 394.3, 406.8, 419.3),
+        'upper': (88.3, 100.8, 113.3, 125.8, 138.3, 150.8, 163.3, 175.8, 188.3, 200.8, 213.3, 225.8, 238.3, 250.8, 263.3, 275.8, 288.3, 300.8, 313.3, 325.8, 338.3, 350.8, 363.3, 375.8, 388.3, 400.8, 413.3, 425.8, 438.3),
+    },
+    'ac': {
+        'mean': (63.4, 74.1, 84.8, 95.5, 106.2, 116.9, 127.6, 138.3, 149.0, 159.7, 170.4, 181.1, 191.8, 202.5, 213.2, 223.9, 234.6, 245.3, 256.0, 266.7, 277.4, 288.1, 298.8, 309.5, 320.2, 330.9, 341.6, 352.3, 363.0),
+        'lower': (53.4, 64.1, 74.8, 85.5, 96.2, 106.9, 117.6, 128.3, 139.0, 149.7, 160.4, 171.1, 181.8, 192.5, 203.2, 213.9, 224.6, 235.3, 246.0, 256.7, 267.4, 278.1, 288.8, 299.5, 310.2, 320.9, 331.6, 342.3, 353.0),
+        'upper': (73.4, 84.1, 94.8, 105.5, 116.2, 126.9, 137.6, 148.3, 159.0, 169.7, 180.4, 191.1, 201.8, 212.5, 223.2, 233.9, 244.6, 255.3, 266.0, 276.7, 287.4, 298.1, 308.8, 319.5, 330.2, 340.9, 351.6, 362.3, 373.0),
+    },
+    'fl': {
+        'mean': (8.6, 11.2, 13.8, 16.4, 19.0, 21.6, 24.2, 26.8, 29.4, 32.0, 34.6, 37.2, 39.8, 42.4, 45.0, 47.6, 50.2, 52.8, 55.4, 58.0, 60.6, 63.2, 65.8, 68.4, 71.0, 73.6, 76.2, 78.8, 81.4),
+        'lower': (5.9, 8.5, 11.1, 13.7, 16.3, 18.9, 21.5, 24.1, 26.7, 29.3, 31.9, 34.5, 37.1, 39.7, 42.3, 44.9, 47.5, 50.1, 52.7, 55.3, 57.9, 60.5, 63.1, 65.7, 68.3, 70.9, 73.5, 76.1, 78.7),
+        'upper': (11.3, 13.9, 16.5, 19.1, 21.7, 24.3, 26.9, 29.5, 32.1, 34.7, 37.3, 39.9, 42.5, 45.1, 47.7, 50.3, 52.9, 55.5, 58.1, 60.7, 63.3, 65.9, 68.5, 71.1, 73.7, 76.3, 78.9, 81.5, 84.1),
+    },
+    # Hadlock BPD-HC-AC-FL weight of the mean, -2SD and +2SD curves above, so that an
+    # estimated weight is scored against the curves its own measurements are scored on
+    'efw': {
+        'mean': (65, 81, 99, 121, 147, 178, 215, 259, 311, 371, 441, 522, 615, 723, 846, 986, 1144, 1323, 1524, 1748, 1998, 2274, 2577, 2910, 3273, 3667, 4092, 4548, 5036),
+        'lower': (53, 66, 81, 100, 122, 148, 180, 217, 261, 313, 374, 444, 526, 620, 729, 853, 994, 1154, 1334, 1537, 1763, 2014, 2293, 2599, 2935, 3301, 3699, 4127, 4588),
+        'upper': (80, 98, 120, 146, 177, 214, 257, 308, 368, 437, 517, 610, 717, 839, 978, 1135, 1312, 1511, 1734, 1981, 2255, 2556, 2886, 3246, 3636, 4058, 4510, 4993, 5505),
+    }
+})
+
+# Same curves indexed by week: {week: {measurement: (mean, lower, upper)}}
+ULTRASOUND_REFERENCE_BY_WEEK = _freeze({
+    week: {name: tuple(curve[column][index] for column in ('mean', 'lower', 'upper')) for name, curve in ULTRASOUND_CURVES.items()}
+    for index, week in enumerate(ULTRASOUND_WEEKS)
+})
+
+EMERGENCY_PROTOCOLS = _freeze({
+    'hemorrhage': {
+        'title': 'Hémorragie du Post-Partum',
+        'definition': 'Saignement > 500ml après accouchement',
+        'signs': [
+            'Saignement abondant',
+            'Hypotension',
+            'Tachycardie',
+            'Pâleur'
+        ],
+        'actions': [
+            '1. Massage utérin bimanuel',
+            '2. Voie veineuse 14-16G',
+            '3. Ocytocine 5-10 UI IVL puis 20-40 UI/500ml',
+            '4. Remplissage vasculaire',
+            '5. Sondage vésical',
+            '6. Appel équipe obstétricale + anesthésiste'
+        ],
+        'severity_levels': [
+            {'volume': '< 1000ml', 'action': 'Surveillance, ocytocine'},
+            {'volume': '1000-1500ml', 'action': 'Sulprostone, examiner sous valves'},
+            {'volume': '> 1500ml', 'action': 'Transfusion, chirurgie'}
+        ]
+    },
+    'preeclampsia': {
+        'title': 'Pré-éclampsie Sévère',
+        'definition': 'HTA > 160/110 + protéinurie',
+        'signs': [
+            'Céphalées intenses',
+            'Troubles visuels',
+            'Douleur épigastrique',
+            'Hyperréflexie',
+            'Oligurie'
+        ],
+        'actions': [
+            '1. Position latérale gauche',
+            '2. Voie veineuse',
+            '3. Nicardipine (Loxen) IVSE',
+            '4. Sulfate de magnésium (prévention éclampsie)',
+            '5. Bilan biologique complet',
+            '6. Évaluation fœtale',
+            '7. Transfert en maternité niveau 3'
+        ],
+        'severity_levels': [
+            {'symptoms': 'HTA + protéinurie', 'action': 'Hospitalisation, surveillance'},
+            {'symptoms': '+ Signes fonctionnels', 'action': 'Traitement anti-HTA, sulfate Mg'},
+            {'symptoms': '+ Éclampsie/HELLP', 'action': 'Extraction fœtale urgente'}
+        ]
+    },
+    'shoulder_dystocia': {
+        'title': 'Dystocie des Épaules',
+        'definition': 'Rétention des épaules après sortie de la tête',
+        'signs': [
+            'Rétraction de la tête contre le périnée (signe de la tortue)',
+            'Échec de la rotation externe',
+            'Traction inefficace sur la tête'
+        ],
+        'actions': [
+            '1. Appel à l\'aide',
+            '2. Manœuvre de McRoberts (hyperfléxion des cuisses)',
+            '3. Pression sus-pubienne',
+            '4. Manœuvre de Wood',
+            '5. Manœuvre de Jacquemier (extraction de l\'épaule postérieure)',
+            '6. Épisiotomie large si nécessaire'
+        ],
+        'severity_levels': [
+            {'time': '< 5 min', 'action': 'McRoberts + pression sus-pubienne'},
+            {'time': '> 5 min', 'action': 'Manœuvres obstétricales internes'},
+            {'time': '> 10 min', 'action': 'Risque hypoxie/fracture, manœuvres de dernier recours'}
+        ]
+    },
+    'cord_prolapse': {
+        'title': 'Procidence du Cordon',
+        'definition': 'Passage du cordon en avant de la présentation',
+        'signs': [
+            'Visualisation ou palpation du cordon',
+            'Anomalies du RCF (bradycardie brutale)',
+            'Rupture des membranes récente'
+        ],
+        'actions': [
+            '1. Position genupectorale ou Trendelenburg',
+            '2. Repousse manuelle de la présentation',
+            '3. Remplissage vésical (300-500ml)',
+            '4. Tocolvse d\'urgence (β-mimétiques)',
+            '5. Extraction immédiate (césarienne ou voie basse si dilatation complète)'
+        ],
+        'severity_levels': [
+            {'rcf': 'Normal', 'action': 'Césarienne urgente, repousse manuelle'},
+            {'rcf': 'Bradycardie < 100', 'action': 'Césarienne extrême urgence'},
+            {'rcf': 'Absence d\'activité', 'action': 'Extraction immédiate quel que soit le moyen'}
+        ]
+    }
+})
+
+def _build_payload(data):
+    body = json.dumps(_thaw(data), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()[:12]
+
+# Serialized once per process; the version is a hash of the content, so it
+# changes whenever the reference data does
+REFERENCE_PAYLOADS = MappingProxyType({
+    'ultrasound': _build_payload({'weeks': ULTRASOUND_WEEKS, 'curves': ULTRASOUND_CURVES}),
+    'emergency': _build_payload(EMERGENCY_PROTOCOLS)
+})
+
+def reference_version(name):
+    """
+    Get the content version of a reference data set.
+
+    Args:
+        name (str): 'ultrasound' or 'emergency'
+
+    Returns:
+        str: Short hash of the serialized data
+    """
+    return REFERENCE_PAYLOADS[name][1]
@@ -0,0 +1,340 @@
+import os
+import atexit
+import logging
+import threading
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+import click
+from sqlalchemy import func, select
+from app import app, db
+from models import Patient, DeliveryRecord, BabyRecord, PostnatalCheckup, VaccinationRecord, PostnatalCareReminder
+from push import event_broker
+import summary
+
+# One step of the postnatal schedule, due `days` after the delivery or the birth
+Step = namedtuple('Step', ['code', 'days', 'title', 'description', 'priority'])
+
+MOTHER_SCHEDULE = (
+    Step('J1', 1, "Visite postnatale précoce",
+         "Évaluation de la récupération post-partum, saignements, signes vitaux, involution utérine", 'high'),
+    Step('J3', 3, "Visite postnatale J3",
+         "Saignements, cicatrisation, montée de lait, signes d'infection, état émotionnel", 'high'),
+    Step('J8', 8, "Visite postnatale J8",
+         "Involution utérine, allaitement, signes vitaux, dépistage de la dépression du post-partum", 'normal'),
+    Step('S6', 42, "Consultation postnatale de la 6e semaine",
+         "Examen complet, contraception, rééducation périnéale, bilan de l'allaitement", 'normal')
+)
+
+BABY_SCHEDULE = (
+    Step('J3', 3, "Suivi néonatal J3",
+         "Ictère, perte de poids, alimentation, soins du cordon", 'high'),
+    Step('J8', 8, "Suivi néonatal à 1 semaine",
+         "Contrôle de poids, ictère, alimentation, soins du cordon, signes vitaux", 'high'),
+    Step('S6', 42, "Suivi du nourrisson à 6 semaines",
+         "Croissance, développement, alimentation, vaccinations de la 6e semaine", 'normal')
+)
+
+# Expanded Programme on Immunization: (code, age in days, vaccines due). A
+# vaccine given at several ages is counted as one dose per listed age.
+VACCINATION_CALENDAR = (
+    ('naissance', 0, ('BCG', 'VPO', 'Hepatitis B', 'Vitamin K')),
+    ('S6', 42, ('DTCoq', 'Hib', 'VPO', 'PCV', 'Rotavirus')),
+    ('S10', 70, ('DTCoq', 'Hib', 'VPO', 'PCV', 'Rotavirus')),
+    ('S14', 98, ('DTCoq', 'Hib', 'VPO', 'PCV')),
+    ('M9', 270, ('Measles', 'Yellow Fever'))
+)
+
+def _vaccination_doses():
+    # (code, days, [(vaccine, dose number)]) for each appointment of the calendar
+    given = Counter()
+    appointments = []
+    for code, days, vaccines in VACCINATION_CALENDAR:
+        doses = []
+        for vaccine in vaccines:
+            given[vaccine] += 1
+            doses.append((vaccine, given[vaccine]))
+        appointments.append((code, days, doses))
+    return appointments
+
+VACCINATION_APPOINTMENTS = _vaccination_doses()
+
+def _reminder(key, title, description, due, reminder_type, priority, user_id, patient_id=None, baby_id=None):
+    # Every row has the same keys so that the bulk insert is a single executemany
+    return {
+        'schedule_key': key,
+        'title': title,
+        'description': description,
+        'reminder_date': due,
+        'reminder_type': reminder_type,
+        'priority': priority,
+        'completed': False,
+        'created_at': datetime.utcnow(),
+        'patient_id': patient_id,
+        'baby_id': baby_id,
+        'user_id': user_id
+    }
+
+def _in_window(due, window):
+    return window[0] <= due <= window[1]
+
+def _chunks(query, id_column, chunk_size):
+    # Keyset pagination over a query selecting id_column first
+    last_id = 0
+    while True:
+        rows = db.session.execute(query.where(id_column > last_id).order_by(id_column).limit(chunk_size)).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+def _mother_reminders(rows, window):
+    reminders = []
+    for delivery_id, delivery_date, patient_id, user_id in rows:
+        for step in MOTHER_SCHEDULE:
+            due = delivery_date + timedelta(days=step.days)
+            if _in_window(due, window):
+                reminders.append(_reminder(
+                    f'delivery:{delivery_id}:{step.code}', step.title, step.description, due,
+                    'mother', step.priority, user_id, patient_id=patient_id
+                ))
+    return reminders
+
+def _baby_reminders(rows, window):
+    # Vaccines already recorded for the babies of the chunk, by name
+    doses_given = Counter()
+    vaccinations = db.session.execute(
+        select(VaccinationRecord.baby_id, VaccinationRecord.vaccine_name, func.count())
+        .where(VaccinationRecord.baby_id.in_([row[0] for row in rows]))
+        .group_by(VaccinationRecord.baby_id, VaccinationRecord.vaccine_name)
+    )
+    for baby_id, vaccine, count in vaccinations:
+        doses_given[(baby_id, vaccine)] = count
+
+    reminders = []
+    for baby_id, birth_date, user_id in rows:
+        for step in BABY_SCHEDULE:
+            due = birth_date + timedelta(days=step.days)
+            if _in_window(due, window):
+                reminders.append(_reminder(
+                    f'baby:{baby_id}:{step.code}', step.title, step.description, due,
+                    'baby', step.priority, user_id, baby_id=baby_id
+                ))
+
+        for code, days, doses in VACCINATION_APPOINTMENTS:
+            due = birth_date + timedelta(days=days)
+            missing = [vaccine for vaccine, dose in doses if doses_given[(baby_id, vaccine)] < dose]
+            if missing and _in_window(due, window):
+                reminders.append(_reminder(
+                    f'baby:{baby_id}:vaccins-{code}', f"Vaccinations ({code})",
+                    f"Vaccins à administrer : {', '.join(missing)}", due,
+                    'baby', 'normal', user_id, baby_id=baby_id
+                ))
+    return reminders
+
+def _next_checkup_reminders(rows):
+    reminders = []
+    for checkup_id, checkup_type, next_checkup_date, patient_id, baby_id, user_id in rows:
+        reminders.append(_reminder(
+            f'checkup:{checkup_id}:suivant', f"Prochain suivi postnatal ({checkup_type})",
+            f"Suivi postnatal programmé pour {'la mère' if checkup_type == 'mother' else 'le bébé'}",
+            next_checkup_date, checkup_type, 'normal', user_id,
+            patient_id=patient_id if checkup_type == 'mother' else None,
+            baby_id=baby_id if checkup_type == 'baby' else None
+        ))
+    return reminders
+
+def _insert_new_reminders(reminders):
+    """
+    Insert the reminders whose schedule key does not exist yet and update the summaries.
+
+    Keys already present are filtered out first, so that a run with nothing
+    new does not write. The insert itself ignores the conflicts on the
+    unique key (another worker inserting the same reminders) and returns the
+    rows actually inserted, which are the ones counted in the summaries.
+
+    Args:
+        reminders (list): Reminder rows built with _reminder
+
+    Returns:
+        int: Number of reminders inserted
+    """
+    if not reminders:
+        return 0
+
+    existing = set(db.session.execute(
+        select(PostnatalCareReminder.schedule_key)
+        .where(PostnatalCareReminder.schedule_key.in_([reminder['schedule_key'] for reminder in reminders]))
+    ).scalars())
+    reminders = [reminder for reminder in reminders if reminder['schedule_key'] not in existing]
+    if not reminders:
+        return 0
+
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = PostnatalCareReminder.__table__
+    statement = insert(table).on_conflict_do_nothing(index_elements=[table.c.schedule_key]).returning(
+        table.c.user_id, table.c.reminder_date
+    )
+    inserted = db.session.execute(statement, reminders).all()
+
+    days = Counter((user_id, due.replace(hour=0, minute=0, second=0, microsecond=0)) for user_id, due in inserted)
+    for (user_id, day), count in days.items():
+        summary.record_reminder_added(user_id, day, count)
+
+    db.session.commit()
+
+    for user_id, count in Counter(user_id for user_id, _ in inserted).items():
+        event_broker.publish(user_id, 'reminders', {'action': 'created', 'count': count})
+
+    return len(inserted)
+
+def schedule_reminders(now=None, lookahead_days=14, max_late_days=14, chunk_size=1000):
+    """
+    Create the reminders of the postnatal schedule that fall due soon.
+
+    Every step of the mother's schedule (J1, J3, J8, 6 weeks), of the baby's
+    and of the vaccination calendar, and every next checkup date, becomes a
+    reminder once it is due within lookahead_days. Steps more than
+    max_late_days overdue are skipped, so old records do not flood the
+    reminders. Only the deliveries, babies and checkups with a step in that
+    window are read, in chunks, with one query per chunk for the records and
+    one for the vaccines already given.
+
+    Each reminder has a schedule key (source record and step) with a unique
+    index: running the job again, or from several workers at once, never
+    duplicates a reminder, and a reminder completed by the midwife is not
+    created again.
+
+    Args:
+        now (datetime, optional): Reference time, defaults to the current UTC time
+        lookahead_days (int): Create reminders due up to this many days ahead
+        max_late_days (int): Skip the steps overdue by more than this many days
+        chunk_size (int): Source records per chunk
+
+    Returns:
+        int: Number of reminders created
+    """
+    now = now or datetime.utcnow()
+    window = (now - timedelta(days=max_late_days), now + timedelta(days=lookahead_days))
+    created = 0
+
+    # Deliveries with a step of the mother's schedule in the window
+    last_step = max(step.days for step in MOTHER_SCHEDULE)
+    deliveries = select(
+        DeliveryRecord.id, DeliveryRecord.delivery_date, DeliveryRecord.patient_id, Patient.user_id
+    ).join(Patient, DeliveryRecord.patient_id == Patient.id).where(
+        DeliveryRecord.delivery_date.between(window[0] - timedelta(days=last_step), window[1])
+    )
+    for rows in _chunks(deliveries, DeliveryRecord.id, chunk_size):
+        created += _insert_new_reminders(_mother_reminders(rows, window))
+
+    # Babies with a step of their schedule or of the vaccination calendar in the window
+    last_step = max([step.days for step in BABY_SCHEDULE] + [days for _, days, _ in VACCINATION_APPOINTMENTS])
+    babies = select(
+        BabyRecord.id, BabyRecord.birth_date, Patient.user_id
+    ).join(Patient, BabyRecord.mother_id == Patient.id).where(
+        BabyRecord.birth_date.between(window[0] - timedelta(days=last_step), window[1])
+    )
+    for rows in _chunks(babies, BabyRecord.id, chunk_size):
+        created += _insert_new_reminders(_baby_reminders(rows, window))
+
+    # Next checkups planned by the midwife
+    checkups = select(
+        PostnatalCheckup.id, PostnatalCheckup.checkup_type, PostnatalCheckup.next_checkup_date,
+        PostnatalCheckup.patient_id, PostnatalCheckup.baby_id, PostnatalCheckup.user_id
+    ).where(PostnatalCheckup.next_checkup_date.between(*window))
+    for rows in _chunks(checkups, PostnatalCheckup.id, chunk_size):
+        created += _insert_new_reminders(_next_checkup_reminders(rows))
+
+    return created
+
+class ReminderScheduler:
+    """
+    Background thread running schedule_reminders() every interval seconds.
+
+    wake() starts a run without waiting for the interval, for instance right
+    after a delivery is recorded. Each process (gunicorn worker) runs its own
+    thread; the schedule keys make the concurrent runs harmless.
+    """
+
+    def __init__(self, interval=3600, lookahead_days=14, max_late_days=14, enabled=True):
+        self.interval = interval
+        self.lookahead_days = lookahead_days
+        self.max_late_days = max_late_days
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wakeup = None
+        self._stopping = None
+        self._pid = None
+
+    def ensure_started(self):
+        # Threads do not survive a fork, each worker process starts its own
+        if not self.enabled or (self._pid == os.getpid() and self._thread is not None):
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+
+            self._wakeup = threading.Event()
+            self._stopping = threading.Event()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Run the scheduler as soon as possible."""
+        self.ensure_started()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stop(self):
+        """Stop the thread after the current run."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                with app.app_context():
+                    created = schedule_reminders(lookahead_days=self.lookahead_days, max_late_days=self.max_late_days)
+                if created:
+                    logging.info(f"{created} rappels du calendrier postnatal créés")
+            except Exception:
+                logging.exception("Échec de la planification des rappels")
+
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+reminder_scheduler = ReminderScheduler(
+    interval=app.config["REMINDER_SCHEDULER_INTERVAL"],
+    lookahead_days=app.config["REMINDER_LOOKAHEAD_DAYS"],
+    max_late_days=app.config["REMINDER_MAX_LATE_DAYS"],
+    enabled=app.config["REMINDER_SCHEDULER_ENABLED"]
+)
+atexit.register(reminder_scheduler.stop)
+
+# The web workers start the scheduler with their first request
+app.before_request(reminder_scheduler.ensure_started)
+
+@app.cli.command('schedule-reminders')
+@click.option('--lookahead-days', type=int, default=None, help="Créer les rappels dus dans ce nombre de jours")
+@click.option('--chunk-size', type=int, default=1000, help="Nombre d'enregistrements traités par lot")
+def schedule_reminders_command(lookahead_days, chunk_size):
+    """Create the due reminders of the postnatal and vaccination schedules."""
+    created = schedule_reminders(
+        lookahead_days=lookahead_days if lookahead_days is not None else app.config["REMINDER_LOOKAHEAD_DAYS"],
+        max_late_days=app.config["REMINDER_MAX_LATE_DAYS"],
+        chunk_size=chunk_size
+    )
+    print(f"Planification terminée : {created} rappels créés")
@@ -1,11 +1,30 @@
+import io
 import json
 from datetime import datetime, timedelta
-from flask import render_template, redirect, url_for, flash, request, jsonify, session
+from flask import render_template, redirect, url_for, flash, request, jsonify, session, Response, stream_with_context
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash
 from app import app, db
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager, joinedload
 from models import User, Patient, BloodPressureRecord, BiomedicalRecord, UltrasoundRecord, AuditLog, DeliveryRecord, BabyRecord, PostnatalCheckup, VaccinationRecord, BreastfeedingRecord, PostnatalCareReminder
 from utils import calculate_gestational_age, get_gestational_age_recommendations, analyze_blood_results, evaluate_blood_pressure
+from serialization import InvalidFields, PATIENT_SCHEMA, BABY_SCHEMA, DELIVERY_SCHEMA, MOTHER_CHECKUP_SCHEMA, BABY_CHECKUP_SCHEMA, BREASTFEEDING_SCHEMA, VACCINATION_SCHEMA, REMINDER_SCHEMA
+from queries import InvalidCursor, get_reminder_feed, get_patients_page, get_babies_page, get_deliveries_page
+from audit import UnitOfWork
+from ingestion import BatchTooLarge, InvalidImportFile, import_patients_csv, ingest_blood_pressure_readings, parse_ndjson
+from identity import invalidate_user
+from http_cache import collection_version, not_modified, with_version
+from reminders import reminder_scheduler
+from push import event_broker
+from timeline import BABY_EVENTS, MOTHER_EVENTS, baby_summary, load_events, version_collections
+from sync import SyncBatch, get_changes
+from search import SEARCH_TYPES, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, search_names
+from trends import get_blood_pressure_trend
+from export import FORMATS, generate_export
+from reference_data import REFERENCE_PAYLOADS, reference_version
+from biometry import MEASUREMENTS, analyze_ultrasound, estimate_fetal_weight, get_biometry_reference, score_biometry, to_json_list
+import summary
 
 # Authentication routes
 @app.route('/login', methods=['GET', 'POST'])
@@ -25,17 +44,10 @@ def login():
             return redirect(url_for('login'))
         
         login_user(user, remember=remember)
-        user.last_login = datetime.utcnow()
-        db.session.commit()
         
-        # Log the login action
-        log = AuditLog(
-            user_id=user.id,
-            action="Connexion",
-            ip_address=request.remote_addr
-        )
-        db.session.add(log)
-        db.session.commit()
+        # Update the last login and log the action in one transaction
+        with UnitOfWork("Connexion", user_id=user.id):
+            user.last_login = datetime.utcnow()
         
         next_page = request.args.get('next')
         return redirect(next_page or url_for('dashboard'))
@@ -72,17 +84,11 @@ def register():
         new_user = User(username=username, email=email)
         new_user.set_password(password)
         
-        db.session.add(new_user)
-        db.session.commit()
-        
-        # Log the registration
-        log = AuditLog(
-            user_id=new_user.id,
-            action="Inscription",
-            ip_address=request.remote_addr
-        )
-        db.session.add(log)
-        db.session.commit()
+        # Create the user and log the registration in one transaction
+        with UnitOfWork("Inscription") as uow:
+            uow.add(new_user)
+            uow.flush()
+            uow.user_id = new_user.id
         
         flash('Inscription réussie ! Vous pouvez maintenant vous connecter.', 'success')
         return redirect(url_for('login'))
@@ -93,13 +99,8 @@ def register():
 @login_required
 def logout():
     # Log the logout action
-    log = AuditLog(
-        user_id=current_user.id,
-        action="Déconnexion",
-        ip_address=request.remote_addr
-    )
-    db.session.add(log)
-    db.session.commit()
+    with UnitOfWork("Déconnexion"):
+        pass
     
     logout_user()
     flash('Vous avez été déconnecté.', 'info')
@@ -115,17 +116,18 @@ def index():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    # Get count of patients
-    patient_count = Patient.query.filter_by(user_id=current_user.id).count()
+    # Statistics read from the incrementally maintained summary tables
+    stats = summary.get_dashboard_summary(current_user.id)
     
     # Get recent blood pressure records
-    recent_bp = BloodPressureRecord.query.join(Patient).filter(
-        Patient.user_id == current_user.id
+    recent_bp = BloodPressureRecord.query.filter_by(
+        user_id=current_user.id
     ).order_by(BloodPressureRecord.recorded_at.desc()).limit(5).all()
     
     return render_template(
         'dashboard.html',
-        patient_count=patient_count,
+        patient_count=stats['patient_count'],
+        stats=stats,
         recent_bp=recent_bp
     )
 
@@ -153,6 +155,26 @@ def api_calculate_gestational_age():
         'recommendations': recommendations
     })
 
+@app.route('/api/pregnancies/active')
+@login_required
+def api_active_pregnancies():
+    # Âge gestationnel actuel de toutes les grossesses en cours, par trimestre et par date prévue d'accouchement
+    reference_date = request.args.get('date')
+    if reference_date:
+        try:
+            reference_date = datetime.strptime(reference_date, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'date doit être au format AAAA-MM-JJ'}), 400
+    else:
+        reference_date = datetime.now().date()
+
+    pregnancies = summary.get_active_pregnancies(current_user.id, reference_date)
+    return jsonify({
+        'reference_date': reference_date,
+        'counts': {trimester: len(rows) for trimester, rows in pregnancies.items()},
+        'trimesters': pregnancies
+    })
+
 @app.route('/checklists')
 @login_required
 def checklists():
@@ -193,18 +215,10 @@ def api_analyze_blood_results():
             patient_id=patient_id
         )
         
-        db.session.add(record)
-        db.session.commit()
-        
-        # Log the action
-        log = AuditLog(
-            user_id=current_user.id,
-            action="Enregistrement d'analyse biomédicale",
-            details=f"Patient ID: {patient_id}",
-            ip_address=request.remote_addr
-        )
-        db.session.add(log)
-        db.session.commit()
+        # Save the record and log the action in one transaction
+        with UnitOfWork("Enregistrement d'analyse biomédicale", details=f"Patient ID: {patient_id}") as uow:
+            uow.add(record)
+            summary.record_biomedical(current_user.id, platelets, ldh, alt, ast)
     
     return jsonify(results)
 
@@ -229,6 +243,12 @@ def api_record_blood_pressure():
     
     # Record the blood pressure measurement if a patient is selected
     if patient_id:
+        # Vérifier que la patiente appartient au midwife connecté
+        patient = Patient.query.filter_by(id=patient_id, user_id=current_user.id).first()
+        
+        if not patient:
+            return jsonify({'error': 'Patient non trouvé'}), 404
+        
         record = BloodPressureRecord(
             systolic=systolic,
             diastolic=diastolic,
@@ -238,18 +258,18 @@ def api_record_blood_pressure():
             user_id=current_user.id
         )
         
-        db.session.add(record)
-        db.session.commit()
+        # Save the record and log the action in one transaction
+        with UnitOfWork("Enregistrement de tension artérielle", details=f"Patient ID: {patient_id}, TA: {systolic}/{diastolic}") as uow:
+            uow.add(record)
+            summary.record_blood_pressure(current_user.id, systolic, diastolic)
         
-        # Log the action
-        log = AuditLog(
-            user_id=current_user.id,
-            action="Enregistrement de tension artérielle",
-            details=f"Patient ID: {patient_id}, TA: {systolic}/{diastolic}",
-            ip_address=request.remote_addr
-        )
-        db.session.add(log)
-        db.session.commit()
+        # Alert the midwife's open pages
+        if result['status'] == 'critical':
+            event_broker.publish(current_user.id, 'alert', {
+                'kind': 'blood_pressure',
+                'patient_ids': [patient_id],
+                'message': f"TA critique {systolic}/{diastolic} mmHg chez {patient.last_name} {patient.first_name} : {result['message']}"
+            })
     
     return jsonify({
         'status': result['status'],
@@ -257,15 +277,234 @@ def api_record_blood_pressure():
         'saved': patient_id is not None
     })
 
+@app.route('/api/blood_pressure/bulk', methods=['POST'])
+@login_required
+def api_bulk_blood_pressure():
+    # Readings are sent as a JSON array (or {"readings": [...]}) or as NDJSON, one reading per line
+    max_items = app.config['BP_BULK_MAX_SIZE']
+    
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        try:
+            items = parse_ndjson(request.stream, max_items)
+        except BatchTooLarge:
+            return jsonify({'error': f'Au plus {max_items} mesures par requête'}), 413
+    else:
+        data = request.get_json(silent=True)
+        items = data.get('readings') if isinstance(data, dict) else data
+        
+        if not isinstance(items, list):
+            return jsonify({'error': 'Un tableau de mesures est attendu'}), 400
+        if len(items) > max_items:
+            return jsonify({'error': f'Au plus {max_items} mesures par requête'}), 413
+    
+    if not items:
+        return jsonify({'error': 'Aucune mesure reçue'}), 400
+    
+    # Insert the whole batch and log it once, in one transaction
+    with UnitOfWork("Import de tensions artérielles") as uow:
+        result = ingest_blood_pressure_readings(current_user.id, items)
+        uow.details = f"{result['saved']} mesures enregistrées, {len(result['errors'])} rejetées"
+    
+    # One alert for all the critical readings of the batch
+    critical = [items[index] for index, status in enumerate(result['statuses']) if status == 'critical']
+    if critical:
+        patient_ids = sorted({int(item['patientId']) for item in critical})
+        event_broker.publish(current_user.id, 'alert', {
+            'kind': 'blood_pressure',
+            'patient_ids': patient_ids,
+            'message': f"{len(critical)} mesure(s) de TA critique(s) importée(s) pour {len(patient_ids)} patiente(s)"
+        })
+    
+    return jsonify(result)
+
+@app.route('/api/patients/import', methods=['POST'])
+@login_required
+def api_import_patients():
+    # The CSV is sent as a multipart "file" field or as the raw request body, and read as it arrives
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    
+    try:
+        result = import_patients_csv(current_user.id, lines, app.config['PATIENT_IMPORT_CHUNK_SIZE'])
+    except InvalidImportFile as error:
+        return jsonify({'error': str(error)}), 400
+    except UnicodeDecodeError:
+        return jsonify({'error': 'Le fichier doit être encodé en UTF-8'}), 400
+    
+    return jsonify(result)
+
+@app.route('/api/patients/<int:patient_id>/blood_pressure_trend')
+@login_required
+def api_blood_pressure_trend(patient_id):
+    # Vérifier que la patiente appartient au midwife connecté
+    patient = Patient.query.filter_by(id=patient_id, user_id=current_user.id).first()
+    
+    if not patient:
+        return jsonify({'error': 'Patient non trouvé'}), 404
+    
+    trend = get_blood_pressure_trend(patient_id)
+    return jsonify(dict(trend, patient_id=patient_id))
+
+@app.route('/api/patients/<int:patient_id>/export')
+@login_required
+def api_export_patient(patient_id):
+    # Vérifier que la patiente appartient au midwife connecté
+    patient = Patient.query.filter_by(id=patient_id, user_id=current_user.id).first()
+    
+    if not patient:
+        return jsonify({'error': 'Patient non trouvé'}), 404
+    
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in FORMATS:
+        return jsonify({'error': 'Format inconnu, utiliser ndjson ou csv'}), 400
+    
+    with UnitOfWork("Export du dossier", details=f"Patient: {patient.first_name} {patient.last_name} ({export_format})"):
+        pass
+    
+    # The record is streamed as it is read, never buffered
+    lines = generate_export(select(Patient.id).where(Patient.id == patient_id), export_format)
+    return Response(
+        stream_with_context(lines),
+        mimetype=FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename=dossier_{patient_id}.{export_format}'}
+    )
+
 @app.route('/ultrasound')
 @login_required
 def ultrasound():
-    return render_template('ultrasound.html')
+    # Get patients for the dropdown menu
+    patients = Patient.query.filter_by(user_id=current_user.id).all()
+    return render_template(
+        'ultrasound.html',
+        patients=patients,
+        reference_url=url_for('api_reference_data', name='ultrasound', version=reference_version('ultrasound'))
+    )
+
+@app.route('/api/analyze_ultrasound', methods=['POST'])
+@login_required
+def api_analyze_ultrasound():
+    data = request.json
+    measurements = data.get('measurements', {})
+    weeks = int(data['gestationalAge'])
+    gestational_days = weeks * 7 + int(data.get('gestationalDays') or 0)
+    
+    reference = get_biometry_reference()
+    if not reference.first_day <= gestational_days <= reference.last_day:
+        return jsonify({'error': "L'âge gestationnel doit être compris entre 12 et 40 semaines."}), 400
+    
+    bpd = float(measurements['bpd']) if measurements.get('bpd') else None
+    hc = float(measurements['hc']) if measurements.get('hc') else None
+    ac = float(measurements['ac']) if measurements.get('ac') else None
+    fl = float(measurements['fl']) if measurements.get('fl') else None
+    af_index = float(measurements['afIndex']) if measurements.get('afIndex') else None
+    placenta_location = measurements.get('placentaLocation') or None
+    patient_id = int(data['patientId']) if data.get('patientId') else None
+    
+    results = analyze_ultrasound(
+        gestational_days, bpd=bpd, hc=hc, ac=ac, fl=fl,
+        amniotic_fluid_index=af_index, placenta_location=placenta_location
+    )
+    
+    # Save the examination if a patient is selected
+    if patient_id:
+        patient = Patient.query.filter_by(id=patient_id, user_id=current_user.id).first()
+        if not patient:
+            return jsonify({'error': 'Patient non trouvé'}), 404
+        
+        record = UltrasoundRecord(
+            gestational_age=weeks,
+            gestational_days=gestational_days,
+            bpd=bpd,
+            hc=hc,
+            ac=ac,
+            fl=fl,
+            estimated_weight=results['efw'],
+            placenta_location=placenta_location,
+            amniotic_fluid_index=af_index,
+            notes=data.get('notes', ''),
+            patient_id=patient_id
+        )
+        
+        # Save the record and log the action in one transaction
+        with UnitOfWork("Enregistrement d'échographie", details=f"Patient ID: {patient_id}, Terme: {weeks} SA") as uow:
+            uow.add(record)
+        
+        results['ultrasound_id'] = record.id
+    
+    results['saved'] = patient_id is not None
+    return jsonify(results)
+
+@app.route('/api/analyze_ultrasound_batch', methods=['POST'])
+@login_required
+def api_analyze_ultrasound_batch():
+    # Score many examinations at once from aligned arrays:
+    # {"gestationalDays": [...], "bpd": [...], "hc": [...], "ac": [...], "fl": [...], "efw": [...]}
+    data = request.json or {}
+    gestational_days = data.get('gestationalDays')
+    
+    if not isinstance(gestational_days, list) or not gestational_days:
+        return jsonify({'error': 'gestationalDays doit être une liste non vide'}), 400
+    
+    if len(gestational_days) > app.config['ULTRASOUND_BATCH_MAX_SIZE']:
+        return jsonify({'error': f"Au plus {app.config['ULTRASOUND_BATCH_MAX_SIZE']} examens par requête"}), 400
+    
+    measurements = {name: data[name] for name in MEASUREMENTS if name in data}
+    if any(not isinstance(values, list) or len(values) != len(gestational_days) for values in measurements.values()):
+        return jsonify({'error': 'Chaque mesure doit être une liste de même longueur que gestationalDays'}), 400
+    
+    try:
+        if 'efw' not in measurements and 'ac' in measurements and 'fl' in measurements:
+            measurements['efw'] = estimate_fetal_weight(
+                measurements.get('bpd'), measurements.get('hc'), measurements['ac'], measurements['fl']
+            )
+        scores = score_biometry(gestational_days, **measurements)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Valeurs numériques invalides'}), 400
+    
+    response = {'count': len(gestational_days)}
+    for name, score in scores.items():
+        response[name] = {
+            'z_score': to_json_list(score['z_score']),
+            'percentile': to_json_list(score['percentile'], 1)
+        }
+    
+    # Weights computed with the Hadlock formula are returned with their scores
+    if 'efw' not in data and 'efw' in measurements:
+        response['efw']['value'] = to_json_list(measurements['efw'], 0)
+    
+    return jsonify(response)
 
 @app.route('/emergency')
 @login_required
 def emergency():
-    return render_template('emergency.html')
+    return render_template(
+        'emergency.html',
+        protocols_url=url_for('api_reference_data', name='emergency', version=reference_version('emergency'))
+    )
+
+@app.route('/api/reference/<name>')
+@app.route('/api/reference/<name>/<version>')
+@login_required
+def api_reference_data(name, version=None):
+    if name not in REFERENCE_PAYLOADS:
+        return jsonify({'error': 'Référentiel inconnu'}), 404
+    
+    body, current_version = REFERENCE_PAYLOADS[name]
+    
+    # An outdated version (page rendered before a deployment) is sent to the current one
+    if version is not None and version != current_version:
+        return redirect(url_for('api_reference_data', name=name, version=current_version))
+    
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(current_version)
+    if version:
+        # The content of a versioned URL never changes
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'private, no-cache'
+    
+    return response.make_conditional(request)
 
 @app.route('/patients', methods=['GET', 'POST'])
 @login_required
@@ -288,18 +527,10 @@ def patients():
             user_id=current_user.id
         )
         
-        db.session.add(new_patient)
-        db.session.commit()
-        
-        # Log the action
-        log = AuditLog(
-            user_id=current_user.id,
-            action="Création de patient",
-            details=f"Patient: {first_name} {last_name}",
-            ip_address=request.remote_addr
-        )
-        db.session.add(log)
-        db.session.commit()
+        # Save the patient and log the action in one transaction
+        with UnitOfWork("Création de patient", details=f"Patient: {first_name} {last_name}") as uow:
+            uow.add(new_patient)
+            summary.record_patient_added(current_user.id, last_period_date, cycle_length)
         
         flash('Patient ajouté avec succès.', 'success')
         return redirect(url_for('patients'))
@@ -310,14 +541,18 @@ def patients():
 @app.route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
+    # current_user is a cached snapshot, the account itself is loaded to be displayed or changed
+    user = db.session.get(User, current_user.id)
+    
     if request.method == 'POST':
         # Update profile
         if 'update_profile' in request.form:
-            current_user.username = request.form.get('username')
-            current_user.email = request.form.get('email')
-            current_user.default_cycle_length = int(request.form.get('default_cycle_length', 28))
+            user.username = request.form.get('username')
+            user.email = request.form.get('email')
+            user.default_cycle_length = int(request.form.get('default_cycle_length', 28))
             
             db.session.commit()
+            invalidate_user(user.id)
             
             flash('Profil mis à jour avec succès.', 'success')
         
@@ -327,22 +562,15 @@ def profile():
             new_password = request.form.get('new_password')
             confirm_password = request.form.get('confirm_password')
             
-            if not current_user.check_password(current_password):
+            if not user.check_password(current_password):
                 flash('Mot de passe actuel incorrect.', 'danger')
             elif new_password != confirm_password:
                 flash('Les nouveaux mots de passe ne correspondent pas.', 'danger')
             else:
-                current_user.set_password(new_password)
-                db.session.commit()
-                
-                # Log the action
-                log = AuditLog(
-                    user_id=current_user.id,
-                    action="Changement de mot de passe",
-                    ip_address=request.remote_addr
-                )
-                db.session.add(log)
-                db.session.commit()
+                # Change the password and log the action in one transaction
+                with UnitOfWork("Changement de mot de passe"):
+                    user.set_password(new_password)
+                invalidate_user(user.id)
                 
                 flash('Mot de passe modifié avec succès.', 'success')
         
@@ -351,7 +579,19 @@ def profile():
     # Fetch the audit logs for the user
     audit_logs = AuditLog.query.filter_by(user_id=current_user.id).order_by(AuditLog.timestamp.desc()).limit(10).all()
     
-    return render_template('profile.html', user=current_user, audit_logs=audit_logs)
+    return render_template('profile.html', user=user, audit_logs=audit_logs)
+
+@app.route('/admin/metrics')
+@login_required
+def admin_metrics():
+    # Réservé aux administrateurs, uniquement quand le profilage est activé
+    if current_user.username not in app.config['ADMIN_USERNAMES']:
+        return jsonify({'error': 'Accès réservé aux administrateurs'}), 403
+    if not app.config['PROFILING_ENABLED']:
+        return jsonify({'error': 'Profilage désactivé (PROFILING_ENABLED=1)'}), 404
+    
+    from profiling import request_metrics
+    return Response(request_metrics.render(), mimetype='text/plain', headers={'Cache-Control': 'no-store'})
 
 # Error handling
 @app.errorhandler(404)
@@ -368,61 +608,89 @@ def internal_server_error(e):
 def postnatal():
     return render_template('postnatal.html')
 
+def get_page_args():
+    """
+    Read the keyset pagination parameters of a list API request.
+    
+    Returns:
+        tuple: (cursor, limit), limit is clamped to API_MAX_PAGE_SIZE
+    """
+    cursor = request.args.get('cursor') or None
+    try:
+        limit = int(request.args.get('limit', app.config["API_PAGE_SIZE"]))
+    except ValueError:
+        limit = app.config["API_PAGE_SIZE"]
+    
+    return cursor, max(1, min(limit, app.config["API_MAX_PAGE_SIZE"]))
+
+@app.errorhandler(InvalidCursor)
+def invalid_cursor(e):
+    return jsonify({'error': 'Curseur de pagination invalide'}), 400
+
+@app.errorhandler(InvalidFields)
+def invalid_fields(e):
+    return jsonify({'error': f"Champs inconnus : {', '.join(e.unknown)}", 'fields': e.allowed}), 400
+
 @app.route('/api/patients')
 @login_required
 def api_patients():
-    patients = Patient.query.filter_by(user_id=current_user.id).all()
-    
-    patients_data = []
-    for patient in patients:
-        patients_data.append({
-            'id': patient.id,
-            'first_name': patient.first_name,
-            'last_name': patient.last_name,
-            'date_of_birth': patient.date_of_birth.strftime('%Y-%m-%d') if patient.date_of_birth else None,
-            'last_period_date': patient.last_period_date.strftime('%Y-%m-%d') if patient.last_period_date else None
-        })
+    fields = PATIENT_SCHEMA.parse_fields(request.args.get('fields'))
+    cursor, limit = get_page_args()
+    patients, next_cursor = get_patients_page(
+        current_user.id,
+        search=request.args.get('q'),
+        cursor=cursor,
+        limit=limit,
+        columns=PATIENT_SCHEMA.columns(fields, extra=[Patient.last_name, Patient.id])
+    )
     
-    return jsonify({'patients': patients_data})
+    return jsonify({'patients': PATIENT_SCHEMA.dump(patients, fields), 'next_cursor': next_cursor})
 
 @app.route('/api/postnatal/babies')
 @login_required
 def api_babies():
-    # Récupérer tous les bébés associés aux patients du midwife
-    babies = BabyRecord.query.join(Patient).filter(Patient.user_id == current_user.id).all()
-    
-    babies_data = []
-    for baby in babies:
-        babies_data.append({
-            'id': baby.id,
-            'first_name': baby.first_name,
-            'last_name': baby.last_name,
-            'birth_date': baby.birth_date.strftime('%Y-%m-%d'),
-            'mother_id': baby.mother_id,
-            'mother_name': f"{baby.mother.last_name} {baby.mother.first_name}"
-        })
+    # Récupérer une page des bébés associés aux patients du midwife
+    fields = BABY_SCHEMA.parse_fields(request.args.get('fields'))
+    cursor, limit = get_page_args()
+    babies, next_cursor = get_babies_page(
+        current_user.id,
+        search=request.args.get('q'),
+        mother_id=request.args.get('mother_id', type=int),
+        cursor=cursor,
+        limit=limit,
+        columns=BABY_SCHEMA.columns(fields, extra=[BabyRecord.birth_date, BabyRecord.id])
+    )
     
-    return jsonify({'babies': babies_data})
+    return jsonify({'babies': BABY_SCHEMA.dump(babies, fields), 'next_cursor': next_cursor})
 
 @app.route('/api/postnatal/deliveries')
 @login_required
 def api_deliveries():
-    # Récupérer tous les accouchements des patients du midwife
-    deliveries = DeliveryRecord.query.join(Patient).filter(Patient.user_id == current_user.id).order_by(DeliveryRecord.delivery_date.desc()).all()
-    
-    deliveries_data = []
-    for delivery in deliveries:
-        deliveries_data.append({
-            'id': delivery.id,
-            'delivery_date': delivery.delivery_date.isoformat(),
-            'delivery_type': delivery.delivery_type,
-            'delivery_location': delivery.delivery_location,
-            'complications': delivery.complications,
-            'patient_id': delivery.patient_id,
-            'patient_name': f"{delivery.patient.last_name} {delivery.patient.first_name}"
-        })
+    # Récupérer une page des accouchements des patients du midwife
+    fields = DELIVERY_SCHEMA.parse_fields(request.args.get('fields'))
+    cursor, limit = get_page_args()
+    deliveries, next_cursor = get_deliveries_page(
+        current_user.id,
+        search=request.args.get('q'),
+        delivery_type=request.args.get('delivery_type'),
+        patient_id=request.args.get('patient_id', type=int),
+        cursor=cursor,
+        limit=limit,
+        columns=DELIVERY_SCHEMA.columns(fields, extra=[DeliveryRecord.delivery_date, DeliveryRecord.id])
+    )
     
-    return jsonify({'deliveries': deliveries_data})
+    return jsonify({'deliveries': DELIVERY_SCHEMA.dump(deliveries, fields), 'next_cursor': next_cursor})
+
+@app.route('/api/search')
+@login_required
+def api_search():
+    # Recherche instantanée des patientes et des bébés par début de nom, accents ignorés
+    search_type = request.args.get('type') or None
+    if search_type is not None and search_type not in SEARCH_TYPES:
+        return jsonify({'error': f"type doit valoir {' ou '.join(SEARCH_TYPES)}"}), 400
+    
+    limit = max(1, min(request.args.get('limit', SEARCH_DEFAULT_LIMIT, type=int), SEARCH_MAX_LIMIT))
+    return jsonify({'results': search_names(current_user.id, request.args.get('q', ''), search_type, limit)})
 
 @app.route('/api/postnatal/delivery/<int:delivery_id>')
 @login_required
@@ -505,10 +773,7 @@ def api_record_delivery():
         user_id=current_user.id
     )
     
-    db.session.add(delivery)
-    db.session.flush()  # Pour obtenir l'ID de l'accouchement avant commit
-    
-    # Créer l'enregistrement du bébé
+    # Créer l'enregistrement du bébé (lié par relation, les IDs sont attribués au commit)
     baby = BabyRecord(
         first_name=baby_data.get('first_name'),
         last_name=baby_data.get('last_name'),
@@ -527,47 +792,18 @@ def api_record_delivery():
         nicu_required=baby_data.get('nicu_required', False),
         notes=baby_data.get('notes'),
         mother_id=patient_id,
-        delivery_id=delivery.id
-    )
-    
-    db.session.add(baby)
-    
-    # Créer des rappels de suivi automatiques
-    # 1. Visite postnatale pour la mère dans les 24-48h
-    mother_reminder = PostnatalCareReminder(
-        title="Visite postnatale précoce",
-        description="Évaluation de la récupération post-partum, saignements, signes vitaux, involution utérine",
-        reminder_date=delivery.delivery_date + timedelta(days=1),
-        reminder_type="mother",
-        priority="high",
-        patient_id=patient_id,
-        user_id=current_user.id
+        delivery=delivery
     )
     
-    # 2. Suivi du bébé à 1 semaine
-    baby_reminder = PostnatalCareReminder(
-        title="Suivi néonatal à 1 semaine",
-        description="Contrôle de poids, ictère, alimentation, soins du cordon, signes vitaux",
-        reminder_date=delivery.delivery_date + timedelta(days=7),
-        reminder_type="baby",
-        priority="high",
-        baby_id=baby.id,
-        user_id=current_user.id
-    )
+    # Enregistrer l'accouchement, le bébé et le journal d'audit en une transaction
+    with UnitOfWork(
+        "Enregistrement d'accouchement",
+        details=f"Patient ID: {patient_id}, Type: {delivery_data.get('delivery_type')}"
+    ) as uow:
+        uow.add(delivery, baby)
     
-    db.session.add(mother_reminder)
-    db.session.add(baby_reminder)
-    
-    # Journal d'audit
-    log = AuditLog(
-        user_id=current_user.id,
-        action="Enregistrement d'accouchement",
-        details=f"Patient ID: {patient_id}, Type: {delivery_data.get('delivery_type')}",
-        ip_address=request.remote_addr
-    )
-    db.session.add(log)
-    
-    db.session.commit()
+    # Les rappels du calendrier postnatal sont créés en arrière-plan
+    reminder_scheduler.wake()
     
     return jsonify({
         'success': True,
@@ -584,9 +820,22 @@ def api_mother_checkups(mother_id):
     if not patient:
         return jsonify({'error': 'Patient non trouvé'}), 404
     
-    # Récupérer les suivis
-    checkups = PostnatalCheckup.query.filter_by(
-        patient_id=mother_id, checkup_type='mother'
+    # Réponse inchangée depuis la dernière visite : 304 sans charger les suivis
+    version = collection_version(
+        current_user.id,
+        (PostnatalCheckup, [PostnatalCheckup.patient_id == mother_id, PostnatalCheckup.checkup_type == 'mother']),
+        (DeliveryRecord, [DeliveryRecord.patient_id == mother_id]),
+        updated_at=(patient.updated_at,)
+    )
+    cached = not_modified(version)
+    if cached:
+        return cached
+    
+    # Récupérer les suivis, uniquement les champs demandés
+    fields = MOTHER_CHECKUP_SCHEMA.parse_fields(request.args.get('fields'))
+    checkups = db.session.query(*MOTHER_CHECKUP_SCHEMA.columns(fields)).filter(
+        PostnatalCheckup.patient_id == mother_id,
+        PostnatalCheckup.checkup_type == 'mother'
     ).order_by(PostnatalCheckup.checkup_date.desc()).all()
     
     # Récupérer l'accouchement le plus récent
@@ -603,37 +852,21 @@ def api_mother_checkups(mother_id):
             'complications': delivery.complications
         }
     
-    # Préparer les données des suivis
-    checkups_data = []
-    for checkup in checkups:
-        checkups_data.append({
-            'id': checkup.id,
-            'checkup_date': checkup.checkup_date.isoformat(),
-            'temperature': checkup.temperature,
-            'heart_rate': checkup.heart_rate,
-            'blood_pressure_systolic': checkup.blood_pressure_systolic,
-            'blood_pressure_diastolic': checkup.blood_pressure_diastolic,
-            'weight': checkup.weight,
-            'symptoms': checkup.symptoms,
-            'recommendations': checkup.recommendations,
-            'next_checkup_date': checkup.next_checkup_date.isoformat() if checkup.next_checkup_date else None
-        })
-    
-    return jsonify({
+    return with_version(jsonify({
         'patient': {
             'id': patient.id,
             'first_name': patient.first_name,
             'last_name': patient.last_name
         },
         'delivery': delivery_data,
-        'checkups': checkups_data
-    })
+        'checkups': MOTHER_CHECKUP_SCHEMA.dump(checkups, fields)
+    }), version)
 
 @app.route('/api/postnatal/baby/<int:baby_id>')
 @login_required
 def api_baby_info(baby_id):
     # Récupérer le bébé et vérifier qu'il appartient à un patient du midwife connecté
-    baby = BabyRecord.query.join(Patient).filter(
+    baby = BabyRecord.query.join(BabyRecord.mother).options(contains_eager(BabyRecord.mother)).filter(
         BabyRecord.id == baby_id,
         Patient.user_id == current_user.id
     ).first()
@@ -641,56 +874,34 @@ def api_baby_info(baby_id):
     if not baby:
         return jsonify({'error': 'Bébé non trouvé'}), 404
     
-    # Récupérer les suivis du bébé
-    checkups = PostnatalCheckup.query.filter_by(
-        baby_id=baby_id, checkup_type='baby'
+    # Réponse inchangée depuis la dernière visite : 304 sans charger les suivis
+    version = collection_version(
+        current_user.id,
+        (PostnatalCheckup, [PostnatalCheckup.baby_id == baby_id, PostnatalCheckup.checkup_type == 'baby']),
+        updated_at=(baby.created_at, baby.mother.updated_at)
+    )
+    cached = not_modified(version)
+    if cached:
+        return cached
+    
+    # Récupérer les suivis du bébé, uniquement les champs demandés
+    fields = BABY_CHECKUP_SCHEMA.parse_fields(request.args.get('fields'))
+    checkups = db.session.query(*BABY_CHECKUP_SCHEMA.columns(fields)).filter(
+        PostnatalCheckup.baby_id == baby_id,
+        PostnatalCheckup.checkup_type == 'baby'
     ).order_by(PostnatalCheckup.checkup_date.desc()).all()
     
     # Préparer les données
-    baby_data = {
-        'id': baby.id,
-        'first_name': baby.first_name,
-        'last_name': baby.last_name,
-        'birth_date': baby.birth_date.isoformat(),
-        'gender': baby.gender,
-        'birth_weight': baby.birth_weight,
-        'birth_length': baby.birth_length,
-        'head_circumference': baby.head_circumference,
-        'apgar_1min': baby.apgar_1min,
-        'apgar_5min': baby.apgar_5min,
-        'apgar_10min': baby.apgar_10min,
-        'resuscitation_required': baby.resuscitation_required,
-        'oxygen_required': baby.oxygen_required,
-        'nicu_required': baby.nicu_required,
-        'mother_id': baby.mother_id,
-        'mother_name': f"{baby.mother.last_name} {baby.mother.first_name}",
-        'delivery_type': baby.delivery.delivery_type
-    }
-    
-    # Préparer les données des suivis
-    checkups_data = []
-    for checkup in checkups:
-        checkups_data.append({
-            'id': checkup.id,
-            'checkup_date': checkup.checkup_date.isoformat(),
-            'temperature': checkup.temperature,
-            'heart_rate': checkup.heart_rate,
-            'respiratory_rate': checkup.respiratory_rate,
-            'weight': checkup.weight,
-            'length': None,  # Cette donnée serait ajoutée dans une mise à jour future
-            'symptoms': checkup.symptoms,
-            'recommendations': checkup.recommendations
-        })
-    
-    baby_data['checkups'] = checkups_data
+    baby_data = baby_summary(baby)
+    baby_data['checkups'] = BABY_CHECKUP_SCHEMA.dump(checkups, fields)
     
-    return jsonify(baby_data)
+    return with_version(jsonify(baby_data), version)
 
 @app.route('/api/postnatal/breastfeeding/<int:baby_id>')
 @login_required
 def api_breastfeeding_records(baby_id):
     # Vérifier que le bébé appartient à un patient du midwife connecté
-    baby = BabyRecord.query.join(Patient).filter(
+    baby = BabyRecord.query.join(BabyRecord.mother).options(contains_eager(BabyRecord.mother)).filter(
         BabyRecord.id == baby_id,
         Patient.user_id == current_user.id
     ).first()
@@ -698,34 +909,33 @@ def api_breastfeeding_records(baby_id):
     if not baby:
         return jsonify({'error': 'Bébé non trouvé'}), 404
     
-    # Récupérer les enregistrements d'allaitement
-    records = BreastfeedingRecord.query.filter_by(
-        baby_id=baby_id
+    # Réponse inchangée depuis la dernière visite : 304 sans charger les enregistrements
+    version = collection_version(
+        current_user.id,
+        (BreastfeedingRecord, [BreastfeedingRecord.baby_id == baby_id]),
+        updated_at=(baby.created_at, baby.mother.updated_at)
+    )
+    cached = not_modified(version)
+    if cached:
+        return cached
+    
+    # Récupérer les enregistrements d'allaitement, uniquement les champs demandés
+    fields = BREASTFEEDING_SCHEMA.parse_fields(request.args.get('fields'))
+    records = db.session.query(*BREASTFEEDING_SCHEMA.columns(fields)).filter(
+        BreastfeedingRecord.baby_id == baby_id
     ).order_by(BreastfeedingRecord.feeding_date.desc()).all()
     
-    # Préparer les données
-    records_data = []
-    for record in records:
-        records_data.append({
-            'id': record.id,
-            'feeding_date': record.feeding_date.isoformat(),
-            'feeding_type': record.feeding_type,
-            'duration': record.duration,
-            'issues': record.issues,
-            'notes': record.notes
-        })
-    
-    return jsonify({
+    return with_version(jsonify({
         'baby_id': baby_id,
         'baby_name': baby.first_name or f"Bébé de {baby.mother.first_name} {baby.mother.last_name}",
-        'records': records_data
-    })
+        'records': BREASTFEEDING_SCHEMA.dump(records, fields)
+    }), version)
 
 @app.route('/api/postnatal/vaccinations/<int:baby_id>')
 @login_required
 def api_vaccination_records(baby_id):
     # Vérifier que le bébé appartient à un patient du midwife connecté
-    baby = BabyRecord.query.join(Patient).filter(
+    baby = BabyRecord.query.join(BabyRecord.mother).options(contains_eager(BabyRecord.mother)).filter(
         BabyRecord.id == baby_id,
         Patient.user_id == current_user.id
     ).first()
@@ -733,83 +943,135 @@ def api_vaccination_records(baby_id):
     if not baby:
         return jsonify({'error': 'Bébé non trouvé'}), 404
     
-    # Récupérer les vaccinations
-    vaccinations = VaccinationRecord.query.filter_by(
-        baby_id=baby_id
+    # Réponse inchangée depuis la dernière visite : 304 sans charger les vaccinations
+    version = collection_version(
+        current_user.id,
+        (VaccinationRecord, [VaccinationRecord.baby_id == baby_id]),
+        updated_at=(baby.created_at, baby.mother.updated_at)
+    )
+    cached = not_modified(version)
+    if cached:
+        return cached
+    
+    # Récupérer les vaccinations, uniquement les champs demandés
+    fields = VACCINATION_SCHEMA.parse_fields(request.args.get('fields'))
+    vaccinations = db.session.query(*VACCINATION_SCHEMA.columns(fields)).filter(
+        VaccinationRecord.baby_id == baby_id
     ).order_by(VaccinationRecord.date_administered.desc()).all()
     
-    # Préparer les données
-    vaccinations_data = []
-    for vaccination in vaccinations:
-        vaccinations_data.append({
-            'id': vaccination.id,
-            'vaccine_name': vaccination.vaccine_name,
-            'date_administered': vaccination.date_administered.isoformat(),
-            'dose': vaccination.dose,
-            'route': vaccination.route,
-            'site': vaccination.site,
-            'lot_number': vaccination.lot_number,
-            'expiration_date': vaccination.expiration_date.isoformat() if vaccination.expiration_date else None,
-            'reaction': vaccination.reaction,
-            'notes': vaccination.notes
-        })
-    
-    return jsonify({
+    return with_version(jsonify({
         'baby_id': baby_id,
         'baby_name': baby.first_name or f"Bébé de {baby.mother.first_name} {baby.mother.last_name}",
-        'vaccinations': vaccinations_data
-    })
+        'vaccinations': VACCINATION_SCHEMA.dump(vaccinations, fields)
+    }), version)
 
-@app.route('/api/postnatal/reminders')
+@app.route('/api/postnatal/timeline/baby/<int:baby_id>')
 @login_required
-def api_reminders():
-    # Récupérer les filtres
-    reminder_type = request.args.get('type', 'all')
-    priority = request.args.get('priority', 'all')
-    status = request.args.get('status', 'all')
+def api_baby_timeline(baby_id):
+    # Récupérer le bébé avec sa mère et l'accouchement, en vérifiant qu'il appartient au midwife connecté
+    baby = BabyRecord.query.join(BabyRecord.mother).options(
+        contains_eager(BabyRecord.mother),
+        joinedload(BabyRecord.delivery)
+    ).filter(
+        BabyRecord.id == baby_id,
+        Patient.user_id == current_user.id
+    ).first()
     
-    # Construire la requête de base
-    query = PostnatalCareReminder.query.filter_by(user_id=current_user.id)
+    if not baby:
+        return jsonify({'error': 'Bébé non trouvé'}), 404
     
-    # Appliquer les filtres
-    if reminder_type != 'all':
-        query = query.filter_by(reminder_type=reminder_type)
+    # Réponse inchangée depuis la dernière visite : 304 sans charger les événements
+    version = collection_version(
+        current_user.id,
+        *version_collections(BABY_EVENTS, baby_id),
+        updated_at=(baby.created_at, baby.mother.updated_at)
+    )
+    cached = not_modified(version)
+    if cached:
+        return cached
+    
+    # Suivis, allaitements et vaccinations, du plus récent au plus ancien
+    baby_data = baby_summary(baby)
+    baby_data['baby_name'] = baby.first_name or f"Bébé de {baby.mother.first_name} {baby.mother.last_name}"
+    
+    return with_version(jsonify({
+        'baby': baby_data,
+        'events': load_events(BABY_EVENTS, baby_id)
+    }), version)
+
+@app.route('/api/postnatal/timeline/mother/<int:mother_id>')
+@login_required
+def api_mother_timeline(mother_id):
+    # Vérifier que la patiente appartient au midwife connecté
+    patient = Patient.query.filter_by(id=mother_id, user_id=current_user.id).first()
     
-    if priority != 'all':
-        query = query.filter_by(priority=priority)
+    if not patient:
+        return jsonify({'error': 'Patient non trouvé'}), 404
     
-    if status == 'pending':
-        query = query.filter_by(completed=False)
-    elif status == 'completed':
-        query = query.filter_by(completed=True)
+    # Réponse inchangée depuis la dernière visite : 304 sans charger les événements
+    version = collection_version(
+        current_user.id,
+        *version_collections(MOTHER_EVENTS, mother_id),
+        updated_at=(patient.updated_at,)
+    )
+    cached = not_modified(version)
+    if cached:
+        return cached
     
-    # Exécuter la requête
-    reminders = query.order_by(PostnatalCareReminder.reminder_date).all()
+    # Accouchements et suivis post-partum, du plus récent au plus ancien
+    events = load_events(MOTHER_EVENTS, mother_id)
+    delivery = next((event['record'] for event in events if event['type'] == 'delivery'), None)
     
-    # Préparer les données
-    reminders_data = []
-    for reminder in reminders:
-        reminder_data = {
-            'id': reminder.id,
-            'title': reminder.title,
-            'description': reminder.description,
-            'reminder_date': reminder.reminder_date.isoformat(),
-            'reminder_type': reminder.reminder_type,
-            'priority': reminder.priority,
-            'completed': reminder.completed
-        }
-        
-        if reminder.patient_id:
-            patient = Patient.query.get(reminder.patient_id)
-            reminder_data['patient_name'] = f"{patient.last_name} {patient.first_name}" if patient else None
-        
-        if reminder.baby_id:
-            baby = BabyRecord.query.get(reminder.baby_id)
-            reminder_data['baby_name'] = baby.first_name or f"Bébé de {baby.mother.last_name}" if baby else None
-        
-        reminders_data.append(reminder_data)
+    return with_version(jsonify({
+        'patient': {
+            'id': patient.id,
+            'first_name': patient.first_name,
+            'last_name': patient.last_name
+        },
+        'delivery': delivery,
+        'events': events
+    }), version)
+
+@app.route('/api/postnatal/reminders')
+@login_required
+def api_reminders():
+    # Récupérer les filtres
+    reminder_type = request.args.get('type', 'all')
+    priority = request.args.get('priority', 'all')
+    status = request.args.get('status', 'all')
+
+    # Une seule requête charge une page de rappels avec les noms des patientes et des bébés
+    fields = REMINDER_SCHEMA.parse_fields(request.args.get('fields'))
+    cursor, limit = get_page_args()
+    reminders, next_cursor = get_reminder_feed(
+        current_user.id, reminder_type, priority, status,
+        search=request.args.get('q'),
+        cursor=cursor,
+        limit=limit,
+        columns=REMINDER_SCHEMA.columns(fields, extra=[PostnatalCareReminder.reminder_date, PostnatalCareReminder.id])
+    )
     
-    return jsonify({'reminders': reminders_data})
+    return jsonify({'reminders': REMINDER_SCHEMA.dump(reminders, fields), 'next_cursor': next_cursor})
+
+@app.route('/api/events')
+@login_required
+def api_events():
+    # Flux des rappels et alertes de la sage-femme connectée, repris après Last-Event-ID
+    if not app.config["SSE_ENABLED"]:
+        # 204 : le navigateur cesse de se reconnecter
+        return '', 204
+    
+    user_id = current_user.id
+    last_event_id = request.headers.get('Last-Event-ID')
+    
+    # Le flux reste ouvert : rendre la connexion à la base avant de le commencer
+    db.session.remove()
+    
+    return Response(
+        event_broker.stream(user_id, last_event_id),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/postnatal/reminder/<int:reminder_id>/complete', methods=['POST'])
 @login_required
@@ -819,18 +1081,13 @@ def api_complete_reminder(reminder_id):
     if not reminder:
         return jsonify({'error': 'Rappel non trouvé'}), 404
     
-    reminder.completed = True
-    db.session.commit()
+    # Marquer le rappel et journaliser en une transaction
+    with UnitOfWork("Complétion de rappel postnatal", details=f"Rappel ID: {reminder_id}, Titre: {reminder.title}"):
+        if not reminder.completed:
+            summary.record_reminder_completed(current_user.id, reminder.reminder_date)
+        reminder.completed = True
     
-    # Journal d'audit
-    log = AuditLog(
-        user_id=current_user.id,
-        action="Complétion de rappel postnatal",
-        details=f"Rappel ID: {reminder_id}, Titre: {reminder.title}",
-        ip_address=request.remote_addr
-    )
-    db.session.add(log)
-    db.session.commit()
+    event_broker.publish(current_user.id, 'reminders', {'action': 'completed', 'count': 1})
     
     return jsonify({'success': True})
 
@@ -907,18 +1164,12 @@ def api_create_reminder():
         
         reminder.baby_id = baby_id
     
-    db.session.add(reminder)
-    
-    # Journal d'audit
-    log = AuditLog(
-        user_id=current_user.id,
-        action="Création de rappel postnatal",
-        details=f"Titre: {reminder.title}, Type: {reminder.reminder_type}",
-        ip_address=request.remote_addr
-    )
-    db.session.add(log)
+    # Enregistrer le rappel et le journal d'audit en une transaction
+    with UnitOfWork("Création de rappel postnatal", details=f"Titre: {reminder.title}, Type: {reminder.reminder_type}") as uow:
+        uow.add(reminder)
+        summary.record_reminder_added(current_user.id, reminder.reminder_date)
     
-    db.session.commit()
+    event_broker.publish(current_user.id, 'reminders', {'action': 'created', 'count': 1})
     
     return jsonify({'success': True, 'reminder_id': reminder.id})
 
@@ -1009,8 +1260,8 @@ def api_record_breastfeeding():
     if not baby:
         return jsonify({'error': 'Bébé non trouvé'}), 404
     
-    # Vérifier que la mère est bien la patiente du midwife
-    mother_id = int(data.get('mother_id'))
+    # Vérifier que la mère est bien la patiente du midwife (par défaut, la mère du bébé)
+    mother_id = int(data.get('mother_id') or baby.mother_id)
     mother = Patient.query.filter_by(id=mother_id, user_id=current_user.id).first()
     
     if not mother:
@@ -1028,18 +1279,9 @@ def api_record_breastfeeding():
         user_id=current_user.id
     )
     
-    db.session.add(breastfeeding)
-    
-    # Journal d'audit
-    log = AuditLog(
-        user_id=current_user.id,
-        action="Enregistrement d'allaitement",
-        details=f"Bébé ID: {baby_id}, Type: {data.get('feeding_type')}",
-        ip_address=request.remote_addr
-    )
-    db.session.add(log)
-    
-    db.session.commit()
+    # Enregistrer l'allaitement et le journal d'audit en une transaction
+    with UnitOfWork("Enregistrement d'allaitement", details=f"Bébé ID: {baby_id}, Type: {data.get('feeding_type')}") as uow:
+        uow.add(breastfeeding)
     
     return jsonify({'success': True, 'breastfeeding_id': breastfeeding.id})
 
@@ -1078,18 +1320,9 @@ def api_record_vaccination():
         user_id=current_user.id
     )
     
-    db.session.add(vaccination)
-    
-    # Journal d'audit
-    log = AuditLog(
-        user_id=current_user.id,
-        action="Enregistrement de vaccination",
-        details=f"Bébé ID: {baby_id}, Vaccin: {data.get('vaccine_name')}",
-        ip_address=request.remote_addr
-    )
-    db.session.add(log)
-    
-    db.session.commit()
+    # Enregistrer la vaccination et le journal d'audit en une transaction
+    with UnitOfWork("Enregistrement de vaccination", details=f"Bébé ID: {baby_id}, Vaccin: {data.get('vaccine_name')}") as uow:
+        uow.add(vaccination)
     
     return jsonify({'success': True, 'vaccination_id': vaccination.id})
 
@@ -1148,42 +1381,65 @@ def api_record_checkup():
         
         checkup.baby_id = baby_id
     
-    db.session.add(checkup)
-    
     # Journal d'audit
     log_details = ""
     if checkup_type == 'mother':
         log_details = f"Patient ID: {patient_id}"
     else:
         log_details = f"Bébé ID: {baby_id}"
-        
-    log = AuditLog(
-        user_id=current_user.id,
-        action=f"Enregistrement de suivi postnatal ({checkup_type})",
-        details=log_details,
-        ip_address=request.remote_addr
-    )
-    db.session.add(log)
     
-    db.session.commit()
+    # Enregistrer le suivi et le journal d'audit en une transaction
+    with UnitOfWork(f"Enregistrement de suivi postnatal ({checkup_type})", details=log_details) as uow:
+        uow.add(checkup)
     
-    # Créer un rappel automatique pour le prochain checkup si la date est fournie
+    # Le rappel du prochain suivi est créé en arrière-plan
     if checkup.next_checkup_date:
-        reminder = PostnatalCareReminder(
-            title=f"Prochain suivi postnatal ({checkup_type})",
-            description=f"Suivi postnatal programmé pour {'la mère' if checkup_type == 'mother' else 'le bébé'}",
-            reminder_date=checkup.next_checkup_date,
-            reminder_type=checkup_type,
-            priority="normal",
-            user_id=current_user.id
-        )
-        
-        if checkup_type == 'mother':
-            reminder.patient_id = patient_id
-        else:
-            reminder.baby_id = baby_id
-        
-        db.session.add(reminder)
-        db.session.commit()
+        reminder_scheduler.wake()
     
     return jsonify({'success': True, 'checkup_id': checkup.id})
+
+@app.route('/api/sync', methods=['GET', 'POST'])
+@login_required
+def api_sync():
+    # GET : enregistrements modifiés depuis le curseur du client ; POST : écritures faites hors ligne
+    if request.method == 'GET':
+        page_size = app.config['SYNC_PAGE_SIZE']
+        limit = max(1, min(request.args.get('limit', page_size, type=int), page_size))
+        return jsonify(get_changes(
+            current_user.id,
+            cursor=request.args.get('cursor') or None,
+            limit=limit,
+            safety_lag=app.config['SYNC_SAFETY_LAG']
+        ))
+    
+    data = request.get_json(silent=True)
+    changes = data.get('changes') if isinstance(data, dict) else None
+    max_changes = app.config['SYNC_MAX_CHANGES']
+    
+    if not isinstance(changes, list):
+        return jsonify({'error': 'Un tableau de modifications est attendu'}), 400
+    if len(changes) > max_changes:
+        return jsonify({'error': f'Au plus {max_changes} modifications par requête'}), 413
+    
+    # Appliquer le lot et le journaliser une fois, en une transaction
+    user_id = current_user.id
+    batch = SyncBatch(user_id)
+    with UnitOfWork("Synchronisation hors ligne") as uow:
+        results = batch.apply(changes)
+        counts = {status: sum(1 for result in results if result['status'] == status) for status in ('created', 'updated', 'duplicate', 'conflict', 'error')}
+        uow.details = ", ".join(f"{status}: {count}" for status, count in counts.items() if count)
+    
+    # Prévenir les pages ouvertes une fois le lot enregistré
+    if batch.critical_patient_ids:
+        patient_ids = sorted(set(batch.critical_patient_ids))
+        event_broker.publish(user_id, 'alert', {
+            'kind': 'blood_pressure',
+            'patient_ids': patient_ids,
+            'message': f"{len(batch.critical_patient_ids)} mesure(s) de TA critique(s) synchronisée(s) pour {len(patient_ids)} patiente(s)"
+        })
+    if batch.reminders_changed:
+        event_broker.publish(user_id, 'reminders', {'action': 'synced', 'count': batch.reminders_changed})
+    if batch.checkups_scheduled:
+        reminder_scheduler.wake()
+    
+    return jsonify({'results': results, 'counts': counts})
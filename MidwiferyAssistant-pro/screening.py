@@ -0,0 +1,164 @@
+import logging
+from collections import Counter
+from datetime import datetime
+import click
+import numpy as np
+from sqlalchemy import func, insert, select
+from app import app, db
+from models import Patient, BiomedicalRecord, BloodPressureRecord, PostnatalCareReminder, ScreeningRun
+from utils import classify_blood_pressure, classify_hemoglobin, count_hellp_indicators_batch
+import summary
+
+REMINDER_TITLE = "Dépistage automatique : patiente à risque"
+
+FLAGGED_STATUSES = ('critical', 'warning')
+
+def _latest_per_patient(model, columns, first_patient_id, last_patient_id, since):
+    # Latest record of each patient of the chunk, skipped if it is older than `since`
+    ranked = select(
+        model.patient_id,
+        model.recorded_at,
+        *columns,
+        func.row_number().over(
+            partition_by=model.patient_id,
+            order_by=(model.recorded_at.desc(), model.id.desc())
+        ).label('rank')
+    ).where(model.patient_id.between(first_patient_id, last_patient_id)).subquery()
+
+    query = select(ranked.c.patient_id, *[ranked.c[column.key] for column in columns]).where(ranked.c.rank == 1)
+    if since is not None:
+        query = query.where(ranked.c.recorded_at > since)
+
+    return db.session.execute(query).all()
+
+def _as_arrays(rows, count):
+    # Column arrays of float, None becoming NaN
+    columns = list(zip(*rows)) if rows else [()] * count
+    return [np.array(column, dtype=float) for column in columns]
+
+def screen_chunk(patients, since=None):
+    """
+    Score the latest blood results and blood pressure of a chunk of patients.
+
+    Args:
+        patients (list): (patient_id, user_id) pairs with consecutive IDs, sorted
+        since (datetime, optional): Ignore results recorded before this time
+
+    Returns:
+        dict: {patient_id: [reasons]} for the flagged patients
+    """
+    first_patient_id, last_patient_id = patients[0][0], patients[-1][0]
+    reasons = {}
+
+    biomedical = _latest_per_patient(
+        BiomedicalRecord,
+        [BiomedicalRecord.hemoglobin, BiomedicalRecord.platelets, BiomedicalRecord.ldh,
+         BiomedicalRecord.alt, BiomedicalRecord.ast],
+        first_patient_id, last_patient_id, since
+    )
+    patient_ids, hemoglobin, platelets, ldh, alt, ast = _as_arrays(biomedical, 6)
+
+    hellp_markers = count_hellp_indicators_batch(platelets, ldh, alt, ast)
+    for index in np.flatnonzero(hellp_markers >= 2):
+        reasons.setdefault(int(patient_ids[index]), []).append(
+            f"Suspicion de syndrome HELLP ({hellp_markers[index]} marqueurs)"
+        )
+
+    anemia = classify_hemoglobin(hemoglobin)
+    for index in np.flatnonzero(np.isin(anemia, FLAGGED_STATUSES)):
+        label = 'Anémie sévère' if anemia[index] == 'critical' else 'Anémie modérée'
+        reasons.setdefault(int(patient_ids[index]), []).append(f"{label} (Hb {hemoglobin[index]:g} g/dL)")
+
+    readings = _latest_per_patient(
+        BloodPressureRecord,
+        [BloodPressureRecord.systolic, BloodPressureRecord.diastolic],
+        first_patient_id, last_patient_id, since
+    )
+    patient_ids, systolic, diastolic = _as_arrays(readings, 3)
+
+    hypertension = classify_blood_pressure(systolic, diastolic)
+    for index in np.flatnonzero(np.isin(hypertension, FLAGGED_STATUSES)):
+        label = 'HTA sévère' if hypertension[index] == 'critical' else 'HTA modérée'
+        reasons.setdefault(int(patient_ids[index]), []).append(
+            f"{label} ({systolic[index]:.0f}/{diastolic[index]:.0f} mmHg)"
+        )
+
+    return reasons
+
+def run_screening(chunk_size=2000, full=False):
+    """
+    Screen every patient's latest results and create high-priority reminders for those at risk.
+
+    Patients are processed in chunks of consecutive IDs. The reminders of a
+    chunk and the checkpoint (last patient ID) of the run are committed
+    together, so an interrupted run resumes after the last committed chunk
+    without creating duplicates. Memory use is bounded by the chunk size.
+
+    A new run only screens results recorded since the start of the previous
+    completed run, so a result is flagged once.
+
+    Args:
+        chunk_size (int): Patients per chunk
+        full (bool): Screen every latest result, not only the new ones (new runs only)
+
+    Returns:
+        ScreeningRun: The completed run
+    """
+    run = ScreeningRun.query.filter(ScreeningRun.finished_at.is_(None)).order_by(ScreeningRun.id.desc()).first()
+
+    if run is None:
+        previous = ScreeningRun.query.filter(
+            ScreeningRun.finished_at.isnot(None)
+        ).order_by(ScreeningRun.id.desc()).first()
+
+        run = ScreeningRun(since=None if full or previous is None else previous.started_at)
+        db.session.add(run)
+        db.session.commit()
+    else:
+        logging.info(f"Reprise du dépistage {run.id} après la patiente {run.last_patient_id}")
+
+    since = run.since
+
+    while True:
+        patients = db.session.query(Patient.id, Patient.user_id).filter(
+            Patient.id > run.last_patient_id
+        ).order_by(Patient.id).limit(chunk_size).all()
+
+        if not patients:
+            break
+
+        owners = dict(patients)
+        reasons = screen_chunk(patients, since)
+
+        now = datetime.utcnow()
+        rows = [{
+            'title': REMINDER_TITLE,
+            'description': ' ; '.join(patient_reasons),
+            'reminder_date': now,
+            'reminder_type': 'mother',
+            'priority': 'high',
+            'patient_id': patient_id,
+            'user_id': owners[patient_id]
+        } for patient_id, patient_reasons in reasons.items()]
+
+        if rows:
+            db.session.execute(insert(PostnatalCareReminder), rows)
+            for user_id, count in Counter(row['user_id'] for row in rows).items():
+                summary.record_reminder_added(user_id, now, count)
+
+        run.last_patient_id = patients[-1][0]
+        run.patients_screened += len(patients)
+        run.reminders_created += len(rows)
+        db.session.commit()
+
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+    return run
+
+@app.cli.command('screen-patients')
+@click.option('--chunk-size', type=int, default=2000, help="Nombre de patientes traitées par lot")
+@click.option('--full', is_flag=True, help="Dépister tous les derniers résultats, pas seulement les nouveaux")
+def screen_patients_command(chunk_size, full):
+    """Screen all patients for HELLP, anemia and hypertension and create reminders."""
+    run = run_screening(chunk_size, full)
+    print(f"Dépistage terminé : {run.patients_screened} patientes, {run.reminders_created} rappels créés")
@@ -0,0 +1,239 @@
+import re
+import unicodedata
+from sqlalchemy import func, literal, null, or_, select, text, union_all
+from sqlalchemy.orm import aliased
+from app import app, db
+from models import Patient, BabyRecord
+
+SEARCH_TYPES = ('patient', 'baby')
+
+# Results of a typeahead request
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+
+# Words of a search taken into account
+MAX_TERMS = 5
+
+# Names displayed in the results
+_LABELS = {
+    'patient': "p.last_name || ' ' || p.first_name",
+    # Same label as the baby selectors: "Bébé de <mère>" when the first name is unknown
+    'baby': "CASE WHEN COALESCE(b.first_name, '') <> '' THEN TRIM(b.first_name || ' ' || COALESCE(b.last_name, '')) "
+            "ELSE 'Bébé de ' || m.last_name || ' ' || m.first_name END"
+}
+_NAMES = {
+    'patient': "p.last_name || ' ' || p.first_name",
+    # A baby is also found by its mother's name
+    'baby': "COALESCE(b.first_name, '') || ' ' || COALESCE(b.last_name, '') || ' ' || m.last_name || ' ' || m.first_name"
+}
+
+def _documents(kind, name, owner, where):
+    # SELECT of the search documents (rowid, name, owner, kind, record_id, label, mother_id);
+    # the rowid of a patient is 2 * id and the rowid of a baby 2 * id + 1
+    if kind == 'patient':
+        return (f"SELECT p.id * 2, {name(_NAMES['patient'])}, {owner('p.user_id')}, 'patient', p.id, {_LABELS['patient']}, NULL "
+                f"FROM patient p WHERE {where}")
+    return (f"SELECT b.id * 2 + 1, {name(_NAMES['baby'])}, {owner('m.user_id')}, 'baby', b.id, {_LABELS['baby']}, b.mother_id "
+            f"FROM baby_record b JOIN patient m ON m.id = b.mother_id WHERE {where}")
+
+def normalize_name(value):
+    """Accent-folded, lowercase form of a name, as the search index holds it."""
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(character for character in decomposed if not unicodedata.combining(character)).lower()
+
+def search_terms(query):
+    """Normalized words of a search; each one must start a word of the name."""
+    return re.findall(r'[^\W_]+', normalize_name(query or ''))[:MAX_TERMS]
+
+def _sqlite_statements():
+    # FTS5 folds the accents and the case itself (remove_diacritics); the owner
+    # and the kind are indexed as tokens so that MATCH filters them too
+    def name(expression):
+        return expression
+
+    def owner(column):
+        return f"'u' || {column}"
+
+    insert = "INSERT INTO name_search (rowid, name, owner, kind, record_id, label, mother_id) "
+    return [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS name_search USING fts5("
+        "name, owner, kind, record_id UNINDEXED, label UNINDEXED, mother_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3')",
+
+        "CREATE TRIGGER IF NOT EXISTS name_search_patient_insert AFTER INSERT ON patient BEGIN "
+        f"{insert}{_documents('patient', name, owner, 'p.id = new.id')}; END",
+
+        # The babies carry their mother's name
+        "CREATE TRIGGER IF NOT EXISTS name_search_patient_update AFTER UPDATE OF first_name, last_name, user_id ON patient BEGIN "
+        "DELETE FROM name_search WHERE rowid = new.id * 2 OR rowid IN (SELECT id * 2 + 1 FROM baby_record WHERE mother_id = new.id); "
+        f"{insert}{_documents('patient', name, owner, 'p.id = new.id')}; "
+        f"{insert}{_documents('baby', name, owner, 'b.mother_id = new.id')}; END",
+
+        "CREATE TRIGGER IF NOT EXISTS name_search_patient_delete AFTER DELETE ON patient BEGIN "
+        "DELETE FROM name_search WHERE rowid = old.id * 2; END",
+
+        "CREATE TRIGGER IF NOT EXISTS name_search_baby_insert AFTER INSERT ON baby_record BEGIN "
+        f"{insert}{_documents('baby', name, owner, 'b.id = new.id')}; END",
+
+        "CREATE TRIGGER IF NOT EXISTS name_search_baby_update AFTER UPDATE OF first_name, last_name, mother_id ON baby_record BEGIN "
+        "DELETE FROM name_search WHERE rowid = old.id * 2 + 1; "
+        f"{insert}{_documents('baby', name, owner, 'b.id = new.id')}; END",
+
+        "CREATE TRIGGER IF NOT EXISTS name_search_baby_delete AFTER DELETE ON baby_record BEGIN "
+        "DELETE FROM name_search WHERE rowid = old.id * 2 + 1; END",
+
+        # Rebuild, for the records written before the triggers
+        "DELETE FROM name_search",
+        f"{insert}{_documents('patient', name, owner, '1 = 1')}",
+        f"{insert}{_documents('baby', name, owner, '1 = 1')}"
+    ]
+
+def _postgresql_statements():
+    # The names are stored folded by search_name(), with one space between words
+    # like the FTS5 tokens; a trigram index serves the word prefix LIKE patterns
+    def name(expression):
+        return f"search_name({expression})"
+
+    def owner(column):
+        return column
+
+    insert = "INSERT INTO name_search (id, name, owner, kind, record_id, label, mother_id) "
+    return [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE EXTENSION IF NOT EXISTS unaccent",
+        "CREATE OR REPLACE FUNCTION search_name(text) RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+        "AS $$ SELECT regexp_replace(lower(public.unaccent('public.unaccent'::regdictionary, $1)), '[^[:alnum:]]+', ' ', 'g') $$",
+
+        "CREATE TABLE IF NOT EXISTS name_search ("
+        "id bigint PRIMARY KEY, name text NOT NULL, owner integer NOT NULL, kind varchar(10) NOT NULL, "
+        "record_id integer NOT NULL, label text NOT NULL, mother_id integer)",
+        "CREATE INDEX IF NOT EXISTS ix_name_search_name ON name_search USING gin (name gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_name_search_owner_kind ON name_search (owner, kind)",
+
+        # The babies carry their mother's name
+        "CREATE OR REPLACE FUNCTION name_search_refresh() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+        "IF TG_TABLE_NAME = 'patient' THEN "
+        "DELETE FROM name_search WHERE id = 2 * OLD.id OR (kind = 'baby' AND mother_id = OLD.id); "
+        "ELSE DELETE FROM name_search WHERE id = 2 * OLD.id + 1; END IF; "
+        "IF TG_OP = 'DELETE' THEN RETURN NULL; END IF; "
+        "IF TG_TABLE_NAME = 'patient' THEN "
+        f"{insert}{_documents('patient', name, owner, 'p.id = NEW.id')}; "
+        f"{insert}{_documents('baby', name, owner, 'b.mother_id = NEW.id')}; "
+        f"ELSE {insert}{_documents('baby', name, owner, 'b.id = NEW.id')}; END IF; "
+        "RETURN NULL; END $$",
+
+        "DROP TRIGGER IF EXISTS name_search_refresh ON patient",
+        "CREATE TRIGGER name_search_refresh AFTER INSERT OR DELETE OR UPDATE OF first_name, last_name, user_id ON patient "
+        "FOR EACH ROW EXECUTE FUNCTION name_search_refresh()",
+        "DROP TRIGGER IF EXISTS name_search_refresh ON baby_record",
+        "CREATE TRIGGER name_search_refresh AFTER INSERT OR DELETE OR UPDATE OF first_name, last_name, mother_id ON baby_record "
+        "FOR EACH ROW EXECUTE FUNCTION name_search_refresh()",
+
+        "DELETE FROM name_search",
+        f"{insert}{_documents('patient', name, owner, 'true')}",
+        f"{insert}{_documents('baby', name, owner, 'true')}"
+    ]
+
+def create_search_index():
+    """
+    Create the name search index and its triggers, and fill it from the existing records.
+
+    The index holds one document per patient and per baby, with the baby's
+    mother's name. Triggers on the patient and baby_record tables keep it up
+    to date on every insert, update and delete, including the bulk inserts
+    that do not go through the ORM. Other databases have no index and are
+    searched with LIKE.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        statements = _sqlite_statements()
+    elif dialect == 'postgresql':
+        statements = _postgresql_statements()
+    else:
+        return
+
+    with db.engine.begin() as connection:
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+
+def search_names(user_id, query, search_type=None, limit=SEARCH_DEFAULT_LIMIT):
+    """
+    Find a midwife's patients and babies whose names start with the words of a query.
+
+    Mothers and babies are searched together with one indexed query; a baby
+    is also found by its mother's name. Accents and case are ignored.
+
+    Args:
+        user_id (int): ID of the midwife
+        query (str): Text typed by the user, every word is a name prefix
+        search_type (str, optional): 'patient' or 'baby', both when None
+        limit (int): Maximum number of results
+
+    Returns:
+        list: {'type', 'id', 'label', 'mother_id'} dicts, best matches first
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        rows = _search_sqlite(user_id, terms, search_type, limit)
+    elif dialect == 'postgresql':
+        rows = _search_postgresql(user_id, terms, search_type, limit)
+    else:
+        rows = _search_like(user_id, terms, search_type, limit)
+
+    return [{'type': kind, 'id': record_id, 'label': label, 'mother_id': mother_id} for kind, record_id, label, mother_id in rows]
+
+def _search_sqlite(user_id, terms, search_type, limit):
+    # Terms only hold letters and digits, they can be quoted as they are
+    prefixes = ' '.join('"' + term + '"*' for term in terms)
+    match = f"owner:u{int(user_id)} AND name:({prefixes})"
+    if search_type:
+        match += f" AND kind:{search_type}"
+
+    return db.session.execute(text(
+        "SELECT kind, record_id, label, mother_id FROM name_search "
+        "WHERE name_search MATCH :match ORDER BY rank LIMIT :limit"
+    ), {'match': match, 'limit': limit}).all()
+
+def _search_postgresql(user_id, terms, search_type, limit):
+    # Each term starts a word, as the FTS5 prefix queries; terms hold no LIKE wildcard
+    conditions = ' AND '.join(f"(name LIKE :term{index} || '%' OR name LIKE '% ' || :term{index} || '%')"
+                              for index in range(len(terms)))
+    parameters = {f'term{index}': term for index, term in enumerate(terms)}
+    if search_type:
+        conditions += " AND kind = :kind"
+        parameters['kind'] = search_type
+
+    return db.session.execute(text(
+        f"SELECT kind, record_id, label, mother_id FROM name_search WHERE owner = :owner AND {conditions} "
+        "ORDER BY similarity(name, :query) DESC, label LIMIT :limit"
+    ), dict(parameters, owner=user_id, query=' '.join(terms), limit=limit)).all()
+
+def _search_like(user_id, terms, search_type, limit):
+    # Without an index: case-insensitive LIKE on the names, accents included
+    mother = aliased(Patient)
+    selects = []
+    if search_type in (None, 'patient'):
+        selects.append(select(
+            literal('patient').label('kind'), Patient.id, (Patient.last_name + ' ' + Patient.first_name).label('label'), null().label('mother_id')
+        ).where(Patient.user_id == user_id, *[
+            or_(Patient.first_name.ilike(f'{term}%'), Patient.last_name.ilike(f'{term}%')) for term in terms
+        ]))
+    if search_type in (None, 'baby'):
+        selects.append(select(
+            literal('baby').label('kind'), BabyRecord.id, func.coalesce(BabyRecord.first_name, 'Bébé de ' + mother.last_name).label('label'), BabyRecord.mother_id
+        ).join(mother, mother.id == BabyRecord.mother_id).where(mother.user_id == user_id, *[
+            or_(BabyRecord.first_name.ilike(f'{term}%'), BabyRecord.last_name.ilike(f'{term}%'),
+                mother.first_name.ilike(f'{term}%'), mother.last_name.ilike(f'{term}%')) for term in terms
+        ]))
+
+    return db.session.execute(union_all(*selects).order_by('label').limit(limit)).all()
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Recreate the name search index from the patients and babies."""
+    create_search_index()
+    print("Index de recherche reconstruit.")
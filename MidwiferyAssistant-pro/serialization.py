@@ -0,0 +1,216 @@
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import case, func, literal, null
+from models import Patient, BabyRecord, DeliveryRecord, PostnatalCheckup, VaccinationRecord, BreastfeedingRecord, PostnatalCareReminder
+from queries import BabyMother
+
+# orjson is optional: about ten times faster than json on large lists of rows
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class InvalidFields(ValueError):
+    """Raised when ?fields= names a field the schema does not declare."""
+
+    def __init__(self, unknown, allowed):
+        super().__init__(unknown)
+        self.unknown = unknown
+        self.allowed = allowed
+
+def _default(value):
+    # Dates in ISO 8601 like the rest of the API (Flask would write HTTP dates)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider of the app: orjson when it is installed, json otherwise.
+
+    Both encoders write dates and datetimes in ISO 8601, so rows can be
+    serialized as they come from the database without formatting each value.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs.get('indent'):
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=_default, option=option).decode()
+
+        kwargs.setdefault('default', _default)
+        return super().dumps(obj, **kwargs)
+
+def _day(value):
+    # Date part of a datetime, for the fields historically sent as YYYY-MM-DD
+    return value.date() if value is not None else None
+
+class Schema:
+    """
+    Declared output fields of an API record, read straight from SQL row tuples.
+
+    Each field is an SQL expression, so computed fields (names) are built by
+    the database and a row becomes a dict with a single zip. Only the fields
+    requested with ?fields= are selected.
+
+    Args:
+        fields (dict): Output name -> column or SQL expression, in output order
+        formatters (dict, optional): Output name -> function applied to the value in Python
+    """
+
+    def __init__(self, fields, formatters=None):
+        self.fields = fields
+        self.formatters = formatters or {}
+
+    def parse_fields(self, value):
+        """
+        Read a comma-separated ?fields= value.
+
+        Args:
+            value (str): Requested field names, all the fields when empty
+
+        Returns:
+            list: Field names in the requested order
+
+        Raises:
+            InvalidFields: If a name is not declared by the schema
+        """
+        if not value:
+            return list(self.fields)
+
+        names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise InvalidFields(unknown, list(self.fields))
+        return names
+
+    def columns(self, names, extra=()):
+        """
+        Labelled SQL expressions of the fields, followed by the extra columns not already selected.
+
+        Extra columns (pagination sort keys) are labelled with their key so
+        that rows expose them as attributes; dump() ignores them.
+        """
+        columns = [self.fields[name].label(name) for name in names]
+        columns += [column.label(column.key) for column in extra if column.key not in names]
+        return columns
+
+    def dump(self, rows, names):
+        """
+        Convert rows selected with columns(names) to dicts.
+
+        Args:
+            rows (list): Result rows
+            names (list): Field names the rows were selected with
+
+        Returns:
+            list: One dict per row
+        """
+        formatters = [(index, self.formatters[name]) for index, name in enumerate(names) if name in self.formatters]
+        if not formatters:
+            return [dict(zip(names, row)) for row in rows]
+
+        records = []
+        for row in rows:
+            values = list(row[:len(names)])
+            for index, formatter in formatters:
+                values[index] = formatter(values[index])
+            records.append(dict(zip(names, values)))
+        return records
+
+def _full_name(model):
+    return model.last_name + ' ' + model.first_name
+
+def _baby_name(mother):
+    # First name of the baby, "Bébé de <mère>" when it was not given
+    return func.coalesce(func.nullif(BabyRecord.first_name, ''), literal('Bébé de ') + mother)
+
+PATIENT_SCHEMA = Schema({
+    'id': Patient.id,
+    'first_name': Patient.first_name,
+    'last_name': Patient.last_name,
+    'date_of_birth': Patient.date_of_birth,
+    'last_period_date': Patient.last_period_date
+})
+
+# Joined with the mother (Patient)
+BABY_SCHEMA = Schema({
+    'id': BabyRecord.id,
+    'first_name': BabyRecord.first_name,
+    'last_name': BabyRecord.last_name,
+    'birth_date': BabyRecord.birth_date,
+    'mother_id': BabyRecord.mother_id,
+    'mother_name': _full_name(Patient)
+}, formatters={'birth_date': _day})
+
+# Joined with the patient
+DELIVERY_SCHEMA = Schema({
+    'id': DeliveryRecord.id,
+    'delivery_date': DeliveryRecord.delivery_date,
+    'delivery_type': DeliveryRecord.delivery_type,
+    'delivery_location': DeliveryRecord.delivery_location,
+    'complications': DeliveryRecord.complications,
+    'patient_id': DeliveryRecord.patient_id,
+    'patient_name': _full_name(Patient)
+})
+
+MOTHER_CHECKUP_SCHEMA = Schema({
+    'id': PostnatalCheckup.id,
+    'checkup_date': PostnatalCheckup.checkup_date,
+    'temperature': PostnatalCheckup.temperature,
+    'heart_rate': PostnatalCheckup.heart_rate,
+    'blood_pressure_systolic': PostnatalCheckup.blood_pressure_systolic,
+    'blood_pressure_diastolic': PostnatalCheckup.blood_pressure_diastolic,
+    'weight': PostnatalCheckup.weight,
+    'symptoms': PostnatalCheckup.symptoms,
+    'recommendations': PostnatalCheckup.recommendations,
+    'next_checkup_date': PostnatalCheckup.next_checkup_date
+})
+
+BABY_CHECKUP_SCHEMA = Schema({
+    'id': PostnatalCheckup.id,
+    'checkup_date': PostnatalCheckup.checkup_date,
+    'temperature': PostnatalCheckup.temperature,
+    'heart_rate': PostnatalCheckup.heart_rate,
+    'respiratory_rate': PostnatalCheckup.respiratory_rate,
+    'weight': PostnatalCheckup.weight,
+    'length': null(),  # Cette donnée serait ajoutée dans une mise à jour future
+    'symptoms': PostnatalCheckup.symptoms,
+    'recommendations': PostnatalCheckup.recommendations
+})
+
+BREASTFEEDING_SCHEMA = Schema({
+    'id': BreastfeedingRecord.id,
+    'feeding_date': BreastfeedingRecord.feeding_date,
+    'feeding_type': BreastfeedingRecord.feeding_type,
+    'duration': BreastfeedingRecord.duration,
+    'issues': BreastfeedingRecord.issues,
+    'notes': BreastfeedingRecord.notes
+})
+
+VACCINATION_SCHEMA = Schema({
+    'id': VaccinationRecord.id,
+    'vaccine_name': VaccinationRecord.vaccine_name,
+    'date_administered': VaccinationRecord.date_administered,
+    'dose': VaccinationRecord.dose,
+    'route': VaccinationRecord.route,
+    'site': VaccinationRecord.site,
+    'lot_number': VaccinationRecord.lot_number,
+    'expiration_date': VaccinationRecord.expiration_date,
+    'reaction': VaccinationRecord.reaction,
+    'notes': VaccinationRecord.notes
+})
+
+# Outer joined with the patient, the baby and the baby's mother (BabyMother), see get_reminder_feed
+REMINDER_SCHEMA = Schema({
+    'id': PostnatalCareReminder.id,
+    'title': PostnatalCareReminder.title,
+    'description': PostnatalCareReminder.description,
+    'reminder_date': PostnatalCareReminder.reminder_date,
+    'reminder_type': PostnatalCareReminder.reminder_type,
+    'priority': PostnatalCareReminder.priority,
+    'completed': PostnatalCareReminder.completed,
+    'patient_name': _full_name(Patient),
+    'baby_name': case((BabyMother.id.is_(None), null()), else_=_baby_name(BabyMother.last_name))
+})
@@ -0,0 +1,76 @@
+import logging
+import threading
+from sqlalchemy import event
+
+# Statements that need the SQLite write lock
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+class WriterLock:
+    """
+    Process-wide queue of the SQLite writers.
+
+    A connection takes the lock just before the first write statement of its
+    transaction and gives it back when it returns to the pool, after the
+    commit or rollback. Writers of the same process wait their turn here
+    instead of failing with "database is locked"; readers never take the lock
+    and, in WAL mode, are never blocked by the writer. Writers of other
+    processes are serialized by SQLite itself through busy_timeout.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get('holds_writer_lock') or not statement.lstrip().upper().startswith(WRITE_STATEMENTS):
+            return
+
+        # Never wait forever: past the timeout the write goes ahead and SQLite arbitrates
+        if self._lock.acquire(timeout=self.timeout):
+            conn.info['holds_writer_lock'] = True
+        else:
+            logging.warning("File d'écriture SQLite saturée, écriture sans attendre son tour")
+
+    def checkin(self, dbapi_connection, connection_record):
+        if connection_record.info.pop('holds_writer_lock', False):
+            self._lock.release()
+
+def _set_pragmas(settings):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in settings:
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+    return set_pragmas
+
+def enable_sqlite_mode(engine, busy_timeout, mmap_size, cache_size, serialized_writes=True):
+    """
+    Tune an SQLite engine for several concurrent workers.
+
+    Every new connection switches the database to WAL with synchronous=NORMAL
+    (durable at checkpoints, never corrupted), waits up to busy_timeout for
+    the write lock held by another process and uses a memory-mapped file and
+    a larger page cache. With serialized_writes, the writers of this process
+    go through a WriterLock.
+
+    Args:
+        engine: SQLAlchemy engine of an SQLite database
+        busy_timeout (int): Wait for a lock held by another connection, in milliseconds
+        mmap_size (int): Bytes of the database file mapped in memory
+        cache_size (int): Page cache per connection, in KiB
+        serialized_writes (bool): Queue the writers of this process
+    """
+    settings = [
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('busy_timeout', int(busy_timeout)),
+        ('mmap_size', int(mmap_size)),
+        # A negative cache_size is a size in KiB rather than in pages
+        ('cache_size', -abs(int(cache_size)))
+    ]
+    event.listen(engine, 'connect', _set_pragmas(settings))
+
+    if serialized_writes:
+        writer_lock = WriterLock(timeout=busy_timeout / 1000)
+        event.listen(engine, 'before_cursor_execute', writer_lock.before_cursor_execute)
+        event.listen(engine.pool, 'checkin', writer_lock.checkin)
@@ -16,9 +16,6 @@ document.addEventListener('DOMContentLoaded', function() {
             filterProtocols(this.value);
         });
     }
-    
-    // Initialize protocol tabs
-    initProtocolTabs();
 });
 
 /**
@@ -28,104 +25,31 @@ function loadEmergencyProtocols() {
     const protocolsContainer = document.getElementById('protocols-container');
     if (!protocolsContainer) return;
     
-    // In a production app, we would fetch this from the server
-    // Here we're using the data from the utils.py file
-    const emergencyProtocols = {
-        'hemorrhage': {
-            'title': 'Hémorragie du Post-Partum',
-            'definition': 'Saignement > 500ml après accouchement',
-            'signs': [
-                'Saignement abondant',
-                'Hypotension',
-                'Tachycardie',
-                'Pâleur'
-            ],
-            'actions': [
-                '1. Massage utérin bimanuel',
-                '2. Voie veineuse 14-16G',
-                '3. Ocytocine 5-10 UI IVL puis 20-40 UI/500ml',
-                '4. Remplissage vasculaire',
-                '5. Sondage vésical',
-                '6. Appel équipe obstétricale + anesthésiste'
-            ],
-            'severity_levels': [
-                {'volume': '< 1000ml', 'action': 'Surveillance, ocytocine'},
-                {'volume': '1000-1500ml', 'action': 'Sulprostone, examiner sous valves'},
-                {'volume': '> 1500ml', 'action': 'Transfusion, chirurgie'}
-            ]
-        },
-        'preeclampsia': {
-            'title': 'Pré-éclampsie Sévère',
-            'definition': 'HTA > 160/110 + protéinurie',
-            'signs': [
-                'Céphalées intenses',
-                'Troubles visuels',
-                'Douleur épigastrique',
-                'Hyperréflexie',
-                'Oligurie'
-            ],
-            'actions': [
-                '1. Position latérale gauche',
-                '2. Voie veineuse',
-                '3. Nicardipine (Loxen) IVSE',
-                '4. Sulfate de magnésium (prévention éclampsie)',
-                '5. Bilan biologique complet',
-                '6. Évaluation fœtale',
-                '7. Transfert en maternité niveau 3'
-            ],
-            'severity_levels': [
-                {'symptoms': 'HTA + protéinurie', 'action': 'Hospitalisation, surveillance'},
-                {'symptoms': '+ Signes fonctionnels', 'action': 'Traitement anti-HTA, sulfate Mg'},
-                {'symptoms': '+ Éclampsie/HELLP', 'action': 'Extraction fœtale urgente'}
-            ]
-        },
-        'shoulder_dystocia': {
-            'title': 'Dystocie des Épaules',
-            'definition': 'Rétention des épaules après sortie de la tête',
-            'signs': [
-                'Rétraction de la tête contre le périnée (signe de la tortue)',
-                'Échec de la rotation externe',
-                'Traction inefficace sur la tête'
-            ],
-            'actions': [
-                '1. Appel à l\'aide',
-                '2. Manœuvre de McRoberts (hyperfléxion des cuisses)',
-                '3. Pression sus-pubienne',
-                '4. Manœuvre de Wood',
-                '5. Manœuvre de Jacquemier (extraction de l\'épaule postérieure)',
-                '6. Épisiotomie large si nécessaire'
-            ],
-            'severity_levels': [
-                {'time': '< 5 min', 'action': 'McRoberts + pression sus-pubienne'},
-                {'time': '> 5 min', 'action': 'Manœuvres obstétricales internes'},
-                {'time': '> 10 min', 'action': 'Risque hypoxie/fracture, manœuvres de dernier recours'}
-            ]
-        },
-        'cord_prolapse': {
-            'title': 'Procidence du Cordon',
-            'definition': 'Passage du cordon en avant de la présentation',
-            'signs': [
-                'Visualisation ou palpation du cordon',
-                'Anomalies du RCF (bradycardie brutale)',
-                'Rupture des membranes récente'
-            ],
-            'actions': [
-                '1. Position genupectorale ou Trendelenburg',
-                '2. Repousse manuelle de la présentation',
-                '3. Remplissage vésical (300-500ml)',
-                '4. Tocolvse d\'urgence (β-mimétiques)',
-                '5. Extraction immédiate (césarienne ou voie basse si dilatation complète)'
-            ],
-            'severity_levels': [
-                {'rcf': 'Normal', 'action': 'Césarienne urgente, repousse manuelle'},
-                {'rcf': 'Bradycardie < 100', 'action': 'Césarienne extrême urgence'},
-                {'rcf': 'Absence d\'activité', 'action': 'Extraction immédiate quel que soit le moyen'}
-            ]
-        }
-    };
+    // Same protocols as the server, from the versioned reference data URL
+    const url = protocolsContainer.dataset.protocolsUrl || '/api/reference/emergency';
     
-    // Generate HTML for protocols
-    displayProtocols(emergencyProtocols);
+    fetch(url)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Erreur lors du chargement des protocoles.');
+            }
+            return response.json();
+        })
+        .then(emergencyProtocols => {
+            // Generate HTML for protocols
+            displayProtocols(emergencyProtocols);
+            
+            // Initialize protocol tabs once they exist
+            initProtocolTabs();
+        })
+        .catch(error => {
+            console.error(error);
+            protocolsContainer.innerHTML = `
+                <div class="alert alert-warning">
+                    <i class="fas fa-exclamation-triangle"></i> Impossible de charger les protocoles d'urgence.
+                </div>
+            `;
+        });
 }
 
 /**
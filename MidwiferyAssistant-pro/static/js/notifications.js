@@ -0,0 +1,61 @@
+/**
+ * Notifications en temps réel
+ *
+ * Ce script ouvre un flux d'événements (Server-Sent Events) par onglet pour
+ * recevoir les alertes critiques et les changements de rappels sans
+ * interroger le serveur. Le navigateur se reconnecte seul et reprend le flux
+ * après le dernier événement reçu (Last-Event-ID).
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    if (!window.EventSource) return;
+
+    const source = new EventSource('/api/events');
+
+    // Alertes critiques (tension artérielle), affichées sur toutes les pages
+    source.addEventListener('alert', function(e) {
+        showLiveAlert(JSON.parse(e.data).message);
+    });
+
+    // Rappels créés ou complétés : les pages concernées rechargent leur liste
+    source.addEventListener('reminders', function(e) {
+        document.dispatchEvent(new CustomEvent('reminders:changed', {detail: JSON.parse(e.data)}));
+    });
+
+    // Des événements ont été perdus (redémarrage du serveur) : tout recharger
+    source.addEventListener('resync', function() {
+        document.dispatchEvent(new CustomEvent('reminders:changed', {detail: {action: 'resync'}}));
+    });
+});
+
+/**
+ * Affiche une alerte en haut de la page jusqu'à sa fermeture
+ */
+function showLiveAlert(message) {
+    let container = document.getElementById('live-alerts');
+    if (!container) {
+        container = document.createElement('div');
+        container.id = 'live-alerts';
+        container.className = 'fixed-top container mt-2';
+        document.body.appendChild(container);
+    }
+
+    const alert = document.createElement('div');
+    alert.className = 'alert alert-danger alert-dismissible fade show shadow';
+    alert.setAttribute('role', 'alert');
+
+    // Le message contient le nom de la patiente : inséré comme texte
+    const text = document.createElement('span');
+    text.textContent = message;
+    alert.appendChild(text);
+
+    const close = document.createElement('button');
+    close.type = 'button';
+    close.className = 'close';
+    close.setAttribute('data-dismiss', 'alert');
+    close.setAttribute('aria-label', 'Fermer');
+    close.innerHTML = '<span aria-hidden="true">&times;</span>';
+    alert.appendChild(close);
+
+    container.appendChild(alert);
+}
@@ -28,6 +28,14 @@ document.addEventListener('DOMContentLoaded', function() {
     // Gestionnaires d'événements pour les formulaires et autres interactions
     initEventListeners();
     setupFormHandlers();
+    setupNameSearch();
+    
+    // Rappels créés ou complétés ailleurs (planificateur, autre onglet) : recharger la liste
+    let remindersReload = null;
+    document.addEventListener('reminders:changed', function() {
+        clearTimeout(remindersReload);
+        remindersReload = setTimeout(filterReminders, 500);
+    });
 });
 
 // Fonction pour mettre à jour le contenu selon l'onglet
@@ -50,116 +58,198 @@ function updateContent(tabId) {
             break;
         case 'reminders':
             loadReminders();
+            filterReminders();
             break;
     }
 }
 
-// Charger la liste des patientes
+// Sélecteurs de patientes et de bébés, avec une recherche au-dessus de chacun
+const PATIENT_SELECTS = ['delivery-patient', 'mother-checkup-patient', 'reminder-patient', 'mother-select'];
+const BABY_SELECTS = ['baby-select', 'baby-checkup-baby', 'breastfeeding-baby', 'vaccination-baby', 'reminder-baby',
+                      'breastfeeding-baby-select', 'vaccination-baby-select'];
+
+// Charger la première page des patientes, les autres sont trouvées par la recherche
 function loadPatients() {
-    fetch('/api/patients')
-        .then(response => response.json())
-        .then(data => {
-            updatePatientSelects(data.patients);
-        })
+    fetchListPage('/api/patients', {}, null)
+        .then(data => updatePatientSelects(data.patients.map(patient => ({
+            id: patient.id,
+            label: `${patient.last_name} ${patient.first_name}`
+        }))))
         .catch(error => console.error('Erreur:', error));
 }
 
-// Charger la liste des bébés
-function loadBabies() {
-    fetch('/api/postnatal/babies')
-        .then(response => response.json())
-        .then(data => {
-            updateBabySelects(data.babies);
-        })
-        .catch(error => console.error('Erreur:', error));
+// Mettre à jour tous les selects de patientes
+function updatePatientSelects(patients) {
+    PATIENT_SELECTS.forEach(selectId => {
+        replaceSelectOptions(document.getElementById(selectId), patients);
+    });
 }
 
-// Charger les accouchements
-function loadDeliveries() {
-    fetch('/api/postnatal/deliveries')
-        .then(response => response.json())
-        .then(data => {
-            updateDeliveriesTable(data.deliveries);
-        })
-        .catch(error => console.error('Erreur:', error));
+/**
+ * Remplace les options d'un sélecteur (sauf la première) par une liste {id, label}
+ * en gardant la valeur sélectionnée si elle fait partie de la liste
+ */
+function replaceSelectOptions(select, items) {
+    if (!select) return;
+    
+    const selected = select.value;
+    while (select.options.length > 1) {
+        select.remove(1);
+    }
+    items.forEach(item => {
+        select.add(new Option(item.label, item.id));
+    });
+    if (items.some(item => String(item.id) === selected)) {
+        select.value = selected;
+    }
 }
 
-// Mettre à jour tous les selects de patientes
-function updatePatientSelects(patients) {
-    const selects = [
-        'delivery-patient',
-        'mother-checkup-patient',
-        'reminder-patient'
-    ];
+/**
+ * Ajoute une option à un sélecteur si elle n'y est pas (bébé ouvert depuis un autre onglet)
+ */
+function ensureSelectOption(select, id, label) {
+    if (select && !Array.from(select.options).some(option => option.value === String(id))) {
+        select.add(new Option(label, id));
+    }
+}
 
-    selects.forEach(selectId => {
+/**
+ * Recherche instantanée dans les sélecteurs de patientes et de bébés
+ *
+ * Les sélecteurs ne contiennent que la première page de la liste ; le champ
+ * placé au-dessus de chacun les remplit avec les meilleurs résultats de
+ * /api/search (début des noms, accents ignorés, un bébé est aussi trouvé par
+ * le nom de sa mère). Le premier résultat est sélectionné.
+ */
+function setupNameSearch() {
+    const selects = PATIENT_SELECTS.map(id => [id, 'patient']).concat(BABY_SELECTS.map(id => [id, 'baby']));
+    
+    selects.forEach(([selectId, type]) => {
         const select = document.getElementById(selectId);
-        if (select) {
-            select.innerHTML = '<option value="">Sélectionnez une patiente...</option>';
-            patients.forEach(patient => {
-                select.innerHTML += `<option value="${patient.id}">${patient.last_name} ${patient.first_name}</option>`;
-            });
-        }
+        if (!select) return;
+        
+        const input = document.createElement('input');
+        input.type = 'search';
+        input.className = 'form-control form-control-sm mb-1';
+        input.placeholder = type === 'patient' ? 'Rechercher une patiente...' : 'Rechercher un bébé ou sa mère...';
+        input.setAttribute('aria-label', input.placeholder);
+        select.parentNode.insertBefore(input, select);
+        
+        let timeout = null;
+        let request = 0;
+        input.addEventListener('input', function() {
+            clearTimeout(timeout);
+            timeout = setTimeout(() => {
+                const query = input.value.trim();
+                if (!query) {
+                    return type === 'patient' ? loadPatients() : loadBabies();
+                }
+                
+                // Seule la réponse à la dernière saisie est affichée
+                const current = ++request;
+                fetch(`/api/search?${new URLSearchParams({q: query, type: type, limit: 20})}`)
+                    .then(response => {
+                        if (!response.ok) {
+                            throw new Error('Erreur lors de la recherche');
+                        }
+                        return response.json();
+                    })
+                    .then(data => {
+                        if (current !== request) return;
+                        
+                        const previous = select.value;
+                        replaceSelectOptions(select, data.results);
+                        if (data.results.length && !data.results.some(result => String(result.id) === previous)) {
+                            select.value = data.results[0].id;
+                        }
+                        if (select.value !== previous) {
+                            select.dispatchEvent(new Event('change'));
+                        }
+                    })
+                    .catch(error => console.error('Erreur:', error));
+            }, 200);
+        });
     });
 }
 
-// Mettre à jour tous les selects de bébés
-function updateBabySelects(babies) {
-    const selects = [
-        'baby-checkup-baby',
-        'breastfeeding-baby',
-        'vaccination-baby',
-        'reminder-baby'
-    ];
+/**
+ * Pagination par curseur des listes (patientes, bébés, accouchements, rappels)
+ *
+ * Les API de liste renvoient une page et un `next_cursor` à renvoyer pour
+ * obtenir la page suivante (null sur la dernière page).
+ */
+const LIST_PAGE_SIZE = 50;
+const activePagers = {};
 
-    selects.forEach(selectId => {
-        const select = document.getElementById(selectId);
-        if (select) {
-            select.innerHTML = '<option value="">Sélectionnez un bébé...</option>';
-            babies.forEach(baby => {
-                select.innerHTML += `<option value="${baby.id}">${baby.first_name || 'Bébé de ' + baby.mother_name}</option>`;
-            });
-        }
-    });
+function fetchListPage(url, params, cursor) {
+    const queryParams = new URLSearchParams(params);
+    queryParams.set('limit', LIST_PAGE_SIZE);
+    if (cursor) queryParams.set('cursor', cursor);
+
+    return fetch(`${url}?${queryParams.toString()}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Erreur lors du chargement de la liste');
+            }
+            return response.json();
+        });
 }
 
+/**
+ * Charge une liste dans un tableau page par page, à mesure que l'utilisateur
+ * fait défiler le tableau jusqu'à sa dernière ligne
+ *
+ * @param {string} name - Nom de la liste (un nouvel appel remplace le précédent)
+ * @param {HTMLElement} tbody - Corps du tableau
+ * @param {string} url - URL de l'API de liste
+ * @param {Object} params - Filtres envoyés à l'API
+ * @param {Function} onPage - Affiche une page: onPage(data, append)
+ * @returns {Promise} Résolue après le chargement de la première page
+ */
+function loadScrollPages(name, tbody, url, params, onPage) {
+    if (activePagers[name]) {
+        activePagers[name].observer.disconnect();
+    }
 
-//Fonction pour mettre à jour le tableau des accouchements
-function updateDeliveriesTable(deliveries){
-    const deliveriesTable = document.getElementById('deliveries-table');
-    if (!deliveriesTable) return;
-    const tbody = deliveriesTable.querySelector('tbody');
-    if (!tbody) return;
-    tbody.innerHTML = '';
-    if (!deliveries || deliveries.length === 0) {
-        tbody.innerHTML = '<tr><td colspan="6" class="text-center">Aucun accouchement enregistré</td></tr>';
-        return;
+    const pager = { cursor: null, loading: false };
+    activePagers[name] = pager;
+
+    const sentinel = document.createElement('tr');
+    sentinel.className = 'list-sentinel';
+
+    function loadNext(append) {
+        pager.loading = true;
+        return fetchListPage(url, params, pager.cursor)
+            .then(data => {
+                // Ignorer les pages d'une liste remplacée entre-temps (filtres modifiés)
+                if (activePagers[name] !== pager) return;
+
+                onPage(data, append);
+                pager.cursor = data.next_cursor;
+                pager.loading = false;
+
+                if (pager.cursor) {
+                    tbody.appendChild(sentinel);
+                } else {
+                    pager.observer.disconnect();
+                    sentinel.remove();
+                }
+            })
+            .catch(error => {
+                pager.loading = false;
+                throw error;
+            });
     }
-    deliveries.forEach(delivery => {
-        const deliveryDate = new Date(delivery.delivery_date).toLocaleDateString('fr-FR');
-        const row = document.createElement('tr');
-        row.innerHTML = `
-            <td>${deliveryDate}</td>
-            <td>${delivery.patient_name}</td>
-            <td>${translateDeliveryType(delivery.delivery_type)}</td>
-            <td>${delivery.delivery_location}</td>
-            <td>${delivery.complications || '-'}</td>
-            <td>
-                <button class="btn btn-sm btn-outline-primary view-delivery-details" data-delivery-id="${delivery.id}">
-                    <i class="fas fa-eye"></i>
-                </button>
-            </td>
-        `;
-        tbody.appendChild(row);
-    });
-    document.querySelectorAll('.view-delivery-details').forEach(button => {
-        button.addEventListener('click', function() {
-            const deliveryId = this.getAttribute('data-delivery-id');
-            viewDeliveryDetails(deliveryId);
-        });
+
+    pager.observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting) && !pager.loading && pager.cursor) {
+            loadNext(true).catch(error => console.error('Erreur:', error));
+        }
     });
-}
+    pager.observer.observe(sentinel);
 
+    return loadNext(false);
+}
 
 // Configuration des gestionnaires de formulaires
 function setupFormHandlers() {
@@ -260,55 +350,6 @@ function setupFormHandlers() {
             }
         });
     }
-    // Sélecteur de mère pour les suivis post-partum
-    const motherSelect = document.getElementById('mother-select');
-    if (motherSelect) {
-        motherSelect.addEventListener('change', function() {
-            if (this.value) {
-                loadMotherCheckups(this.value);
-            } else {
-                document.getElementById('mother-checkup-history').innerHTML = 
-                    '<div class="alert alert-info">Veuillez sélectionner une patiente pour voir son historique de suivi.</div>';
-                document.getElementById('mother-recovery-progress').innerHTML = 
-                    '<p class="text-muted">Sélectionnez une patiente pour voir son progrès de récupération.</p>';
-            }
-        });
-    }
-    // Sélecteur de bébé pour les suivis
-    const babySelect = document.getElementById('baby-select');
-    if (babySelect) {
-        babySelect.addEventListener('change', function() {
-            if (this.value) {
-                loadBabyInfo(this.value);
-            } else {
-                document.getElementById('baby-info').innerHTML = 
-                    '<div class="alert alert-info">Veuillez sélectionner un bébé pour voir ses informations.</div>';
-            }
-        });
-    }
-    // Autres sélecteurs similaires pour l'allaitement et les vaccinations
-    const breastfeedingBabySelect = document.getElementById('breastfeeding-baby-select');
-    if (breastfeedingBabySelect) {
-        breastfeedingBabySelect.addEventListener('change', function() {
-            if (this.value) {
-                loadBreastfeedingRecords(this.value);
-            } else {
-                document.getElementById('breastfeeding-history').innerHTML = 
-                    '<div class="alert alert-info">Veuillez sélectionner un bébé pour voir son historique d\'allaitement.</div>';
-            }
-        });
-    }
-    const vaccinationBabySelect = document.getElementById('vaccination-baby-select');
-    if (vaccinationBabySelect) {
-        vaccinationBabySelect.addEventListener('change', function() {
-            if (this.value) {
-                loadVaccinationRecords(this.value);
-            } else {
-                document.getElementById('vaccination-history').innerHTML = 
-                    '<div class="alert alert-info">Veuillez sélectionner un bébé pour voir son historique de vaccination.</div>';
-            }
-        });
-    }
 }
 
 //Fonction pour rafraichir la section mère
@@ -323,7 +364,7 @@ function refreshMotherSection(){
 function refreshBabySection(){
     const babySelect = document.getElementById('baby-select');
     if (babySelect && babySelect.value) {
-        loadBabyInfo(babySelect.value);
+        loadBabyTimeline(babySelect.value);
     }
 }
 
@@ -331,7 +372,7 @@ function refreshBabySection(){
 function refreshBreastfeedingSection(){
     const breastfeedingBabySelect = document.getElementById('breastfeeding-baby-select');
     if (breastfeedingBabySelect && breastfeedingBabySelect.value) {
-        loadBreastfeedingRecords(breastfeedingBabySelect.value);
+        loadBabyTimeline(breastfeedingBabySelect.value);
     }
 }
 
@@ -339,7 +380,7 @@ function refreshBreastfeedingSection(){
 function refreshVaccinationSection(){
     const vaccinationBabySelect = document.getElementById('vaccination-baby-select');
     if (vaccinationBabySelect && vaccinationBabySelect.value) {
-        loadVaccinationRecords(vaccinationBabySelect.value);
+        loadBabyTimeline(vaccinationBabySelect.value);
     }
 }
 
@@ -419,7 +460,7 @@ function initSelectorListeners() {
     if (babySelect) {
         babySelect.addEventListener('change', function() {
             if (this.value) {
-                loadBabyInfo(this.value);
+                loadBabyTimeline(this.value);
             } else {
                 document.getElementById('baby-info').innerHTML = 
                     '<div class="alert alert-info">Veuillez sélectionner un bébé pour voir ses informations.</div>';
@@ -432,7 +473,7 @@ function initSelectorListeners() {
     if (breastfeedingBabySelect) {
         breastfeedingBabySelect.addEventListener('change', function() {
             if (this.value) {
-                loadBreastfeedingRecords(this.value);
+                loadBabyTimeline(this.value);
             } else {
                 document.getElementById('breastfeeding-history').innerHTML = 
                     '<div class="alert alert-info">Veuillez sélectionner un bébé pour voir son historique d\'allaitement.</div>';
@@ -444,7 +485,7 @@ function initSelectorListeners() {
     if (vaccinationBabySelect) {
         vaccinationBabySelect.addEventListener('change', function() {
             if (this.value) {
-                loadVaccinationRecords(this.value);
+                loadBabyTimeline(this.value);
             } else {
                 document.getElementById('vaccination-history').innerHTML = 
                     '<div class="alert alert-info">Veuillez sélectionner un bébé pour voir son historique de vaccination.</div>';
@@ -555,15 +596,33 @@ function initFilterListeners() {
     
     // Bouton de réinitialisation des filtres
     const resetReminderFilters = document.getElementById('reset-reminder-filters');
+    const reminderSearch = document.getElementById('reminder-search');
     if (resetReminderFilters) {
         resetReminderFilters.addEventListener('click', function() {
             reminderFilters.forEach(filter => {
                 if (filter) filter.value = 'all';
             });
+            if (reminderSearch) reminderSearch.value = '';
             filterReminders();
         });
     }
     
+    // Recherche côté serveur dans les rappels et les accouchements
+    let searchTimeout = null;
+    function debouncedSearch(callback) {
+        clearTimeout(searchTimeout);
+        searchTimeout = setTimeout(callback, 300);
+    }
+    
+    if (reminderSearch) {
+        reminderSearch.addEventListener('input', () => debouncedSearch(filterReminders));
+    }
+    
+    const deliveriesSearch = document.getElementById('deliveries-search');
+    if (deliveriesSearch) {
+        deliveriesSearch.addEventListener('input', () => debouncedSearch(loadDeliveries));
+    }
+    
     // Recherche dans les protocoles
     const protocolSearch = document.getElementById('protocol-search');
     if (protocolSearch) {
@@ -895,10 +954,18 @@ function initBreastfeedingChart() {
 }
 
 /**
- * Charge les informations d'un bébé et met à jour les graphiques
+ * Extrait les enregistrements d'un type d'événement de la chronologie (déjà triés du plus récent au plus ancien)
+ */
+function eventsOfType(events, type) {
+    return events.filter(event => event.type === type).map(event => event.record);
+}
+
+/**
+ * Charge la chronologie d'un bébé en une seule requête et met à jour
+ * ses informations, ses graphiques, l'allaitement et les vaccinations
  */
-function loadBabyInfo(babyId) {
-    fetch(`/api/postnatal/baby/${babyId}`)
+function loadBabyTimeline(babyId) {
+    fetch(`/api/postnatal/timeline/baby/${babyId}`)
         .then(response => {
             if (!response.ok) {
                 throw new Error('Erreur lors du chargement des informations du bébé');
@@ -906,8 +973,30 @@ function loadBabyInfo(babyId) {
             return response.json();
         })
         .then(data => {
-            displayBabyInfo(data);
-            updateBabyCharts(data);
+            // Le même bébé est ouvert dans les onglets suivi, allaitement et vaccinations
+            ['baby-select', 'breastfeeding-baby-select', 'vaccination-baby-select'].forEach(selectId => {
+                const select = document.getElementById(selectId);
+                ensureSelectOption(select, data.baby.id, data.baby.baby_name);
+                if (select) select.value = babyId;
+            });
+            
+            const babyData = Object.assign({}, data.baby, {checkups: eventsOfType(data.events, 'checkup')});
+            displayBabyInfo(babyData);
+            updateBabyCharts(babyData);
+            
+            const breastfeedingData = {
+                baby_id: data.baby.id,
+                baby_name: data.baby.baby_name,
+                records: eventsOfType(data.events, 'breastfeeding')
+            };
+            displayBreastfeedingRecords(breastfeedingData);
+            updateBreastfeedingChart(breastfeedingData);
+            
+            displayVaccinationRecords({
+                baby_id: data.baby.id,
+                baby_name: data.baby.baby_name,
+                vaccinations: eventsOfType(data.events, 'vaccination')
+            });
         })
         .catch(error => {
             console.error('Erreur:', error);
@@ -916,10 +1005,10 @@ function loadBabyInfo(babyId) {
 }
 
 /**
- * Charge les suivis post-partum d'une mère
+ * Charge la chronologie d'une mère (accouchements et suivis post-partum) en une seule requête
  */
 function loadMotherCheckups(motherId) {
-    fetch(`/api/postnatal/mother-checkups/${motherId}`)
+    fetch(`/api/postnatal/timeline/mother/${motherId}`)
         .then(response => {
             if (!response.ok) {
                 throw new Error('Erreur lors du chargement des suivis post-partum');
@@ -927,8 +1016,13 @@ function loadMotherCheckups(motherId) {
             return response.json();
         })
         .then(data => {
-            displayMotherCheckups(data);
-            updateMotherVitalsChart(data);
+            const motherData = {
+                patient: data.patient,
+                delivery: data.delivery,
+                checkups: eventsOfType(data.events, 'checkup')
+            };
+            displayMotherCheckups(motherData);
+            updateMotherVitalsChart(motherData);
         })
         .catch(error => {
             console.error('Erreur:', error);
@@ -936,47 +1030,6 @@ function loadMotherCheckups(motherId) {
         });
 }
 
-/**
- * Charge les enregistrements d'allaitement pour un bébé
- */
-function loadBreastfeedingRecords(babyId) {
-    fetch(`/api/postnatal/breastfeeding/${babyId}`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Erreur lors du chargement des records d\'allaitement');
-            }
-            return response.json();
-        })
-        .then(data => {
-            displayBreastfeedingRecords(data);
-            updateBreastfeedingChart(data);
-        })
-        .catch(error => {
-            console.error('Erreur:', error);
-            showError('Impossible de charger les records d\'allaitement');
-        });
-}
-
-/**
- * Charge les records de vaccination pour un bébé
- */
-function loadVaccinationRecords(babyId) {
-    fetch(`/api/postnatal/vaccinations/${babyId}`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Erreur lors du chargement des vaccinations');
-            }
-            return response.json();
-        })
-        .then(data => {
-            displayVaccinationRecords(data);
-        })
-        .catch(error => {
-            console.error('Erreur:', error);
-            showError('Impossible de charger les vaccinations');
-        });
-}
-
 /**
  * Filtrer les rappels en fonction des filtres sélectionnés
  */
@@ -985,22 +1038,19 @@ function filterReminders() {
     const priorityFilter = document.getElementById('reminder-priority-filter').value;
     const statusFilter = document.getElementById('reminder-status-filter').value;
     
-    // Requête à l'API avec les filtres
-    const queryParams = new URLSearchParams();
-    if (typeFilter !== 'all') queryParams.append('type', typeFilter);
-    if (priorityFilter !== 'all') queryParams.append('priority', priorityFilter);
-    if (statusFilter !== 'all') queryParams.append('status', statusFilter);
+    const searchInput = document.getElementById('reminder-search');
     
-    fetch(`/api/postnatal/reminders?${queryParams.toString()}`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Erreur lors du filtrage des rappels');
-            }
-            return response.json();
-        })
-        .then(data => {
-            displayReminders(data);
-        })
+    // Requête à l'API avec les filtres, les pages suivantes sont chargées au défilement
+    const params = {};
+    if (typeFilter !== 'all') params.type = typeFilter;
+    if (priorityFilter !== 'all') params.priority = priorityFilter;
+    if (statusFilter !== 'all') params.status = statusFilter;
+    if (searchInput && searchInput.value.trim()) params.q = searchInput.value.trim();
+    
+    const remindersTable = document.getElementById('reminders-table');
+    if (!remindersTable) return;
+    
+    loadScrollPages('reminders', remindersTable.querySelector('tbody'), '/api/postnatal/reminders', params, displayReminders)
         .catch(error => {
             console.error('Erreur:', error);
             showError('Impossible de filtrer les rappels');
@@ -1653,14 +1703,14 @@ function displayVaccinationRecords(data) {
 /**
  * Affiche les rappels filtrés
  */
-function displayReminders(data) {
+function displayReminders(data, append = false) {
     const remindersTable = document.getElementById('reminders-table');
     
     if (!remindersTable) return;
     
     const tbody = remindersTable.querySelector('tbody');
     
-    if (!data.reminders || data.reminders.length === 0) {
+    if (!append && (!data.reminders || data.reminders.length === 0)) {
         tbody.innerHTML = `<tr><td colspan="7" class="text-center">Aucun rappel trouvé avec les filtres actuels.</td></tr>`;
         return;
     }
@@ -1700,22 +1750,28 @@ function displayReminders(data) {
         `;
     });
     
-    tbody.innerHTML = html;
+    const rows = document.createElement('tbody');
+    rows.innerHTML = html;
     
-    // Ajouter les gestionnaires d'événements pour les boutons
-    document.querySelectorAll('.view-reminder-details').forEach(button => {
+    // Ajouter les gestionnaires d'événements pour les boutons des nouvelles lignes
+    rows.querySelectorAll('.view-reminder-details').forEach(button => {
         button.addEventListener('click', function() {
             const reminderId = this.getAttribute('data-reminder-id');
             viewReminderDetails(reminderId);
         });
     });
     
-    document.querySelectorAll('.complete-reminder').forEach(button => {
+    rows.querySelectorAll('.complete-reminder').forEach(button => {
         button.addEventListener('click', function() {
             const reminderId = this.getAttribute('data-reminder-id');
             completeReminder(reminderId);
         });
     });
+    
+    if (!append) {
+        tbody.innerHTML = '';
+    }
+    tbody.append(...rows.children);
 }
 
 /**
@@ -1917,7 +1973,7 @@ function submitBabyCheckupForm() {
         // Recharger les données si un bébé estsélectionné
         const babySelect = document.getElementById('baby-select');
         if (babySelect && babySelect.value) {
-            loadBabyInfo(babySelect.value);
+            loadBabyTimeline(babySelect.value);
         }
     })
     .catch(error => {
@@ -1947,52 +2003,39 @@ function submitBreastfeedingForm() {
         data[key] = value;
     }
     
-    // Ajouter l'ID de la mère (récupéré à partir du bébé)
-    const babyId = formData.get('baby_id');
-    
-    // Rechercher la mère associée au bébé
-    fetch(`/api/postnatal/baby/${babyId}`)
-        .then(response => {
-            if (!response.ok) throw new Error('Erreur lors de la récupération des informations du bébé');
-            return response.json();
-        })
-        .then(babyData => {
-            data.mother_id = babyData.mother_id;
-            
-            // Maintenant envoyer les données d'allaitement
-            return fetch('/api/postnatal/breastfeeding', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify(data)
-            });
-        })
-        .then(response => {
-            if (!response.ok) throw new Error('Erreur lors de l\'enregistrement de l\'allaitement');
-            return response.json();
-        })
-        .then(responseData => {
-            // Fermer la modale
-            const modal = bootstrap.Modal.getInstance(document.getElementById('addBreastfeedingRecordModal'));
-            if (modal) modal.hide();
-            
-            // Réinitialiser le formulaire
-            form.reset();
-            
-            // Afficher un message de succès
-            showSuccess('Enregistrement d\'allaitement ajouté avec succès');
-            
-            // Recharger les données
-            const breastfeedingBabySelect = document.getElementById('breastfeeding-baby-select');
-            if (breastfeedingBabySelect && breastfeedingBabySelect.value) {
-                loadBreastfeedingRecords(breastfeedingBabySelect.value);
-            }
-        })
-        .catch(error => {
-            console.error('Erreur:', error);
-            showError('Erreur lors de l\'enregistrement de l\'allaitement');
-        });
+    // La mère est déduite du bébé par le serveur
+    fetch('/api/postnatal/breastfeeding', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => {
+        if (!response.ok) throw new Error('Erreur lors de l\'enregistrement de l\'allaitement');
+        return response.json();
+    })
+    .then(responseData => {
+        // Fermer la modale
+        const modal = bootstrap.Modal.getInstance(document.getElementById('addBreastfeedingRecordModal'));
+        if (modal) modal.hide();
+        
+        // Réinitialiser le formulaire
+        form.reset();
+        
+        // Afficher un message de succès
+        showSuccess('Enregistrement d\'allaitement ajouté avec succès');
+        
+        // Recharger les données
+        const breastfeedingBabySelect = document.getElementById('breastfeeding-baby-select');
+        if (breastfeedingBabySelect && breastfeedingBabySelect.value) {
+            loadBabyTimeline(breastfeedingBabySelect.value);
+        }
+    })
+    .catch(error => {
+        console.error('Erreur:', error);
+        showError('Erreur lors de l\'enregistrement de l\'allaitement');
+    });
 }
 
 /**
@@ -2054,7 +2097,7 @@ function submitVaccinationForm() {
         // Recharger les données
         const vaccinationBabySelect = document.getElementById('vaccination-baby-select');
         if (vaccinationBabySelect && vaccinationBabySelect.value) {
-            loadVaccinationRecords(vaccinationBabySelect.value);
+            loadBabyTimeline(vaccinationBabySelect.value);
         }
     })
     .catch(error => {
@@ -2138,17 +2181,16 @@ function submitReminderForm() {
  * Fonction pour charger tous les accouchements
  */
 function loadDeliveries() {
-    // Requête à l'API pour récupérer les accouchements
-    fetch('/api/postnatal/deliveries')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Erreur lors du chargement des accouchements');
-            }
-            return response.json();
-        })
-        .then(data => {
-            displayDeliveries(data.deliveries);
-        })
+    const deliveriesTable = document.getElementById('deliveries-table');
+    if (!deliveriesTable) return;
+    
+    const searchInput = document.getElementById('deliveries-search');
+    const params = {};
+    if (searchInput && searchInput.value.trim()) params.q = searchInput.value.trim();
+    
+    // Requête à l'API pour récupérer la première page, les suivantes sont chargées au défilement
+    loadScrollPages('deliveries', deliveriesTable.querySelector('tbody'), '/api/postnatal/deliveries', params,
+        (data, append) => displayDeliveries(data.deliveries, append))
         .catch(error => {
             console.error('Erreur:', error);
             showError('Impossible de charger les accouchements');
@@ -2158,18 +2200,20 @@ function loadDeliveries() {
 /**
  * Fonction pour afficher les accouchements dans le tableau
  */
-function displayDeliveries(deliveries) {
+function displayDeliveries(deliveries, append = false) {
     const deliveriesTable = document.getElementById('deliveries-table');
     if (!deliveriesTable) return;
     
     const tbody = deliveriesTable.querySelector('tbody');
     if (!tbody) return;
     
-    // Vider le tableau
-    tbody.innerHTML = '';
+    // Vider le tableau, sauf pour ajouter une page suivante
+    if (!append) {
+        tbody.innerHTML = '';
+    }
     
     // Si aucun accouchement, afficher un message
-    if (!deliveries || deliveries.length === 0) {
+    if (!append && (!deliveries || deliveries.length === 0)) {
         tbody.innerHTML = '<tr><td colspan="6" class="text-center">Aucun accouchement enregistré</td></tr>';
         return;
     }
@@ -2192,15 +2236,13 @@ function displayDeliveries(deliveries) {
             </td>
         `;
         
-        tbody.appendChild(row);
-    });
-    
-    // Ajouter les gestionnaires d'événements pour les boutons de détails
-    document.querySelectorAll('.view-delivery-details').forEach(button => {
-        button.addEventListener('click', function() {
+        // Ajouter le gestionnaire d'événements du bouton de détails
+        row.querySelector('.view-delivery-details').addEventListener('click', function() {
             const deliveryId = this.getAttribute('data-delivery-id');
             viewDeliveryDetails(deliveryId);
         });
+        
+        tbody.appendChild(row);
     });
 }
 
@@ -2219,54 +2261,25 @@ function translateDeliveryType(type) {
 }
 
 /**
- * Charge la liste des bébés
+ * Charge la première page des bébés, les autres sont trouvés par la recherche
  */
 function loadBabies() {
-    fetch('/api/postnatal/babies')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Erreur lors du chargement des bébés');
-            }
-            return response.json();
-        })
-        .then(data => {
-            populateBabySelectors(data.babies);
-        })
-        .catch(error => {
-            console.error('Erreur:', error);
-            showError('Impossible de charger la liste des bébés');
-        });
+    fetchListPage('/api/postnatal/babies', {}, null)
+        .then(data => populateBabySelectors(data.babies))
+        .catch(error => console.error('Erreur:', error));
 }
 
 /**
  * Remplit les sélecteurs de bébés avec les données
  */
 function populateBabySelectors(babies) {
-    const selectors = [
-        document.getElementById('baby-select'),
-        document.getElementById('baby-checkup-baby'),
-        document.getElementById('breastfeeding-baby'),
-        document.getElementById('vaccination-baby'),
-        document.getElementById('reminder-baby')
-    ];
+    const items = babies.map(baby => ({
+        id: baby.id,
+        label: baby.first_name ? `${baby.first_name} ${baby.last_name || ''}`.trim() : `Bébé de ${baby.mother_name}`
+    }));
     
-    selectors.forEach(selector => {
-        if (selector) {
-            // Vider les options existantes sauf la première
-            while (selector.options.length > 1) {
-                selector.remove(1);
-            }
-            
-            // Ajouter les bébés
-            babies.forEach(baby => {
-                const option = document.createElement('option');
-                option.value = baby.id;
-                option.textContent = baby.first_name ? 
-                    `${baby.first_name} ${baby.last_name}` : 
-                    `Bébé de ${baby.mother_name}`;
-                selector.appendChild(option);
-            });
-        }
+    BABY_SELECTS.forEach(selectId => {
+        replaceSelectOptions(document.getElementById(selectId), items);
     });
 }
 
@@ -33,35 +33,50 @@ document.addEventListener('DOMContentLoaded', function() {
     initGrowthChart();
 });
 
+// Reference curves, fetched once per page (the versioned URL is cached by the browser)
+let referenceDataPromise = null;
+
+/**
+ * Load the ultrasound reference curves from the server
+ */
+function loadReferenceData() {
+    if (!referenceDataPromise) {
+        const form = document.getElementById('ultrasound-form');
+        const url = form && form.dataset.referenceUrl ? form.dataset.referenceUrl : '/api/reference/ultrasound';
+        
+        referenceDataPromise = fetch(url)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Erreur lors du chargement des valeurs de référence.');
+                }
+                return response.json();
+            })
+            .catch(error => {
+                // Allow a new attempt on the next call
+                referenceDataPromise = null;
+                throw error;
+            });
+    }
+    return referenceDataPromise;
+}
+
 /**
  * Update reference values based on selected gestational age
  */
 function updateReferenceValues(gestationalAge) {
-    // Get reference data for the selected gestational age
-    fetch(`/static/js/ultrasound_reference.json`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Erreur lors du chargement des valeurs de référence.');
-            }
-            return response.json();
-        })
+    loadReferenceData()
         .then(data => {
-            if (data[gestationalAge]) {
-                const reference = data[gestationalAge];
-                
-                // Update reference value displays
-                updateReferenceDisplay('bpd-reference', reference.bpd);
-                updateReferenceDisplay('hc-reference', reference.hc);
-                updateReferenceDisplay('ac-reference', reference.ac);
-                updateReferenceDisplay('fl-reference', reference.fl);
-                
-                // Update estimated weight if provided
-                if (reference.efw) {
-                    updateReferenceDisplay('efw-reference', reference.efw);
-                }
-            } else {
+            const index = data.weeks.indexOf(parseInt(gestationalAge));
+            if (index === -1) {
                 console.error('Données de référence non disponibles pour cet âge gestationnel.');
+                return;
             }
+            
+            // Update reference value displays
+            ['bpd', 'hc', 'ac', 'fl', 'efw'].forEach(name => {
+                const curve = data.curves[name];
+                updateReferenceDisplay(`${name}-reference`, [curve.mean[index], curve.lower[index], curve.upper[index]]);
+            });
         })
         .catch(error => {
             console.error(error);
@@ -88,16 +103,20 @@ function initGrowthChart() {
     const chartCanvas = document.getElementById('growth-chart');
     if (!chartCanvas) return;
     
-    // Load reference data for chart
-    fetch(`/static/js/ultrasound_growth_chart.json`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Erreur lors du chargement des données de croissance.');
-            }
-            return response.json();
-        })
+    loadReferenceData()
         .then(data => {
             createGrowthChart(chartCanvas, data);
+            
+            // Switch the displayed measurement without reloading the data
+            document.querySelectorAll('input[name="growth-chart-type"]').forEach(input => {
+                input.addEventListener('change', function() {
+                    chartCanvas.dataset.measurement = this.value;
+                    if (window.growthChart) {
+                        window.growthChart.destroy();
+                    }
+                    createGrowthChart(chartCanvas, data);
+                });
+            });
         })
         .catch(error => {
             console.error(error);
@@ -110,6 +129,14 @@ function initGrowthChart() {
         });
 }
 
+/**
+ * Compute a percentile curve from the mean and the -2SD/+2SD curves
+ */
+function percentileCurve(curve, z) {
+    const bound = z < 0 ? curve.lower : curve.upper;
+    return curve.mean.map((mean, i) => Math.round((mean + z * Math.abs(bound[i] - mean) / 2) * 10) / 10);
+}
+
 /**
  * Create fetal growth chart with reference curves
  */
@@ -117,11 +144,12 @@ function createGrowthChart(canvas, data) {
     // Get the selected measurement type
     const measurementType = canvas.dataset.measurement || 'efw';
     
-    // Prepare chart data
+    // Prepare chart data (5th and 95th percentiles are at 1.645 SD)
+    const curve = data.curves[measurementType];
     const weeks = data.weeks;
-    const p5 = data[measurementType].p5;
-    const p50 = data[measurementType].p50;
-    const p95 = data[measurementType].p95;
+    const p5 = percentileCurve(curve, -1.645);
+    const p50 = curve.mean;
+    const p95 = percentileCurve(curve, 1.645);
     
     // Get patient data if available
     const patientDataStr = canvas.dataset.patientData;
@@ -246,6 +274,8 @@ function analyzeUltrasoundData() {
     
     // Get form data
     const gestationalAge = parseInt(document.getElementById('gestational-age').value);
+    const gestationalDaysInput = document.getElementById('gestational-days');
+    const gestationalDays = gestationalDaysInput ? (parseInt(gestationalDaysInput.value) || 0) : 0;
     const bpd = parseFloat(document.getElementById('bpd').value) || 0;
     const hc = parseFloat(document.getElementById('hc').value) || 0;
     const ac = parseFloat(document.getElementById('ac').value) || 0;
@@ -255,7 +285,7 @@ function analyzeUltrasoundData() {
     const notes = document.getElementById('notes').value;
     
     // Validate inputs
-    if (gestationalAge < 12 || gestationalAge > 40) {
+    if (gestationalAge < 12 || gestationalAge > 40 || (gestationalAge === 40 && gestationalDays > 0)) {
         showError('L\'âge gestationnel doit être compris entre 12 et 40 semaines.');
         return;
     }
@@ -272,6 +302,7 @@ function analyzeUltrasoundData() {
     // Build request data
     const requestData = {
         gestationalAge: gestationalAge,
+        gestationalDays: gestationalDays,
         measurements: {
             bpd: bpd,
             hc: hc,
@@ -284,72 +315,39 @@ function analyzeUltrasoundData() {
         patientId: patientId
     };
     
-    // For this demo, we'll analyze locally
-    // In a real implementation, you would send this to the server
-    const analysisResults = analyzeUltrasoundLocally(requestData);
-    displayUltrasoundResults(analysisResults, requestData);
+    // Analyze on the server (percentiles interpolated by day, record saved if a patient is selected)
+    fetch('/api/analyze_ultrasound', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(requestData)
+    })
+    .then(response => {
+        return response.json().then(data => {
+            if (!response.ok) {
+                throw new Error(data.error || 'Erreur lors de l\'analyse échographique.');
+            }
+            return data;
+        });
+    })
+    .then(results => {
+        displayUltrasoundResults(results, requestData);
+    })
+    .catch(error => {
+        showError(error.message);
+    });
 }
 
 /**
- * Locally analyze ultrasound data (simplified version)
- * In a real implementation, this would be server-side
+ * Format a measurement with its percentile for the results table
  */
-function analyzeUltrasoundLocally(data) {
-    const ga = data.gestationalAge;
-    const measurements = data.measurements;
-    
-    // Estimated fetal weight using Hadlock formula (simplified)
-    let efw = 0;
-    if (measurements.ac > 0 && measurements.fl > 0) {
-        // Simplified Hadlock formula
-        efw = Math.pow(10, (1.304 + 0.05281 * measurements.ac + 0.1938 * measurements.fl - 0.004 * measurements.ac * measurements.fl));
-        efw = Math.round(efw);
-    }
-    
-    // Analyze individual measurements (simplified)
-    const results = {
-        efw: efw,
-        percentiles: {},
-        concerns: [],
-        recommendations: []
-    };
-    
-    // Add common recommendations based on gestational age
-    if (ga < 20) {
-        results.recommendations.push("Confirmer la vitalité et l'âge gestationnel");
-        results.recommendations.push("Évaluer l'anatomie fœtale");
-    } else if (ga >= 20 && ga < 24) {
-        results.recommendations.push("Évaluation morphologique détaillée");
-        results.recommendations.push("Vérifier la position placentaire");
-    } else if (ga >= 24 && ga < 34) {
-        results.recommendations.push("Surveillance de la croissance fœtale");
-        results.recommendations.push("Évaluation du col utérin si risque de prématurité");
-    } else {
-        results.recommendations.push("Vérifier la présentation fœtale");
-        results.recommendations.push("Évaluation du bien-être fœtal");
-        results.recommendations.push("Estimer le poids fœtal");
-    }
-    
-    // Add specific recommendations based on AFI
-    if (measurements.afIndex < 5) {
-        results.concerns.push("Oligoamnios (AFI < 5 cm)");
-        results.recommendations.push("Rechercher une rupture des membranes");
-        results.recommendations.push("Évaluer la fonction rénale fœtale");
-    } else if (measurements.afIndex > 25) {
-        results.concerns.push("Hydramnios (AFI > 25 cm)");
-        results.recommendations.push("Rechercher une anomalie fœtale");
-        results.recommendations.push("Dépistage diabète gestationnel");
-    }
-    
-    // Add placenta concerns if applicable
-    if (measurements.placentaLocation.includes("praevia") || 
-        measurements.placentaLocation.includes("bas") || 
-        measurements.placentaLocation.includes("bas-inséré")) {
-        results.concerns.push("Placenta bas-inséré ou praevia");
-        results.recommendations.push("Contrôle échographique à 32 SA");
+function formatBiometry(results, name, value, unit) {
+    const scored = results.measurements ? results.measurements[name] : null;
+    if (!scored || scored.percentile === null) {
+        return `${value} ${unit}`;
     }
-    
-    return results;
+    return `${value} ${unit} <span class="text-muted">(${scored.percentile}e percentile, z = ${scored.z_score})</span>`;
 }
 
 /**
@@ -381,16 +379,16 @@ function displayUltrasoundResults(results, requestData) {
     
     // Add measurement rows
     if (requestData.measurements.bpd > 0) {
-        html += `<tr><td>Diamètre bipariétal (BPD)</td><td>${requestData.measurements.bpd} mm</td></tr>`;
+        html += `<tr><td>Diamètre bipariétal (BPD)</td><td>${formatBiometry(results, 'bpd', requestData.measurements.bpd, 'mm')}</td></tr>`;
     }
     if (requestData.measurements.hc > 0) {
-        html += `<tr><td>Circonférence crânienne (HC)</td><td>${requestData.measurements.hc} mm</td></tr>`;
+        html += `<tr><td>Circonférence crânienne (HC)</td><td>${formatBiometry(results, 'hc', requestData.measurements.hc, 'mm')}</td></tr>`;
     }
     if (requestData.measurements.ac > 0) {
-        html += `<tr><td>Circonférence abdominale (AC)</td><td>${requestData.measurements.ac} mm</td></tr>`;
+        html += `<tr><td>Circonférence abdominale (AC)</td><td>${formatBiometry(results, 'ac', requestData.measurements.ac, 'mm')}</td></tr>`;
     }
     if (requestData.measurements.fl > 0) {
-        html += `<tr><td>Longueur fémorale (FL)</td><td>${requestData.measurements.fl} mm</td></tr>`;
+        html += `<tr><td>Longueur fémorale (FL)</td><td>${formatBiometry(results, 'fl', requestData.measurements.fl, 'mm')}</td></tr>`;
     }
     if (requestData.measurements.afIndex > 0) {
         html += `<tr><td>Index de liquide amniotique (AFI)</td><td>${requestData.measurements.afIndex} cm</td></tr>`;
@@ -401,7 +399,7 @@ function displayUltrasoundResults(results, requestData) {
     
     // Add estimated fetal weight if calculated
     if (results.efw > 0) {
-        html += `<tr><td>Poids fœtal estimé (EFW)</td><td>${results.efw} g</td></tr>`;
+        html += `<tr><td>Poids fœtal estimé (EFW)</td><td>${formatBiometry(results, 'efw', results.efw, 'g')}</td></tr>`;
     }
     
     html += `
@@ -458,7 +456,7 @@ function displayUltrasoundResults(results, requestData) {
                 <div class="mt-4">
                     <h4>Âge gestationnel et croissance</h4>
                     <div class="alert alert-info">
-                        <i class="fas fa-info-circle"></i> L'examen a été réalisé à ${requestData.gestationalAge} semaines d'aménorrhée.
+                        <i class="fas fa-info-circle"></i> L'examen a été réalisé à ${requestData.gestationalAge} SA + ${requestData.gestationalDays} jours.
                     </div>
                 </div>
             </div>
@@ -466,22 +464,12 @@ function displayUltrasoundResults(results, requestData) {
                 <button type="button" class="btn btn-primary" onclick="window.print()">
                     <i class="fas fa-print"></i> Imprimer
                 </button>
-                <button type="button" class="btn btn-outline-primary" id="save-ultrasound">
-                    <i class="fas fa-save"></i> Enregistrer
-                </button>
+                ${results.saved ? '<span class="badge bg-success ms-2"><i class="fas fa-check"></i> Enregistré dans le dossier</span>' : ''}
             </div>
         </div>
     `;
     
     resultContainer.innerHTML = html;
-    
-    // Add event listener to save button
-    const saveButton = document.getElementById('save-ultrasound');
-    if (saveButton) {
-        saveButton.addEventListener('click', function() {
-            alert('Cette fonctionnalité sera disponible dans une prochaine mise à jour.');
-        });
-    }
 }
 
 /**
@@ -0,0 +1,302 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+import click
+import numpy as np
+from sqlalchemy import func, insert
+from app import app, db
+from models import Patient, BloodPressureRecord, BiomedicalRecord, PostnatalCareReminder, UserSummary, DailySummary
+from utils import calculate_gestational_age_batch, evaluate_blood_pressure, is_hellp_suspected
+
+# Gestational age boundaries in days (14, 28 and 42 weeks)
+SECOND_TRIMESTER_DAY = 98
+THIRD_TRIMESTER_DAY = 196
+PREGNANCY_MAX_DAY = 294
+TRIMESTERS = ('first', 'second', 'third')
+
+# Largest shift of the last menstrual period by the cycle length (cycles of 0 to 56 days)
+MAX_CYCLE_ADJUSTMENT_DAYS = 28
+
+ALERT_WINDOW_DAYS = 7
+
+def adjusted_last_period(last_period_date, cycle_length):
+    """
+    Shift the last menstrual period forward by the difference between the cycle and 28 days.
+
+    Same adjustment as calculate_gestational_age, so that the gestational age
+    is simply the number of days since the returned date.
+    """
+    if isinstance(last_period_date, datetime):
+        last_period_date = last_period_date.date()
+    return last_period_date + timedelta(days=(cycle_length or 28) - 28)
+
+def _upsert_increment(model, keys, deltas):
+    """
+    Add deltas to the counters of a summary row, creating the row if needed.
+
+    Runs in the current session transaction with a single INSERT ... ON CONFLICT
+    statement, so concurrent writers never lose an increment.
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        statement = dialect_insert(model).values(**keys, **deltas)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: getattr(model, name) + statement.excluded[name] for name in deltas}
+        )
+        db.session.execute(statement)
+        return
+
+    # Other databases: update first, insert when the row does not exist yet
+    updated = db.session.query(model).filter_by(**keys).update(
+        {getattr(model, name): getattr(model, name) + delta for name, delta in deltas.items()},
+        synchronize_session=False
+    )
+    if not updated:
+        db.session.execute(insert(model).values(**keys, **deltas))
+
+def _increment_day(user_id, day, **deltas):
+    _upsert_increment(DailySummary, {'user_id': user_id, 'day': day}, deltas)
+
+def record_patient_added(user_id, last_period_date=None, cycle_length=28, count=1):
+    """Update the summaries for new patients (count can be negative for deletions)."""
+    _upsert_increment(UserSummary, {'user_id': user_id}, {'patient_count': count})
+
+    if last_period_date:
+        _increment_day(user_id, adjusted_last_period(last_period_date, cycle_length), pregnancies_started=count)
+
+def record_reminder_added(user_id, reminder_date, count=1):
+    """Update the summaries for new pending reminders."""
+    _increment_day(user_id, reminder_date.date(), pending_reminders=count)
+
+def record_reminder_completed(user_id, reminder_date):
+    """Update the summaries when a pending reminder is completed."""
+    _increment_day(user_id, reminder_date.date(), pending_reminders=-1)
+
+def record_blood_pressure(user_id, systolic, diastolic, recorded_at=None, count=1):
+    """Count the reading as an alert if it is a hypertensive crisis (count is -1 when a reading is changed)."""
+    if evaluate_blood_pressure(systolic, diastolic)['status'] == 'critical':
+        _increment_day(user_id, (recorded_at or datetime.utcnow()).date(), critical_bp_alerts=count)
+
+def record_patients_batch(user_id, pregnancies):
+    """
+    Update the summaries for a bulk import of patients, one upsert per day.
+
+    Args:
+        user_id (int): ID of the midwife
+        pregnancies (list): (last_period_date, cycle_length) of every imported patient,
+                            last_period_date being None when unknown
+    """
+    _upsert_increment(UserSummary, {'user_id': user_id}, {'patient_count': len(pregnancies)})
+
+    per_day = defaultdict(int)
+    for last_period_date, cycle_length in pregnancies:
+        if last_period_date:
+            per_day[adjusted_last_period(last_period_date, cycle_length)] += 1
+
+    for day, count in per_day.items():
+        _increment_day(user_id, day, pregnancies_started=count)
+
+def record_blood_pressure_batch(user_id, critical_recorded_at):
+    """Count the hypertensive crises of a bulk import, one upsert per day."""
+    per_day = defaultdict(int)
+    for recorded_at in critical_recorded_at:
+        per_day[recorded_at.date()] += 1
+
+    for day, count in per_day.items():
+        _increment_day(user_id, day, critical_bp_alerts=count)
+
+def record_biomedical(user_id, platelets, ldh=None, alt=None, ast=None, recorded_at=None):
+    """Count the results as an alert if they suggest a HELLP syndrome."""
+    if is_hellp_suspected(platelets, ldh, alt, ast):
+        _increment_day(user_id, (recorded_at or datetime.utcnow()).date(), hellp_alerts=1)
+
+def get_dashboard_summary(user_id, today=None):
+    """
+    Read the dashboard statistics of a midwife from the summary tables.
+
+    Only the user's summary row and the daily rows of the last 42 weeks are
+    read, whatever the number of patients and records.
+
+    Args:
+        user_id (int): ID of the midwife
+        today (date, optional): Reference date, defaults to today
+
+    Returns:
+        dict: patient_count, trimesters (first/second/third), pending_reminders_today,
+              critical_bp_alerts and hellp_alerts over the last 7 days
+    """
+    today = today or date.today()
+
+    user_summary = db.session.get(UserSummary, user_id)
+
+    days = DailySummary.query.filter(
+        DailySummary.user_id == user_id,
+        DailySummary.day > today - timedelta(days=PREGNANCY_MAX_DAY),
+        DailySummary.day <= today
+    ).all()
+
+    summary = {
+        'patient_count': user_summary.patient_count if user_summary else 0,
+        'trimesters': {'first': 0, 'second': 0, 'third': 0},
+        'pending_reminders_today': 0,
+        'critical_bp_alerts': 0,
+        'hellp_alerts': 0
+    }
+
+    for day in days:
+        age = (today - day.day).days
+
+        if age < SECOND_TRIMESTER_DAY:
+            summary['trimesters']['first'] += day.pregnancies_started
+        elif age < THIRD_TRIMESTER_DAY:
+            summary['trimesters']['second'] += day.pregnancies_started
+        else:
+            summary['trimesters']['third'] += day.pregnancies_started
+
+        if age == 0:
+            summary['pending_reminders_today'] = day.pending_reminders
+
+        if age < ALERT_WINDOW_DAYS:
+            summary['critical_bp_alerts'] += day.critical_bp_alerts
+            summary['hellp_alerts'] += day.hellp_alerts
+
+    return summary
+
+def get_active_pregnancies(user_id, reference_date=None):
+    """
+    List the ongoing pregnancies of a midwife with their gestational age, by trimester.
+
+    The patients whose last menstrual period can fall within the last 42 weeks
+    are read with one indexed query, then their ages and due dates are computed
+    together by calculate_gestational_age_batch. A pregnancy is ongoing under
+    the same rule as the dashboard counts: between 0 and 42 weeks.
+
+    Args:
+        user_id (int): ID of the midwife
+        reference_date (date, optional): Day the ages are calculated for, defaults to today
+
+    Returns:
+        dict: 'first', 'second' and 'third' lists of pregnancies (patient_id, first_name,
+              last_name, last_period_date, cycle_length, weeks, days, due_date), nearest due date first
+    """
+    reference_date = reference_date or date.today()
+    margin = timedelta(days=MAX_CYCLE_ADJUSTMENT_DAYS)
+
+    rows = db.session.query(
+        Patient.id, Patient.first_name, Patient.last_name, Patient.last_period_date, Patient.cycle_length
+    ).filter(
+        Patient.user_id == user_id,
+        Patient.last_period_date > reference_date - timedelta(days=PREGNANCY_MAX_DAY) - margin,
+        Patient.last_period_date <= reference_date + margin
+    ).all()
+
+    pregnancies = {trimester: [] for trimester in TRIMESTERS}
+    if not rows:
+        return pregnancies
+
+    patient_ids, _, _, last_period_dates, cycle_lengths = zip(*rows)
+    weeks, days, due_dates = calculate_gestational_age_batch(last_period_dates, cycle_lengths, reference_date)
+    ages = weeks * 7 + days
+
+    ongoing = np.flatnonzero((ages >= 0) & (ages < PREGNANCY_MAX_DAY))
+    ongoing = ongoing[np.lexsort((np.asarray(patient_ids)[ongoing], due_dates[ongoing]))]
+    trimesters = np.searchsorted([SECOND_TRIMESTER_DAY, THIRD_TRIMESTER_DAY], ages[ongoing], side='right')
+
+    for index, trimester in zip(ongoing.tolist(), trimesters.tolist()):
+        patient_id, first_name, last_name, last_period_date, cycle_length = rows[index]
+        pregnancies[TRIMESTERS[trimester]].append({
+            'patient_id': patient_id,
+            'first_name': first_name,
+            'last_name': last_name,
+            'last_period_date': last_period_date,
+            'cycle_length': cycle_length,
+            'weeks': int(weeks[index]),
+            'days': int(days[index]),
+            'due_date': due_dates[index].item()
+        })
+
+    return pregnancies
+
+def rebuild_summaries(user_id=None, chunk_size=1000):
+    """
+    Recompute the summary tables from the clinical records (backfill or repair).
+
+    Args:
+        user_id (int, optional): Only rebuild this user's summaries
+        chunk_size (int): Rows fetched per round-trip while streaming records
+
+    Returns:
+        int: Number of daily summary rows written
+    """
+    user_filter = [] if user_id is None else [UserSummary.user_id == user_id]
+    day_filter = [] if user_id is None else [DailySummary.user_id == user_id]
+    UserSummary.query.filter(*user_filter).delete(synchronize_session=False)
+    DailySummary.query.filter(*day_filter).delete(synchronize_session=False)
+
+    patient_counts = defaultdict(int)
+    days = defaultdict(lambda: defaultdict(int))
+
+    patients = db.session.query(Patient.user_id, Patient.last_period_date, Patient.cycle_length)
+    if user_id is not None:
+        patients = patients.filter(Patient.user_id == user_id)
+    for owner_id, last_period_date, cycle_length in patients.yield_per(chunk_size):
+        patient_counts[owner_id] += 1
+        if last_period_date:
+            days[(owner_id, adjusted_last_period(last_period_date, cycle_length))]['pregnancies_started'] += 1
+
+    reminder_day = func.date(PostnatalCareReminder.reminder_date)
+    reminders = db.session.query(
+        PostnatalCareReminder.user_id, reminder_day, func.count()
+    ).filter(PostnatalCareReminder.completed == False).group_by(PostnatalCareReminder.user_id, reminder_day)
+    if user_id is not None:
+        reminders = reminders.filter(PostnatalCareReminder.user_id == user_id)
+    for owner_id, day, count in reminders:
+        days[(owner_id, _as_date(day))]['pending_reminders'] += count
+
+    readings = db.session.query(
+        BloodPressureRecord.user_id, BloodPressureRecord.systolic, BloodPressureRecord.diastolic, BloodPressureRecord.recorded_at
+    ).filter((BloodPressureRecord.systolic >= 160) | (BloodPressureRecord.diastolic >= 110))
+    if user_id is not None:
+        readings = readings.filter(BloodPressureRecord.user_id == user_id)
+    for owner_id, systolic, diastolic, recorded_at in readings.yield_per(chunk_size):
+        if evaluate_blood_pressure(systolic, diastolic)['status'] == 'critical':
+            days[(owner_id, recorded_at.date())]['critical_bp_alerts'] += 1
+
+    results = db.session.query(
+        Patient.user_id, BiomedicalRecord.platelets, BiomedicalRecord.ldh,
+        BiomedicalRecord.alt, BiomedicalRecord.ast, BiomedicalRecord.recorded_at
+    ).join(Patient, Patient.id == BiomedicalRecord.patient_id)
+    if user_id is not None:
+        results = results.filter(Patient.user_id == user_id)
+    for owner_id, platelets, ldh, alt, ast, recorded_at in results.yield_per(chunk_size):
+        if is_hellp_suspected(platelets, ldh, alt, ast):
+            days[(owner_id, recorded_at.date())]['hellp_alerts'] += 1
+
+    if patient_counts:
+        db.session.execute(insert(UserSummary), [
+            {'user_id': owner_id, 'patient_count': count} for owner_id, count in patient_counts.items()
+        ])
+
+    rows = [dict(counters, user_id=owner_id, day=day) for (owner_id, day), counters in days.items()]
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(insert(DailySummary), rows[start:start + chunk_size])
+
+    db.session.commit()
+    return len(rows)
+
+def _as_date(value):
+    # func.date() returns a string on SQLite and a date on PostgreSQL
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+@app.cli.command('rebuild-summaries')
+@click.option('--user-id', type=int, default=None, help="Ne reconstruire que les synthèses de cet utilisateur")
+def rebuild_summaries_command(user_id):
+    """Recompute the dashboard summary tables from the clinical records."""
+    rows = rebuild_summaries(user_id)
+    print(f"Synthèses reconstruites : {rows} jours")
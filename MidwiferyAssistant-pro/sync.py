@@ -0,0 +1,452 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from app import db
+from models import Patient, BloodPressureRecord, BabyRecord, PostnatalCheckup, VaccinationRecord, BreastfeedingRecord, PostnatalCareReminder
+from queries import InvalidCursor, encode_cursor, decode_cursor
+from ingestion import SYSTOLIC_RANGE, DIASTOLIC_RANGE
+from utils import evaluate_blood_pressure
+import summary
+
+# Columns never sent to the clients, and columns only the server writes
+PRIVATE_COLUMNS = {'user_id', 'schedule_key'}
+SERVER_COLUMNS = {'id', 'created_at', 'updated_at', 'version', 'client_id'}
+
+CLIENT_ID_MAX_LENGTH = 36
+
+class InvalidChange(ValueError):
+    """Raised when an offline write cannot be applied; the message is sent back to the client."""
+
+class SyncEntity:
+    """
+    A synchronized table: the fields sent in the deltas and the ones a client may write.
+
+    Args:
+        name (str): Name of the entity in the protocol
+        model: Model with updated_at, version and client_id columns, unless read_only
+        parents (dict): Foreign key -> parent model, checked to belong to the midwife on write
+        validate (callable, optional): f(values) raising InvalidChange, called with the complete new values
+        summary_fields (tuple): Fields the dashboard summaries depend on
+        summarize (callable, optional): f(user_id, record, count) adding a record to the summaries
+        read_only (bool): Sent in the deltas but never written by the clients
+        changed_at (Column, optional): Column ordering the deltas, defaults to model.updated_at
+    """
+
+    def __init__(self, name, model, parents=None, validate=None, summary_fields=(), summarize=None,
+                 read_only=False, changed_at=None):
+        self.name = name
+        self.model = model
+        self.parents = parents or {}
+        self.validate = validate
+        self.summary_fields = summary_fields
+        self.summarize = summarize
+        self.read_only = read_only
+        self.changed_at = changed_at if changed_at is not None else model.updated_at
+
+        columns = [column for column in model.__table__.columns if column.key not in PRIVATE_COLUMNS]
+        self.fields = [column.key for column in columns]
+        self.writable = {} if read_only else {column.key: column for column in columns if column.key not in SERVER_COLUMNS}
+        self.required = [key for key, column in self.writable.items() if not column.nullable and column.default is None]
+
+    def record(self, record):
+        """Current values of a record, keyed by field."""
+        return {field: getattr(record, field) for field in self.fields}
+
+def _validate_blood_pressure(values):
+    if not SYSTOLIC_RANGE[0] <= values['systolic'] <= SYSTOLIC_RANGE[1] or not DIASTOLIC_RANGE[0] <= values['diastolic'] <= DIASTOLIC_RANGE[1]:
+        raise InvalidChange('Valeurs tensionnelles hors limites')
+
+def _validate_checkup(values):
+    if values['checkup_type'] not in ('mother', 'baby'):
+        raise InvalidChange("checkup_type doit valoir 'mother' ou 'baby'")
+    if values['checkup_type'] == 'mother' and values.get('patient_id') is None:
+        raise InvalidChange('patient_id est obligatoire pour un suivi de la mère')
+    if values['checkup_type'] == 'baby' and values.get('baby_id') is None:
+        raise InvalidChange('baby_id est obligatoire pour un suivi du bébé')
+
+def _validate_reminder(values):
+    if values['reminder_type'] not in ('mother', 'baby', 'both'):
+        raise InvalidChange("reminder_type doit valoir 'mother', 'baby' ou 'both'")
+
+def _patient_summary(user_id, patient, count):
+    summary.record_patient_added(user_id, patient.last_period_date, patient.cycle_length, count)
+
+def _blood_pressure_summary(user_id, reading, count):
+    summary.record_blood_pressure(user_id, reading.systolic, reading.diastolic, reading.recorded_at, count)
+
+def _reminder_summary(user_id, reminder, count):
+    if not reminder.completed:
+        summary.record_reminder_added(user_id, reminder.reminder_date, count)
+
+# Parents first, so that a client applying a delta in order always has the referenced records
+SYNC_ENTITIES = (
+    SyncEntity('patient', Patient,
+               summary_fields=('last_period_date', 'cycle_length'), summarize=_patient_summary),
+    # Babies are recorded with the delivery and never modified afterwards
+    SyncEntity('baby', BabyRecord, read_only=True, changed_at=BabyRecord.created_at),
+    SyncEntity('blood_pressure', BloodPressureRecord, {'patient_id': Patient}, _validate_blood_pressure,
+               summary_fields=('systolic', 'diastolic', 'recorded_at'), summarize=_blood_pressure_summary),
+    SyncEntity('checkup', PostnatalCheckup, {'patient_id': Patient, 'baby_id': BabyRecord}, _validate_checkup),
+    SyncEntity('vaccination', VaccinationRecord, {'baby_id': BabyRecord}),
+    SyncEntity('breastfeeding', BreastfeedingRecord, {'mother_id': Patient, 'baby_id': BabyRecord}),
+    SyncEntity('reminder', PostnatalCareReminder, {'patient_id': Patient, 'baby_id': BabyRecord}, _validate_reminder,
+               summary_fields=('completed', 'reminder_date'), summarize=_reminder_summary),
+)
+
+SYNC_ENTITIES_BY_NAME = {entity.name: entity for entity in SYNC_ENTITIES}
+
+# Position of a client that never synchronized, for each entity
+_ORIGIN = (datetime.min, 0)
+
+def _cursor_columns(entities=SYNC_ENTITIES):
+    return [column for entity in entities for column in (entity.changed_at, entity.model.id)]
+
+def _decode_positions(cursor):
+    try:
+        return decode_cursor(cursor, _cursor_columns())
+    except InvalidCursor:
+        # Cursor issued before the babies were synchronized: every baby is sent
+        baby = SYNC_ENTITIES.index(SYNC_ENTITIES_BY_NAME['baby'])
+        positions = decode_cursor(cursor, _cursor_columns(SYNC_ENTITIES[:baby] + SYNC_ENTITIES[baby + 1:]))
+        return positions[:2 * baby] + list(_ORIGIN) + positions[2 * baby:]
+
+def _owned(statement, model, user_id):
+    # Records of the midwife; babies belong to her through their mother
+    if model is BabyRecord:
+        return statement.join(Patient, BabyRecord.mother_id == Patient.id).where(Patient.user_id == user_id)
+    return statement.where(model.user_id == user_id)
+
+def get_changes(user_id, cursor=None, limit=1000, safety_lag=5, now=None):
+    """
+    Get the records of a midwife created or modified since a client's cursor.
+
+    The cursor holds the (updated_at, id) of the last record sent of each
+    entity, so each entity is read with a keyset query on its
+    (user_id, updated_at, id) index. Records updated in the last seconds
+    (safety_lag) are left for the next call: a transaction that started
+    earlier but commits after this read would otherwise get an updated_at
+    below the cursor and never be sent.
+
+    Babies are never modified once recorded: they are read by (created_at, id)
+    through their mother, and sent right after the patients so that the
+    checkups, vaccinations and breastfeeding records referring to them can be
+    resolved. They cannot be written offline.
+
+    Records are sent as compact tables, the field names once per entity and
+    one list of values per record. Entities are read in order until the limit
+    is reached; "more" tells the client to call again with the new cursor.
+
+    Args:
+        user_id (int): ID of the midwife
+        cursor (str, optional): Cursor returned by the previous call, None for a full synchronization
+        limit (int): Maximum number of records in the response
+        safety_lag (float): Seconds before now after which changes are not sent yet
+        now (datetime, optional): Current time, defaults to utcnow
+
+    Returns:
+        dict: {'changes': {entity: {'fields', 'rows'}}, 'cursor', 'more'}
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    positions = _decode_positions(cursor) if cursor else list(_ORIGIN) * len(SYNC_ENTITIES)
+    until = (now or datetime.utcnow()) - timedelta(seconds=safety_lag)
+
+    changes = {}
+    more = False
+    for index, entity in enumerate(SYNC_ENTITIES):
+        model = entity.model
+        after = positions[2 * index:2 * index + 2]
+
+        statement = _owned(select(*[model.__table__.c[field] for field in entity.fields]), model, user_id)
+        rows = db.session.execute(
+            statement
+            .where(
+                tuple_(entity.changed_at, model.id) > tuple_(*after),
+                entity.changed_at <= until
+            )
+            .order_by(entity.changed_at, model.id)
+            .limit(limit + 1)
+        ).all()
+
+        if len(rows) > limit:
+            rows = rows[:limit]
+            more = True
+
+        if rows:
+            positions[2 * index:2 * index + 2] = [getattr(rows[-1], entity.changed_at.key), rows[-1].id]
+            changes[entity.name] = {'fields': entity.fields, 'rows': [list(row) for row in rows]}
+            limit -= len(rows)
+
+        if more:
+            break
+
+    return {'changes': changes, 'cursor': encode_cursor(positions), 'more': more}
+
+def _parse_datetime(value):
+    value = datetime.fromisoformat(value)
+    # Stored as naive UTC like the other timestamps
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _convert(column_type, value):
+    if isinstance(column_type, db.DateTime):
+        return _parse_datetime(value)
+    if isinstance(column_type, db.Date):
+        return date.fromisoformat(value)
+    if isinstance(column_type, db.Boolean) != isinstance(value, bool):
+        raise TypeError(value)
+    if isinstance(column_type, db.Integer):
+        return int(value)
+    if isinstance(column_type, db.Float):
+        return float(value)
+    if isinstance(column_type, db.String) and not isinstance(value, str):
+        raise TypeError(value)
+    return value
+
+def _coerce(column, value):
+    # Convert a JSON value to the type of the column
+    if value is None:
+        if not column.nullable:
+            raise InvalidChange(f"{column.key} est obligatoire")
+        return None
+
+    try:
+        value = _convert(column.type, value)
+    except (TypeError, ValueError, AttributeError) as e:
+        raise InvalidChange(f"{column.key} : valeur invalide") from e
+
+    length = getattr(column.type, 'length', None)
+    if length and len(value) > length:
+        raise InvalidChange(f"{column.key} : {length} caractères au plus")
+    return value
+
+class SyncBatch:
+    """
+    Apply the writes a client made offline, in order, in the current transaction.
+
+    Each change is {"entity", "op", "client_id", "id", "version", "data"}:
+
+    - "create" requires a client_id generated by the client. A creation whose
+      client_id is already stored is answered "duplicate" with the stored
+      record, so a batch can be sent again after a lost response.
+    - "update" targets the record by id (or by the client_id of a record
+      created offline) and carries the version the client modified. A record
+      changed on the server since then is not modified and is answered
+      "conflict" with its current values, for the client to merge and resend.
+    - Parent references (patient_id, mother_id) are server IDs, or the
+      client_id of a patient created offline, possibly earlier in the batch.
+      baby_id is the server ID of a baby received in the deltas: babies are
+      recorded with the delivery and any change to a "baby" is an error.
+
+    An invalid change is answered "error" and does not stop the batch. The
+    records and parents referenced by the batch are loaded with one query
+    per table before the changes are applied.
+
+    Args:
+        user_id (int): ID of the midwife
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._records = {}  # (model, id or client_id) -> record
+
+        # Consequences sent to the open pages once the batch is committed
+        self.critical_patient_ids = []
+        self.reminders_changed = 0
+        self.checkups_scheduled = False
+
+    def apply(self, changes):
+        """
+        Apply the changes.
+
+        Args:
+            changes (list): Changes in the order they were made
+
+        Returns:
+            list: One result per change, in the same order
+        """
+        self._load(changes)
+
+        results = []
+        for change in changes:
+            try:
+                results.append(self._apply(change))
+            except InvalidChange as error:
+                results.append({
+                    'status': 'error',
+                    'entity': change.get('entity') if isinstance(change, dict) else None,
+                    'client_id': change.get('client_id') if isinstance(change, dict) else None,
+                    'error': str(error)
+                })
+        return results
+
+    def _load(self, changes):
+        # Targets and parents of the whole batch, one query per table
+        keys = defaultdict(set)
+        for change in changes:
+            if not isinstance(change, dict) or change.get('entity') not in SYNC_ENTITIES_BY_NAME:
+                continue
+
+            entity = SYNC_ENTITIES_BY_NAME[change['entity']]
+            keys[entity.model].update(key for key in (change.get('id'), change.get('client_id')) if _is_key(key))
+
+            data = change.get('data')
+            if isinstance(data, dict):
+                for field, parent in entity.parents.items():
+                    if _is_key(data.get(field)):
+                        keys[parent].add(data[field])
+
+        for model, model_keys in keys.items():
+            ids = [key for key in model_keys if isinstance(key, int)]
+            client_ids = [key for key in model_keys if isinstance(key, str)]
+
+            conditions = []
+            if ids:
+                conditions.append(model.id.in_(ids))
+            if client_ids and hasattr(model, 'client_id'):
+                conditions.append(model.client_id.in_(client_ids))
+            if not conditions:
+                continue
+
+            for record in db.session.scalars(self._owned(model).where(or_(*conditions))):
+                self._remember(record)
+
+    def _owned(self, model):
+        return _owned(select(model), model, self.user_id)
+
+    def _remember(self, record):
+        self._records[(type(record), record.id)] = record
+        if getattr(record, 'client_id', None):
+            self._records[(type(record), record.client_id)] = record
+
+    def _apply(self, change):
+        if not isinstance(change, dict):
+            raise InvalidChange('Format invalide')
+
+        entity = SYNC_ENTITIES_BY_NAME.get(change.get('entity'))
+        if entity is None:
+            raise InvalidChange(f"Entité inconnue : {change.get('entity')}")
+        if entity.read_only:
+            raise InvalidChange(f"Entité en lecture seule : {entity.name}")
+
+        data = change.get('data') or {}
+        if not isinstance(data, dict):
+            raise InvalidChange('data doit être un objet')
+
+        values = self._parse(entity, data)
+
+        if change.get('op') == 'create':
+            return self._create(entity, change.get('client_id'), values)
+        if change.get('op') == 'update':
+            return self._update(entity, change, values)
+        raise InvalidChange("op doit valoir 'create' ou 'update'")
+
+    def _parse(self, entity, data):
+        values = {}
+        for field, value in data.items():
+            column = entity.writable.get(field)
+            if column is None:
+                raise InvalidChange(f"Champ inconnu ou non modifiable : {field}")
+
+            if field in entity.parents and value is not None:
+                parent = self._records.get((entity.parents[field], value)) if _is_key(value) else None
+                if parent is None:
+                    raise InvalidChange(f"{field} : enregistrement non trouvé")
+                values[field] = parent.id
+            else:
+                values[field] = _coerce(column, value)
+
+        return values
+
+    def _create(self, entity, client_id, values):
+        if not isinstance(client_id, str) or not 0 < len(client_id) <= CLIENT_ID_MAX_LENGTH:
+            raise InvalidChange(f"client_id est obligatoire pour une création ({CLIENT_ID_MAX_LENGTH} caractères au plus)")
+
+        existing = self._records.get((entity.model, client_id))
+        if existing is not None:
+            return _result('duplicate', entity, existing)
+
+        missing = [field for field in entity.required if values.get(field) is None]
+        if missing:
+            raise InvalidChange(f"Champs obligatoires : {', '.join(missing)}")
+        if entity.validate:
+            entity.validate(values)
+
+        record = entity.model(**values, client_id=client_id, user_id=self.user_id)
+        try:
+            with db.session.begin_nested():
+                db.session.add(record)
+        except IntegrityError:
+            # The same batch is being applied by another request
+            existing = db.session.scalars(self._owned(entity.model).where(entity.model.client_id == client_id)).first()
+            if existing is None:
+                raise
+            self._remember(existing)
+            return _result('duplicate', entity, existing)
+
+        self._remember(record)
+        if entity.summarize:
+            entity.summarize(self.user_id, record, 1)
+        self._note(entity, record, None)
+        return _result('created', entity, record)
+
+    def _update(self, entity, change, values):
+        key = change.get('id') if change.get('id') is not None else change.get('client_id')
+        record = self._records.get((entity.model, key)) if _is_key(key) else None
+        if record is None:
+            raise InvalidChange('Enregistrement non trouvé')
+
+        version = change.get('version')
+        if not isinstance(version, int) or isinstance(version, bool):
+            raise InvalidChange('version est obligatoire pour une modification')
+        if version != record.version:
+            return _result('conflict', entity, record)
+
+        if entity.validate:
+            entity.validate({**{field: getattr(record, field) for field in entity.writable}, **values})
+
+        changed = {field: value for field, value in values.items() if getattr(record, field) != value}
+        if not changed:
+            return _result('updated', entity, record)
+
+        before = SimpleNamespace(**{field: getattr(record, field) for field in entity.summary_fields})
+        try:
+            with db.session.begin_nested():
+                for field, value in changed.items():
+                    setattr(record, field, value)
+        except StaleDataError:
+            # Modified by another request since it was loaded
+            db.session.refresh(record)
+            return _result('conflict', entity, record)
+
+        if entity.summarize and any(field in changed for field in entity.summary_fields):
+            entity.summarize(self.user_id, before, -1)
+            entity.summarize(self.user_id, record, 1)
+        self._note(entity, record, before)
+        return _result('updated', entity, record)
+
+    def _note(self, entity, record, before):
+        # Alerts and reminders to send once the batch is committed
+        if entity.name == 'blood_pressure':
+            was_critical = before is not None and evaluate_blood_pressure(before.systolic, before.diastolic)['status'] == 'critical'
+            if not was_critical and evaluate_blood_pressure(record.systolic, record.diastolic)['status'] == 'critical':
+                self.critical_patient_ids.append(record.patient_id)
+        elif entity.name == 'reminder':
+            self.reminders_changed += 1
+        elif entity.name == 'checkup' and record.next_checkup_date is not None:
+            self.checkups_scheduled = True
+
+def _is_key(value):
+    # Server ID or client-generated ID
+    return (isinstance(value, int) and not isinstance(value, bool)) or (isinstance(value, str) and 0 < len(value) <= CLIENT_ID_MAX_LENGTH)
+
+def _result(status, entity, record):
+    result = {'status': status, 'entity': entity.name, 'id': record.id, 'client_id': record.client_id, 'version': record.version}
+    if status == 'conflict':
+        result['record'] = entity.record(record)
+    return result
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import uuid
+from types import SimpleNamespace
+import pytest
+
+# The application reads its configuration when it is imported: point it at a
+# throwaway database and write the audit log and the reminders synchronously
+TEST_DIR = tempfile.mkdtemp(prefix='anips-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TEST_DIR, 'test.db')
+os.environ['AUDIT_ASYNC'] = '0'
+os.environ['AUDIT_SPOOL_DIR'] = os.path.join(TEST_DIR, 'audit_spool')
+os.environ['REMINDER_SCHEDULER_ENABLED'] = '0'
+
+from app import app, db
+from models import User
+
+PASSWORD = 'mot-de-passe'
+
+# Fixtures open their own application contexts: a request run while a context is
+# pushed would reuse it, with the user loaded by the previous request in g
+@pytest.fixture
+def make_user():
+    """Create midwives with their own patients, so that tests do not see each other's rows."""
+    def make_user():
+        with app.app_context():
+            user = User(username=f"sf-{uuid.uuid4().hex[:12]}", email=f"{uuid.uuid4().hex[:12]}@example.org")
+            user.set_password(PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+            return SimpleNamespace(id=user.id, username=user.username)
+
+    return make_user
+
+@pytest.fixture
+def login():
+    """Return a test client logged in as the given midwife."""
+    def login(user):
+        client = app.test_client()
+        response = client.post('/login', data={'username': user.username, 'password': PASSWORD})
+        assert response.headers['Location'].endswith('/dashboard')
+        return client
+
+    return login
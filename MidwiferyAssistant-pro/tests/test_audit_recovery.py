@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+import uuid
+from app import app, db
+from audit import AuditWriter
+from models import AuditLog
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+def write_journal(path, action, count):
+    with open(path, 'w', encoding='utf-8') as journal:
+        for index in range(count):
+            journal.write(json.dumps({'user_id': 1, 'action': action, 'details': str(index), 'ip_address': None,
+                                      'timestamp': '2026-10-01T08:00:00'}) + '\n')
+
+def stored_details(action):
+    with app.app_context():
+        return sorted(int(log.details) for log in AuditLog.query.filter_by(action=action))
+
+def test_failed_recovery_keeps_the_unstored_events_for_the_next_one(tmp_path):
+    action = f"Test {uuid.uuid4().hex[:8]}"
+    write_journal(tmp_path / f"audit-spool-{dead_pid()}.jsonl", action, 5)
+    writer = AuditWriter(batch_size=2, spool_dir=str(tmp_path))
+
+    # The database fails on the second batch
+    calls = []
+    def failing_insert(events):
+        calls.append(events)
+        if len(calls) == 2:
+            raise RuntimeError('base indisponible')
+        AuditWriter._insert(writer, events)
+    writer._insert = failing_insert
+
+    with app.app_context():
+        assert writer.recover() == 2
+
+    [claimed] = os.listdir(tmp_path)
+    assert claimed.endswith(f".{os.getpid()}.recovering")
+    assert stored_details(action) == [0, 1]
+
+    # The process that claimed it died: the next startup claims it again
+    os.rename(tmp_path / claimed, tmp_path / claimed.replace(f".{os.getpid()}.", f".{dead_pid()}."))
+    del writer._insert
+
+    with app.app_context():
+        assert writer.recover() == 3
+
+    assert os.listdir(tmp_path) == []
+    assert stored_details(action) == [0, 1, 2, 3, 4]
+
+def test_journal_claimed_by_a_live_process_is_left_alone(tmp_path):
+    action = f"Test {uuid.uuid4().hex[:8]}"
+    claimed = tmp_path / f"audit-spool-{dead_pid()}.jsonl.{os.getppid()}.recovering"
+    write_journal(claimed, action, 3)
+
+    with app.app_context():
+        assert AuditWriter(spool_dir=str(tmp_path)).recover() == 0
+
+    assert claimed.exists()
+    assert stored_details(action) == []
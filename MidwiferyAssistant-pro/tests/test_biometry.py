@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+from biometry import analyze_ultrasound, estimate_fetal_weight
+from reference_data import ULTRASOUND_WEEKS, ULTRASOUND_CURVES
+
+BIOMETRY = ('bpd', 'hc', 'ac', 'fl')
+
+@pytest.mark.parametrize('column', ['mean', 'lower', 'upper'])
+def test_efw_curve_is_the_hadlock_weight_of_the_biometry_curves(column):
+    weights = estimate_fetal_weight(*[np.array(ULTRASOUND_CURVES[name][column]) for name in BIOMETRY])
+
+    assert np.abs(weights - np.array(ULTRASOUND_CURVES['efw'][column])).max() <= 1
+
+@pytest.mark.parametrize('index, week', list(enumerate(ULTRASOUND_WEEKS)))
+def test_mean_biometry_scores_near_the_50th_percentile_without_concern(index, week):
+    biometry = {name: ULTRASOUND_CURVES[name]['mean'][index] for name in BIOMETRY}
+
+    results = analyze_ultrasound(week * 7, **biometry)
+
+    for name in BIOMETRY + ('efw',):
+        assert abs(results['measurements'][name]['percentile'] - 50) < 1, name
+    assert results['concerns'] == []
@@ -0,0 +1,31 @@
+import time
+from app import app
+from push import EventBroker
+
+def test_events_are_disabled_by_default(make_user, login):
+    client = login(make_user())
+
+    assert client.get('/api/events').status_code == 204
+    assert b'notifications.js' not in client.get('/dashboard').data
+
+def test_stream_ends_after_its_max_duration_and_resumes_after_the_last_event():
+    broker = EventBroker(heartbeat_interval=0.05, max_duration=0.2)
+    user_id = 1
+
+    started = time.monotonic()
+    stream = broker.stream(user_id)
+    first = ''.join([next(stream), next(stream)])
+    with app.app_context():
+        broker.publish(user_id, 'reminders', {'action': 'created'})
+    messages = first + ''.join(stream)
+
+    assert time.monotonic() - started < 1
+    assert 'event: reminders' in messages
+    last_event_id = [line[4:] for line in messages.splitlines() if line.startswith('id: ')][-1]
+
+    with app.app_context():
+        broker.publish(user_id, 'alert', {'message': 'TA 170/110'})
+    resumed = ''.join(broker.stream(user_id, last_event_id))
+
+    assert 'event: alert' in resumed
+    assert 'event: resync' not in resumed and 'event: reminders' not in resumed
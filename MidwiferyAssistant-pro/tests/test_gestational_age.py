@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+import pytest
+from summary import adjusted_last_period
+from utils import calculate_gestational_age_batch
+
+@pytest.mark.parametrize('cycle_length, weeks, days, due_date', [
+    (28, 39, 0, date(2026, 10, 8)),
+    (35, 38, 0, date(2026, 10, 15)),
+    (21, 40, 0, date(2026, 10, 1)),
+])
+def test_age_and_due_date_use_the_same_cycle_adjustment(cycle_length, weeks, days, due_date):
+    result = calculate_gestational_age_batch([date(2026, 1, 1)], [cycle_length], date(2026, 10, 1))
+
+    assert (int(result[0][0]), int(result[1][0]), result[2][0].item()) == (weeks, days, due_date)
+
+@pytest.mark.parametrize('cycle_length', [21, 28, 35, 45])
+def test_forty_weeks_falls_on_the_due_date(cycle_length):
+    last_period = date(2026, 1, 1)
+    _, _, [due_date] = calculate_gestational_age_batch([last_period], [cycle_length], date(2026, 1, 1))
+
+    weeks, days, _ = calculate_gestational_age_batch([last_period], [cycle_length], due_date.item())
+
+    assert (int(weeks[0]), int(days[0])) == (40, 0)
+    assert due_date.item() == adjusted_last_period(last_period, cycle_length) + timedelta(days=280)
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, event
+from app import app, db
+from models import User, Patient, DeliveryRecord, BabyRecord, PostnatalCheckup, PostnatalCareReminder
+from queries import get_patients_page, get_reminder_feed
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Schema changes made after the first release, removed to rebuild a database of that release
+LATER_TABLES = {'user_summary', 'daily_summary', 'screening_run', 'schema_migration'}
+LATER_COLUMNS = {
+    'patient': ['updated_at', 'version', 'client_id'],
+    'blood_pressure_record': ['updated_at', 'version', 'client_id'],
+    'ultrasound_record': ['gestational_days'],
+    'postnatal_checkup': ['updated_at', 'version', 'client_id'],
+    'vaccination_record': ['updated_at', 'version', 'client_id'],
+    'breastfeeding_record': ['updated_at', 'version', 'client_id'],
+    'postnatal_care_reminder': ['updated_at', 'version', 'client_id', 'schedule_key'],
+}
+
+# Hot query: index it must be served by
+HOT_QUERIES = {
+    'patient_list': 'ix_patient_user_id_last_name_id',
+    'patient_list_next_page': 'ix_patient_user_id_last_name_id',
+    'reminder_feed_pending': 'ix_postnatal_care_reminder_user_id_completed_date',
+    'reminder_feed_all': 'ix_postnatal_care_reminder_user_id_date',
+    'mother_checkups': 'ix_postnatal_checkup_patient_id_type_date',
+    'baby_checkups': 'ix_postnatal_checkup_baby_id_type_date',
+}
+
+@contextmanager
+def record_statements(table):
+    """Collect the (statement, parameters) selecting from a table."""
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT') and f'FROM {table}' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+@pytest.fixture(scope='module')
+def hot_statements():
+    """Statements sent by the patient list, the reminder feed and the checkup APIs, with their parameters."""
+    with app.app_context():
+        user = User(username='sf-plans', email='plans@example.org')
+        user.set_password('mot-de-passe')
+        db.session.add(user)
+        db.session.flush()
+
+        patients = [Patient(first_name='Anne', last_name=f'Dupont{index}', user_id=user.id) for index in range(3)]
+        db.session.add_all(patients)
+        db.session.flush()
+        delivery = DeliveryRecord(delivery_date=datetime(2026, 9, 1), delivery_type='vaginal', delivery_location='Maternité',
+                                  patient_id=patients[0].id, user_id=user.id)
+        db.session.add(delivery)
+        db.session.flush()
+        baby = BabyRecord(first_name='Léa', birth_date=datetime(2026, 9, 1), gender='F', birth_weight=3200,
+                          mother_id=patients[0].id, delivery_id=delivery.id)
+        db.session.add(baby)
+        db.session.flush()
+        db.session.add_all([
+            PostnatalCheckup(checkup_type='mother', checkup_date=datetime(2026, 9, 3), patient_id=patients[0].id, user_id=user.id),
+            PostnatalCheckup(checkup_type='baby', checkup_date=datetime(2026, 9, 3), baby_id=baby.id, user_id=user.id),
+            PostnatalCareReminder(title='J8', reminder_date=datetime(2026, 9, 9), reminder_type='mother',
+                                  patient_id=patients[0].id, user_id=user.id)
+        ])
+        db.session.commit()
+        user_id, mother_id, baby_id = user.id, patients[0].id, baby.id
+
+        statements = {}
+        with record_statements('patient') as recorded:
+            _, cursor = get_patients_page(user_id, limit=1)
+            get_patients_page(user_id, cursor=cursor, limit=1)
+        statements['patient_list'], statements['patient_list_next_page'] = recorded
+
+        with record_statements('postnatal_care_reminder') as recorded:
+            get_reminder_feed(user_id, status='pending')
+            get_reminder_feed(user_id)
+        statements['reminder_feed_pending'], statements['reminder_feed_all'] = recorded
+        db.session.remove()
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'sf-plans', 'password': 'mot-de-passe'})
+    with record_statements('postnatal_checkup') as recorded:
+        assert client.get(f'/api/postnatal/mother-checkups/{mother_id}').status_code == 200
+    statements['mother_checkups'] = recorded[-1]
+    with record_statements('postnatal_checkup') as recorded:
+        assert client.get(f'/api/postnatal/baby/{baby_id}').status_code == 200
+    statements['baby_checkups'] = recorded[-1]
+
+    return statements
+
+@pytest.fixture(scope='module')
+def upgraded_database(tmp_path_factory):
+    """A database with the schema of the first release, upgraded by the migrations at application startup."""
+    directory = tmp_path_factory.mktemp('upgrade')
+    path = str(directory / 'legacy.db')
+
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine, tables=[table for table in db.metadata.sorted_tables if table.name not in LATER_TABLES])
+    engine.dispose()
+
+    connection = sqlite3.connect(path)
+    for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'").fetchall():
+        connection.execute(f'DROP INDEX "{name}"')
+    for table, columns in LATER_COLUMNS.items():
+        for column in columns:
+            connection.execute(f'ALTER TABLE "{table}" DROP COLUMN "{column}"')
+    connection.commit()
+    connection.close()
+
+    environment = dict(
+        os.environ,
+        DATABASE_URL=f'sqlite:///{path}',
+        AUDIT_SPOOL_DIR=str(directory / 'audit_spool')
+    )
+    result = subprocess.run([sys.executable, '-c', 'import app'], cwd=PROJECT_DIR, env=environment,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    return path
+
+def query_plan(path, statement, parameters):
+    connection = sqlite3.connect(path)
+    try:
+        return [row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()]
+    finally:
+        connection.close()
+
+@pytest.mark.parametrize('database', ['fresh', 'upgraded'])
+@pytest.mark.parametrize('query, index', HOT_QUERIES.items())
+def test_hot_queries_use_their_index(hot_statements, upgraded_database, database, query, index):
+    with app.app_context():
+        fresh_path = db.engine.url.database
+    path = fresh_path if database == 'fresh' else upgraded_database
+
+    statement, parameters = hot_statements[query]
+    plan = query_plan(path, statement, parameters)
+
+    assert any(f'USING INDEX {index}' in step or f'USING COVERING INDEX {index}' in step for step in plan), plan
+    assert not [step for step in plan if step.startswith('SCAN ') and 'USING' not in step], plan
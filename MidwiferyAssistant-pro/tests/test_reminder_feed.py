@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app import app, db
+from models import Patient, DeliveryRecord, BabyRecord, PostnatalCareReminder
+
+@contextmanager
+def count_statements():
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def add_reminders(user, count):
+    with app.app_context():
+        # Mother, baby and mother-and-baby reminders, each displaying names from a different table
+        mother = Patient(first_name='Anne', last_name='Dupont', user_id=user.id)
+        db.session.add(mother)
+        db.session.flush()
+
+        delivery = DeliveryRecord(delivery_date=datetime(2026, 9, 1), delivery_type='vaginal', delivery_location='Maternité',
+                                  patient_id=mother.id, user_id=user.id)
+        db.session.add(delivery)
+        db.session.flush()
+
+        baby = BabyRecord(first_name='Léa', birth_date=datetime(2026, 9, 1), gender='F', birth_weight=3200,
+                          mother_id=mother.id, delivery_id=delivery.id)
+        db.session.add(baby)
+        db.session.flush()
+
+        kinds = [('mother', mother.id, None), ('baby', None, baby.id), ('both', mother.id, baby.id)]
+        for index in range(count):
+            reminder_type, patient_id, baby_id = kinds[index % len(kinds)]
+            db.session.add(PostnatalCareReminder(
+                title=f"Rappel {index}", reminder_date=datetime(2026, 9, 2) + timedelta(hours=index),
+                reminder_type=reminder_type, patient_id=patient_id, baby_id=baby_id, user_id=user.id
+            ))
+        db.session.commit()
+
+@pytest.mark.parametrize('status', ['all', 'pending'])
+def test_reminder_feed_query_count_does_not_grow_with_reminders(make_user, login, status):
+    counts = {}
+    for count in (10, 400):
+        user = make_user()
+        add_reminders(user, count)
+        client = login(user)
+
+        # The first request loads the user snapshot, only the next one is measured
+        url = f'/api/postnatal/reminders?status={status}&limit=500'
+        client.get(url)
+        with count_statements() as statements:
+            response = client.get(url)
+
+        reminders = response.get_json()['reminders']
+        assert len(reminders) == count
+        assert {reminder['patient_name'] for reminder in reminders if reminder['reminder_type'] == 'mother'} == {'Dupont Anne'}
+        assert {reminder['baby_name'] for reminder in reminders if reminder['reminder_type'] == 'baby'} == {'Léa'}
+        counts[count] = len(statements)
+
+    assert counts[10] == counts[400]
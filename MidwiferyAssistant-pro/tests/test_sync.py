@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+from app import app, db
+from models import Patient, DeliveryRecord, BabyRecord, VaccinationRecord
+from queries import encode_cursor
+from sync import SYNC_ENTITIES
+
+def add_baby_with_vaccination(user, created_at):
+    with app.app_context():
+        mother = Patient(first_name='Anne', last_name='Dupont', user_id=user.id, updated_at=created_at)
+        db.session.add(mother)
+        db.session.flush()
+        delivery = DeliveryRecord(delivery_date=datetime(2026, 9, 1), delivery_type='vaginal', delivery_location='Maternité',
+                                  patient_id=mother.id, user_id=user.id)
+        db.session.add(delivery)
+        db.session.flush()
+        baby = BabyRecord(first_name='Léa', birth_date=datetime(2026, 9, 1), gender='F', birth_weight=3200,
+                          mother_id=mother.id, delivery_id=delivery.id, created_at=created_at)
+        db.session.add(baby)
+        db.session.flush()
+        db.session.add(VaccinationRecord(vaccine_name='BCG', date_administered=datetime(2026, 9, 2), baby_id=baby.id,
+                                         user_id=user.id, updated_at=created_at))
+        db.session.commit()
+        return baby.id
+
+def test_babies_are_sent_before_the_records_that_refer_to_them(make_user, login):
+    user, other = make_user(), make_user()
+    baby_id = add_baby_with_vaccination(user, datetime.utcnow() - timedelta(minutes=1))
+    add_baby_with_vaccination(other, datetime.utcnow() - timedelta(minutes=1))
+    client = login(user)
+
+    first = client.get('/api/sync?limit=2').get_json()
+    second = client.get(f"/api/sync?limit=2&cursor={first['cursor']}").get_json()
+
+    assert (set(first['changes']), first['more']) == ({'patient', 'baby'}, True)
+    assert set(second['changes']) == {'vaccination'}
+    baby = first['changes']['baby']
+    vaccination = second['changes']['vaccination']
+    assert [dict(zip(baby['fields'], row))['first_name'] for row in baby['rows']] == ['Léa']
+    assert [dict(zip(baby['fields'], row))['id'] for row in baby['rows']] == [baby_id]
+    assert [dict(zip(vaccination['fields'], row))['baby_id'] for row in vaccination['rows']] == [baby_id]
+
+def test_babies_cannot_be_written_offline(make_user, login):
+    client = login(make_user())
+
+    response = client.post('/api/sync', json={'changes': [
+        {'entity': 'baby', 'op': 'create', 'client_id': 'b-1', 'data': {'first_name': 'Léa'}}
+    ]})
+
+    assert response.get_json()['results'][0]['status'] == 'error'
+
+def test_cursor_issued_before_the_babies_were_synchronized_sends_every_baby(make_user, login):
+    user = make_user()
+    baby_id = add_baby_with_vaccination(user, datetime.utcnow() - timedelta(minutes=1))
+    client = login(user)
+
+    # Cursor of a client that already received everything but the babies
+    now = datetime.utcnow().isoformat()
+    old_cursor = encode_cursor([value for entity in SYNC_ENTITIES if entity.name != 'baby' for value in (now, 0)])
+    response = client.get(f'/api/sync?cursor={old_cursor}')
+
+    assert response.status_code == 200
+    changes = response.get_json()['changes']
+    assert list(changes) == ['baby']
+    assert [row[changes['baby']['fields'].index('id')] for row in changes['baby']['rows']] == [baby_id]
@@ -0,0 +1,99 @@
+import heapq
+from collections import namedtuple
+from sqlalchemy import select
+from app import db
+from models import DeliveryRecord, PostnatalCheckup, VaccinationRecord, BreastfeedingRecord
+from serialization import DELIVERY_SCHEMA, MOTHER_CHECKUP_SCHEMA, BABY_CHECKUP_SCHEMA, BREASTFEEDING_SCHEMA, VACCINATION_SCHEMA
+
+# One kind of event of a timeline: the records of a table, read with a schema and dated by a column
+EventSource = namedtuple('EventSource', ['type', 'model', 'schema', 'fields', 'date_field', 'conditions'])
+
+BABY_EVENTS = (
+    EventSource('checkup', PostnatalCheckup, BABY_CHECKUP_SCHEMA, list(BABY_CHECKUP_SCHEMA.fields), 'checkup_date',
+                lambda baby_id: [PostnatalCheckup.baby_id == baby_id, PostnatalCheckup.checkup_type == 'baby']),
+    EventSource('breastfeeding', BreastfeedingRecord, BREASTFEEDING_SCHEMA, list(BREASTFEEDING_SCHEMA.fields), 'feeding_date',
+                lambda baby_id: [BreastfeedingRecord.baby_id == baby_id]),
+    EventSource('vaccination', VaccinationRecord, VACCINATION_SCHEMA, list(VACCINATION_SCHEMA.fields), 'date_administered',
+                lambda baby_id: [VaccinationRecord.baby_id == baby_id])
+)
+
+# The mother's own name is in the timeline header, not repeated on each delivery
+MOTHER_EVENTS = (
+    EventSource('delivery', DeliveryRecord, DELIVERY_SCHEMA, ['id', 'delivery_date', 'delivery_type', 'delivery_location', 'complications'], 'delivery_date',
+                lambda patient_id: [DeliveryRecord.patient_id == patient_id]),
+    EventSource('checkup', PostnatalCheckup, MOTHER_CHECKUP_SCHEMA, list(MOTHER_CHECKUP_SCHEMA.fields), 'checkup_date',
+                lambda patient_id: [PostnatalCheckup.patient_id == patient_id, PostnatalCheckup.checkup_type == 'mother'])
+)
+
+def version_collections(sources, owner_id):
+    """
+    Collections of a timeline, as expected by http_cache.collection_version.
+
+    Args:
+        sources (tuple): BABY_EVENTS or MOTHER_EVENTS
+        owner_id (int): ID of the baby or of the mother
+
+    Returns:
+        list: (model, conditions) pairs
+    """
+    return [(source.model, source.conditions(owner_id)) for source in sources]
+
+def load_events(sources, owner_id):
+    """
+    Load the events of a baby or a mother, most recent first.
+
+    Each source is read with one query already sorted by date; the sorted
+    lists are then merged, so the number of queries does not depend on the
+    number of records.
+
+    Args:
+        sources (tuple): BABY_EVENTS or MOTHER_EVENTS
+        owner_id (int): ID of the baby or of the mother
+
+    Returns:
+        list: Events {'type', 'date', 'record'}, by descending date
+    """
+    streams = []
+    for source in sources:
+        date_column = source.schema.fields[source.date_field]
+        rows = db.session.execute(
+            select(*source.schema.columns(source.fields))
+            .where(*source.conditions(owner_id))
+            .order_by(date_column.desc(), source.model.id.desc())
+        ).all()
+        streams.append([
+            {'type': source.type, 'date': record[source.date_field], 'record': record}
+            for record in source.schema.dump(rows, source.fields)
+        ])
+
+    return list(heapq.merge(*streams, key=lambda event: event['date'], reverse=True))
+
+def baby_summary(baby):
+    """
+    Birth information of a baby, with its mother's name and delivery type.
+
+    Args:
+        baby (BabyRecord): Baby, with its mother and delivery loaded
+
+    Returns:
+        dict: Baby fields sent by the postnatal API
+    """
+    return {
+        'id': baby.id,
+        'first_name': baby.first_name,
+        'last_name': baby.last_name,
+        'birth_date': baby.birth_date.isoformat(),
+        'gender': baby.gender,
+        'birth_weight': baby.birth_weight,
+        'birth_length': baby.birth_length,
+        'head_circumference': baby.head_circumference,
+        'apgar_1min': baby.apgar_1min,
+        'apgar_5min': baby.apgar_5min,
+        'apgar_10min': baby.apgar_10min,
+        'resuscitation_required': baby.resuscitation_required,
+        'oxygen_required': baby.oxygen_required,
+        'nicu_required': baby.nicu_required,
+        'mother_id': baby.mother_id,
+        'mother_name': f"{baby.mother.last_name} {baby.mother.first_name}",
+        'delivery_type': baby.delivery.delivery_type
+    }
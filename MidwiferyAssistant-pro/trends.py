@@ -0,0 +1,234 @@
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+import numpy as np
+from sqlalchemy import func
+from app import app, db
+from models import BloodPressureRecord
+from utils import classify_blood_pressure
+
+DAY = 86400
+
+# Readings loaded before the latest one: enough for the 14-day slope and the 7-day baselines
+HISTORY_DAYS = 30
+SLOPE_WINDOW_DAYS = 14
+TREND_WINDOW_DAYS = 14
+
+# Rising MAP: at least 0.5 mmHg/day over 14 days (7 mmHg), from 3 readings over 2 days or more
+RISING_MAP_SLOPE = 0.5
+SLOPE_MIN_READINGS = 3
+SLOPE_MIN_SPAN_DAYS = 2
+
+# Hypertension confirmed by two readings >= 140/90 at least 4 hours apart, within 7 days
+PERSISTENCE_MIN_GAP = 4 * 3600
+PERSISTENCE_MAX_GAP = 7 * DAY
+
+# Sudden jump: rise of 30 mmHg systolic or 15 mmHg diastolic above the mean of the previous 7 days
+JUMP_SYSTOLIC = 30
+JUMP_DIASTOLIC = 15
+BASELINE_DAYS = 7
+
+class TrendCache:
+    """
+    Small thread-safe LRU cache of trend results, one entry per patient.
+
+    Each entry is stored with the version of the patient's series it was
+    computed from; a lookup with another version (a reading was added or changed) is a miss.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+trend_cache = TrendCache(app.config["BP_TREND_CACHE_SIZE"])
+
+def _window_sums(values, start, end):
+    # Sum of values[start:end] for each pair, from a cumulative sum
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    return cumulative[end] - cumulative[start]
+
+def rolling_mean(times, values, window):
+    """
+    Mean of the readings of the last `window` seconds, at each reading.
+
+    Args:
+        times (ndarray): Reading times in seconds, sorted
+        values (ndarray): Values aligned on times
+        window (int): Window length in seconds
+
+    Returns:
+        ndarray: Rolling mean at each reading (the reading itself included)
+    """
+    start = np.searchsorted(times, times - window, side='right')
+    end = np.arange(1, len(times) + 1)
+    return _window_sums(values, start, end) / (end - start)
+
+def _previous_mean(times, values, window):
+    # Mean of the readings of the `window` seconds before each reading, NaN when there are none
+    start = np.searchsorted(times, times - window, side='left')
+    end = np.arange(len(times))
+    count = end - start
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, _window_sums(values, start, end) / np.maximum(count, 1), np.nan)
+
+def _slope_per_day(times, values):
+    # Least squares slope in units per day
+    days = (times - times.mean()) / DAY
+    denominator = np.sum(days * days)
+    if denominator == 0:
+        return None
+    return float(np.sum(days * (values - values.mean())) / denominator)
+
+def _confirmed_hypertension(times, hypertensive):
+    # For each hypertensive reading, is there an earlier one 4 hours to 7 days before?
+    high_times = times[hypertensive]
+    previous = np.searchsorted(high_times, high_times - PERSISTENCE_MIN_GAP, side='right') - 1
+    has_previous = previous >= 0
+    gap = high_times - high_times[np.maximum(previous, 0)]
+    confirmed = has_previous & (gap >= PERSISTENCE_MIN_GAP) & (gap <= PERSISTENCE_MAX_GAP)
+    return high_times[confirmed]
+
+def analyze_blood_pressure_series(times, systolic, diastolic):
+    """
+    Compute the blood pressure trends of a series of readings.
+
+    The windows are relative to the latest reading, so the result only
+    depends on the readings and can be cached until a new one arrives.
+
+    Args:
+        times (ndarray): Reading times as datetime64, sorted
+        systolic (ndarray): Systolic pressures in mmHg
+        diastolic (ndarray): Diastolic pressures in mmHg
+
+    Returns:
+        dict: Latest reading, rolling means, 14-day MAP slope, flags
+              (rising_map, persistent_hypertension, sudden_jump) and the series
+              used for charts
+    """
+    if len(times) == 0:
+        return {'reading_count': 0, 'flags': {'rising_map': False, 'persistent_hypertension': False, 'sudden_jump': False}}
+
+    seconds = times.astype('datetime64[s]').astype(np.int64)
+    systolic = systolic.astype(float)
+    diastolic = diastolic.astype(float)
+    mean_arterial = diastolic + (systolic - diastolic) / 3
+
+    latest = seconds[-1]
+    trend_start = latest - TREND_WINDOW_DAYS * DAY
+
+    map_24h = rolling_mean(seconds, mean_arterial, DAY)
+    map_7d = rolling_mean(seconds, mean_arterial, 7 * DAY)
+    systolic_7d = rolling_mean(seconds, systolic, 7 * DAY)
+    diastolic_7d = rolling_mean(seconds, diastolic, 7 * DAY)
+
+    # MAP slope over the last 14 days
+    recent = seconds >= latest - SLOPE_WINDOW_DAYS * DAY
+    slope = None
+    if recent.sum() >= SLOPE_MIN_READINGS and np.ptp(seconds[recent]) >= SLOPE_MIN_SPAN_DAYS * DAY:
+        slope = _slope_per_day(seconds[recent], mean_arterial[recent])
+
+    # Repeated readings >= 140/90 at least 4 hours apart
+    confirmed = _confirmed_hypertension(seconds, (systolic >= 140) | (diastolic >= 90))
+    confirmed = confirmed[confirmed >= trend_start]
+
+    # Sudden rises above the previous 7-day baseline
+    with np.errstate(invalid='ignore'):
+        jumps = (
+            (systolic - _previous_mean(seconds, systolic, BASELINE_DAYS * DAY) >= JUMP_SYSTOLIC) |
+            (diastolic - _previous_mean(seconds, diastolic, BASELINE_DAYS * DAY) >= JUMP_DIASTOLIC)
+        ) & (seconds >= trend_start)
+
+    def iso(values):
+        return [str(value) for value in values.astype('datetime64[s]')]
+
+    return {
+        'reading_count': int(len(seconds)),
+        'first_reading_at': iso(times[:1])[0],
+        'latest_reading_at': iso(times[-1:])[0],
+        'latest': {
+            'systolic': int(systolic[-1]),
+            'diastolic': int(diastolic[-1]),
+            'map': round(float(mean_arterial[-1]), 1),
+            'status': str(classify_blood_pressure(systolic[-1], diastolic[-1]))
+        },
+        'rolling': {
+            'map_24h': round(float(map_24h[-1]), 1),
+            'map_7d': round(float(map_7d[-1]), 1),
+            'systolic_7d': round(float(systolic_7d[-1]), 1),
+            'diastolic_7d': round(float(diastolic_7d[-1]), 1)
+        },
+        'map_slope_per_day': round(slope, 2) if slope is not None else None,
+        'flags': {
+            'rising_map': slope is not None and slope >= RISING_MAP_SLOPE,
+            'persistent_hypertension': bool(len(confirmed)),
+            'sudden_jump': bool(jumps.any())
+        },
+        'persistent_hypertension_confirmed_at': iso(confirmed[:1])[0] if len(confirmed) else None,
+        'jumps_at': iso(times[jumps]),
+        'series': {
+            'recorded_at': iso(times),
+            'map': np.round(mean_arterial, 1).tolist(),
+            'map_7d': np.round(map_7d, 1).tolist()
+        }
+    }
+
+def get_blood_pressure_trend(patient_id):
+    """
+    Get the blood pressure trends of a patient, from the cache when no reading was added or changed.
+
+    A single aggregate query over the patient's readings gives the version
+    of the series; the readings of the last 30 days before the latest
+    one are only loaded when the cached result is missing or outdated.
+
+    Args:
+        patient_id (int): ID of the patient
+
+    Returns:
+        dict: Result of analyze_blood_pressure_series
+    """
+    count, last_id, last_update, latest = db.session.query(
+        func.count(BloodPressureRecord.id),
+        func.max(BloodPressureRecord.id),
+        func.max(BloodPressureRecord.updated_at),
+        func.max(BloodPressureRecord.recorded_at)
+    ).filter(BloodPressureRecord.patient_id == patient_id).one()
+
+    version = (count, last_id, last_update)
+    cached = trend_cache.get(patient_id, version)
+    if cached is not None:
+        return cached
+
+    rows = []
+    if latest is not None:
+        rows = db.session.query(
+            BloodPressureRecord.recorded_at,
+            BloodPressureRecord.systolic,
+            BloodPressureRecord.diastolic
+        ).filter(
+            BloodPressureRecord.patient_id == patient_id,
+            BloodPressureRecord.recorded_at >= latest - timedelta(days=HISTORY_DAYS)
+        ).order_by(BloodPressureRecord.recorded_at).all()
+
+    times = np.array([row[0] for row in rows], dtype='datetime64[s]')
+    systolic = np.array([row[1] for row in rows], dtype=float)
+    diastolic = np.array([row[2] for row in rows], dtype=float)
+
+    result = analyze_blood_pressure_series(times, systolic, diastolic)
+    trend_cache.put(patient_id, version, result)
+    return result
@@ -1,31 +1,54 @@
-from datetime import datetime, timedelta
+from datetime import date
+import numpy as np
+from reference_data import ULTRASOUND_REFERENCE_BY_WEEK, EMERGENCY_PROTOCOLS
 
-def calculate_gestational_age(last_period, cycle_length=28):
+def calculate_gestational_age(last_period, cycle_length=28, reference_date=None):
     """
     Calculate gestational age based on last menstrual period and cycle length.
     
     Args:
         last_period (datetime): Date of last menstrual period
         cycle_length (int): Length of menstrual cycle in days
+        reference_date (date, optional): Day the age is calculated for, defaults to today
     
     Returns:
         tuple: (weeks, days) of gestational age
     """
-    today = datetime.now()
+    weeks, days, _ = calculate_gestational_age_batch([last_period], [cycle_length], reference_date or date.today())
+    return int(weeks[0]), int(days[0])
+
+def calculate_gestational_age_batch(last_period_dates, cycle_lengths, reference_date):
+    """
+    Calculate the gestational ages and due dates of many pregnancies at once.
+
+    Same rules as calculate_gestational_age, with datetime64 arithmetic over
+    whole arrays; the reference date is explicit so that the result only
+    depends on the arguments.
+
+    Args:
+        last_period_dates (list): Dates of the last menstrual periods (date or datetime)
+        cycle_lengths (list): Cycle lengths in days, None for 28
+        reference_date (date): Day the ages are calculated for
+
+    Returns:
+        tuple: (weeks, days, due_dates) aligned arrays, due dates as datetime64[D]
+    """
+    last_periods = np.asarray(last_period_dates, dtype='datetime64[D]')
+    cycles = np.asarray(cycle_lengths, dtype=float)
+    cycles = np.where(np.isnan(cycles), 28, cycles).astype(np.int64)
     
-    # Adjust for longer or shorter cycles
-    cycle_adjustment = cycle_length - 28
-    adjusted_last_period = last_period - timedelta(days=cycle_adjustment)
+    # Naegele's rule: ovulation comes later in longer cycles, the last period is
+    # shifted forward by the cycle difference for both the age and the due date
+    cycle_adjustment = (cycles - 28).astype('timedelta64[D]')
+    adjusted_last_periods = last_periods + cycle_adjustment
     
-    # Calculate difference
-    difference = today - adjusted_last_period
-    total_days = difference.days
+    total_days = (np.datetime64(reference_date, 'D') - adjusted_last_periods).astype(np.int64)
+    weeks, days = np.divmod(total_days, 7)
     
-    # Calculate weeks and remaining days
-    weeks = total_days // 7
-    days = total_days % 7
+    # 40 weeks 0 days falls on the due date
+    due_dates = adjusted_last_periods + np.timedelta64(280, 'D')
     
-    return weeks, days
+    return weeks, days, due_dates
 
 def get_gestational_age_recommendations(weeks):
     """
@@ -206,11 +229,6 @@ def analyze_blood_results(hemoglobin, platelets, ferritin=None, hematocrit=None,
             analysis['overall']['recommendations'].append('Considérer un supplément en fer oral')
     
     # Check for HELLP syndrome markers
-    hellp_indicators = 0
-    
-    if platelets < 100:
-        hellp_indicators += 1
-    
     if ldh is not None:
         analysis['ldh'] = {
             'value': ldh,
@@ -221,7 +239,6 @@ def analyze_blood_results(hemoglobin, platelets, ferritin=None, hematocrit=None,
         if ldh > 600:
             analysis['ldh']['status'] = 'critical'
             analysis['ldh']['message'] = 'LDH élevé'
-            hellp_indicators += 1
     
     if ast is not None and alt is not None:
         analysis['liver_enzymes'] = {
@@ -234,10 +251,9 @@ def analyze_blood_results(hemoglobin, platelets, ferritin=None, hematocrit=None,
         if ast > 70 or alt > 70:
             analysis['liver_enzymes']['status'] = 'critical'
             analysis['liver_enzymes']['message'] = 'Enzymes hépatiques élevées'
-            hellp_indicators += 1
     
     # Check for HELLP syndrome
-    if hellp_indicators >= 2:
+    if is_hellp_suspected(platelets, ldh, alt, ast):
         analysis['overall']['status'] = 'critical'
         analysis['overall']['message'] = 'Suspicion de syndrome HELLP'
         analysis['overall']['recommendations'] = [
@@ -257,6 +273,69 @@ def analyze_blood_results(hemoglobin, platelets, ferritin=None, hematocrit=None,
     
     return analysis
 
+def count_hellp_indicators(platelets, ldh=None, alt=None, ast=None):
+    """
+    Count the HELLP syndrome markers present in blood test results.
+    
+    Args:
+        platelets (int): Platelet count in 10^9/L
+        ldh (float, optional): Lactate dehydrogenase in U/L
+        alt (float, optional): Alanine aminotransferase in U/L
+        ast (float, optional): Aspartate aminotransferase in U/L
+    
+    Returns:
+        int: Number of markers (low platelets, high LDH, high liver enzymes)
+    """
+    indicators = 0
+    
+    if platelets is not None and platelets < 100:
+        indicators += 1
+    
+    if ldh is not None and ldh > 600:
+        indicators += 1
+    
+    if ast is not None and alt is not None and (ast > 70 or alt > 70):
+        indicators += 1
+    
+    return indicators
+
+def is_hellp_suspected(platelets, ldh=None, alt=None, ast=None):
+    """
+    Tell whether blood test results suggest a HELLP syndrome (at least two markers).
+    """
+    return count_hellp_indicators(platelets, ldh, alt, ast) >= 2
+
+def count_hellp_indicators_batch(platelets, ldh, alt, ast):
+    """
+    Count the HELLP syndrome markers of many blood test results at once.
+    
+    Same rules as count_hellp_indicators; missing values are NaN.
+    
+    Args:
+        platelets, ldh, alt, ast (array-like): Aligned result arrays
+    
+    Returns:
+        ndarray: Number of markers of each result
+    """
+    platelets, ldh, alt, ast = (np.asarray(values, dtype=float) for values in (platelets, ldh, alt, ast))
+    
+    # Comparisons with NaN are False, so missing values never count as markers
+    liver = ~np.isnan(ast) & ~np.isnan(alt) & ((ast > 70) | (alt > 70))
+    return (platelets < 100).astype(int) + (ldh > 600).astype(int) + liver.astype(int)
+
+def classify_hemoglobin(hemoglobin):
+    """
+    Classify many hemoglobin levels at once, with the thresholds of analyze_blood_results.
+    
+    Args:
+        hemoglobin (array-like): Hemoglobin levels in g/dL, NaN when missing
+    
+    Returns:
+        ndarray: 'critical' (< 8), 'warning' (< 10), 'mild' (< 11) or 'normal'
+    """
+    hemoglobin = np.asarray(hemoglobin, dtype=float)
+    return np.select([hemoglobin < 8, hemoglobin < 10, hemoglobin < 11], ['critical', 'warning', 'mild'], default='normal')
+
 def evaluate_blood_pressure(systolic, diastolic):
     """
     Evaluate blood pressure and classify it according to hypertension guidelines for pregnant women.
@@ -330,289 +409,48 @@ def evaluate_blood_pressure(systolic, diastolic):
     
     return result
 
+def classify_blood_pressure(systolic, diastolic):
+    """
+    Classify many blood pressure readings at once, with the thresholds of evaluate_blood_pressure.
+    
+    Args:
+        systolic (array-like): Systolic blood pressures in mmHg
+        diastolic (array-like): Diastolic blood pressures in mmHg
+    
+    Returns:
+        ndarray: Status of each reading ('critical', 'warning', 'mild', 'elevated', 'low' or 'normal')
+    """
+    systolic = np.asarray(systolic)
+    diastolic = np.asarray(diastolic)
+    
+    # Ordered from the most severe, the first matching condition wins as in evaluate_blood_pressure
+    conditions = [
+        (systolic >= 160) | (diastolic >= 110),
+        (systolic >= 150) | (diastolic >= 100),
+        (systolic >= 140) | (diastolic >= 90),
+        (systolic >= 130) | (diastolic >= 80),
+        (systolic < 90) | (diastolic < 60)
+    ]
+    return np.select(conditions, ['critical', 'warning', 'mild', 'elevated', 'low'], default='normal')
+
 def get_ultrasound_reference_data():
     """
     Get reference data for ultrasound measurements by gestational age.
     
+    The table is built once per process and is read-only.
+    
     Returns:
-        dict: Dictionary with reference values by week
+        Mapping: {week: {measurement: (mean, -2SD, +2SD)}}, in mm (efw in g)
     """
-    # Reference data for ultrasound measurements by gestational age (weeks)
-    # Values are in the format: {measurement: [mean, -2SD, +2SD]}
-    return {
-        12: {
-            'bpd': [21.9, 19.0, 24.8], 
-            'hc': [78.8, 69.3, 88.3], 
-            'ac': [63.4, 53.4, 73.4],
-            'fl': [8.6, 5.9, 11.3]
-        },
-        13: {
-            'bpd': [25.2, 22.3, 28.1], 
-            'hc': [91.3, 81.8, 100.8], 
-            'ac': [74.1, 64.1, 84.1],
-            'fl': [11.2, 8.5, 13.9]
-        },
-        14: {
-            'bpd': [28.5, 25.6, 31.4], 
-            'hc': [103.8, 94.3, 113.3], 
-            'ac': [84.8, 74.8, 94.8],
-            'fl': [13.8, 11.1, 16.5]
-        },
-        15: {
-            'bpd': [31.8, 28.9, 34.7], 
-            'hc': [116.3, 106.8, 125.8], 
-            'ac': [95.5, 85.5, 105.5],
-            'fl': [16.4, 13.7, 19.1]
-        },
-        16: {
-            'bpd': [35.1, 32.2, 38.0], 
-            'hc': [128.8, 119.3, 138.3], 
-            'ac': [106.2, 96.2, 116.2],
-            'fl': [19.0, 16.3, 21.7]
-        },
-        17: {
-            'bpd': [38.4, 35.5, 41.3], 
-            'hc': [141.3, 131.8, 150.8], 
-            'ac': [116.9, 106.9, 126.9],
-            'fl': [21.6, 18.9, 24.3]
-        },
-        18: {
-            'bpd': [41.7, 38.8, 44.6], 
-            'hc': [153.8, 144.3, 163.3], 
-            'ac': [127.6, 117.6, 137.6],
-            'fl': [24.2, 21.5, 26.9]
-        },
-        19: {
-            'bpd': [45.0, 42.1, 47.9], 
-            'hc': [166.3, 156.8, 175.8], 
-            'ac': [138.3, 128.3, 148.3],
-            'fl': [26.8, 24.1, 29.5]
-        },
-        20: {
-            'bpd': [48.3, 45.4, 51.2], 
-            'hc': [178.8, 169.3, 188.3], 
-            'ac': [149.0, 139.0, 159.0],
-            'fl': [29.4, 26.7, 32.1]
-        },
-        21: {
-            'bpd': [51.6, 48.7, 54.5], 
-            'hc': [191.3, 181.8, 200.8], 
-            'ac': [159.7, 149.7, 169.7],
-            'fl': [32.0, 29.3, 34.7]
-        },
-        22: {
-            'bpd': [54.9, 52.0, 57.8], 
-            'hc': [203.8, 194.3, 213.3], 
-            'ac': [170.4, 160.4, 180.4],
-            'fl': [34.6, 31.9, 37.3]
-        },
-        23: {
-            'bpd': [58.2, 55.3, 61.1], 
-            'hc': [216.3, 206.8, 225.8], 
-            'ac': [181.1, 171.1, 191.1],
-            'fl': [37.2, 34.5, 39.9]
-        },
-        24: {
-            'bpd': [61.5, 58.6, 64.4], 
-            'hc': [228.8, 219.3, 238.3], 
-            'ac': [191.8, 181.8, 201.8],
-            'fl': [39.8, 37.1, 42.5]
-        },
-        25: {
-            'bpd': [64.8, 61.9, 67.7], 
-            'hc': [241.3, 231.8, 250.8], 
-            'ac': [202.5, 192.5, 212.5],
-            'fl': [42.4, 39.7, 45.1]
-        },
-        26: {
-            'bpd': [68.1, 65.2, 71.0], 
-            'hc': [253.8, 244.3, 263.3], 
-            'ac': [213.2, 203.2, 223.2],
-            'fl': [45.0, 42.3, 47.7]
-        },
-        27: {
-            'bpd': [71.4, 68.5, 74.3], 
-            'hc': [266.3, 256.8, 275.8], 
-            'ac': [223.9, 213.9, 233.9],
-            'fl': [47.6, 44.9, 50.3]
-        },
-        28: {
-            'bpd': [74.7, 71.8, 77.6], 
-            'hc': [278.8, 269.3, 288.3], 
-            'ac': [234.6, 224.6, 244.6],
-            'fl': [50.2, 47.5, 52.9]
-        },
-        29: {
-            'bpd': [78.0, 75.1, 80.9], 
-            'hc': [291.3, 281.8, 300.8], 
-            'ac': [245.3, 235.3, 255.3],
-            'fl': [52.8, 50.1, 55.5]
-        },
-        30: {
-            'bpd': [81.3, 78.4, 84.2], 
-            'hc': [303.8, 294.3, 313.3], 
-            'ac': [256.0, 246.0, 266.0],
-            'fl': [55.4, 52.7, 58.1]
-        },
-        31: {
-            'bpd': [84.6, 81.7, 87.5], 
-            'hc': [316.3, 306.8, 325.8], 
-            'ac': [266.7, 256.7, 276.7],
-            'fl': [58.0, 55.3, 60.7]
-        },
-        32: {
-            'bpd': [87.9, 85.0, 90.8], 
-            'hc': [328.8, 319.3, 338.3], 
-            'ac': [277.4, 267.4, 287.4],
-            'fl': [60.6, 57.9, 63.3]
-        },
-        33: {
-            'bpd': [91.2, 88.3, 94.1], 
-            'hc': [341.3, 331.8, 350.8], 
-            'ac': [288.1, 278.1, 298.1],
-            'fl': [63.2, 60.5, 65.9]
-        },
-        34: {
-            'bpd': [94.5, 91.6, 97.4], 
-            'hc': [353.8, 344.3, 363.3], 
-            'ac': [298.8, 288.8, 308.8],
-            'fl': [65.8, 63.1, 68.5]
-        },
-        35: {
-            'bpd': [97.8, 94.9, 100.7], 
-            'hc': [366.3, 356.8, 375.8], 
-            'ac': [309.5, 299.5, 319.5],
-            'fl': [68.4, 65.7, 71.1]
-        },
-        36: {
-            'bpd': [101.1, 98.2, 104.0], 
-            'hc': [378.8, 369.3, 388.3], 
-            'ac': [320.2, 310.2, 330.2],
-            'fl': [71.0, 68.3, 73.7]
-        },
-        37: {
-            'bpd': [104.4, 101.5, 107.3], 
-            'hc': [391.3, 381.8, 400.8], 
-            'ac': [330.9, 320.9, 340.9],
-            'fl': [73.6, 70.9, 76.3]
-        },
-        38: {
-            'bpd': [107.7, 104.8, 110.6], 
-            'hc': [403.8, 394.3, 413.3], 
-            'ac': [341.6, 331.6, 351.6],
-            'fl': [76.2, 73.5, 78.9]
-        },
-        39: {
-            'bpd': [111.0, 108.1, 113.9], 
-            'hc': [416.3, 406.8, 425.8], 
-            'ac': [352.3, 342.3, 362.3],
-            'fl': [78.8, 76.1, 81.5]
-        },
-        40: {
-            'bpd': [114.3, 111.4, 117.2], 
-            'hc': [428.8, 419.3, 438.3], 
-            'ac': [363.0, 353.0, 373.0],
-            'fl': [81.4, 78.7, 84.1]
-        }
-    }
+    return ULTRASOUND_REFERENCE_BY_WEEK
 
 def get_emergency_protocols():
     """
     Get emergency obstetrical protocols.
     
+    The protocols are built once per process and are read-only.
+    
     Returns:
-        dict: Dictionary with emergency protocols
+        Mapping: Emergency protocols by key
     """
-    return {
-        'hemorrhage': {
-            'title': 'Hémorragie du Post-Partum',
-            'definition': 'Saignement > 500ml après accouchement',
-            'signs': [
-                'Saignement abondant',
-                'Hypotension',
-                'Tachycardie',
-                'Pâleur'
-            ],
-            'actions': [
-                '1. Massage utérin bimanuel',
-                '2. Voie veineuse 14-16G',
-                '3. Ocytocine 5-10 UI IVL puis 20-40 UI/500ml',
-                '4. Remplissage vasculaire',
-                '5. Sondage vésical',
-                '6. Appel équipe obstétricale + anesthésiste'
-            ],
-            'severity_levels': [
-                {'volume': '< 1000ml', 'action': 'Surveillance, ocytocine'},
-                {'volume': '1000-1500ml', 'action': 'Sulprostone, examiner sous valves'},
-                {'volume': '> 1500ml', 'action': 'Transfusion, chirurgie'}
-            ]
-        },
-        'preeclampsia': {
-            'title': 'Pré-éclampsie Sévère',
-            'definition': 'HTA > 160/110 + protéinurie',
-            'signs': [
-                'Céphalées intenses',
-                'Troubles visuels',
-                'Douleur épigastrique',
-                'Hyperréflexie',
-                'Oligurie'
-            ],
-            'actions': [
-                '1. Position latérale gauche',
-                '2. Voie veineuse',
-                '3. Nicardipine (Loxen) IVSE',
-                '4. Sulfate de magnésium (prévention éclampsie)',
-                '5. Bilan biologique complet',
-                '6. Évaluation fœtale',
-                '7. Transfert en maternité niveau 3'
-            ],
-            'severity_levels': [
-                {'symptoms': 'HTA + protéinurie', 'action': 'Hospitalisation, surveillance'},
-                {'symptoms': '+ Signes fonctionnels', 'action': 'Traitement anti-HTA, sulfate Mg'},
-                {'symptoms': '+ Éclampsie/HELLP', 'action': 'Extraction fœtale urgente'}
-            ]
-        },
-        'shoulder_dystocia': {
-            'title': 'Dystocie des Épaules',
-            'definition': 'Rétention des épaules après sortie de la tête',
-            'signs': [
-                'Rétraction de la tête contre le périnée (signe de la tortue)',
-                'Échec de la rotation externe',
-                'Traction inefficace sur la tête'
-            ],
-            'actions': [
-                '1. Appel à l\'aide',
-                '2. Manœuvre de McRoberts (hyperfléxion des cuisses)',
-                '3. Pression sus-pubienne',
-                '4. Manœuvre de Wood',
-                '5. Manœuvre de Jacquemier (extraction de l\'épaule postérieure)',
-                '6. Épisiotomie large si nécessaire'
-            ],
-            'severity_levels': [
-                {'time': '< 5 min', 'action': 'McRoberts + pression sus-pubienne'},
-                {'time': '> 5 min', 'action': 'Manœuvres obstétricales internes'},
-                {'time': '> 10 min', 'action': 'Risque hypoxie/fracture, manœuvres de dernier recours'}
-            ]
-        },
-        'cord_prolapse': {
-            'title': 'Procidence du Cordon',
-            'definition': 'Passage du cordon en avant de la présentation',
-            'signs': [
-                'Visualisation ou palpation du cordon',
-                'Anomalies du RCF (bradycardie brutale)',
-                'Rupture des membranes récente'
-            ],
-            'actions': [
-                '1. Position genupectorale ou Trendelenburg',
-                '2. Repousse manuelle de la présentation',
-                '3. Remplissage vésical (300-500ml)',
-                '4. Tocolvse d\'urgence (β-mimétiques)',
-                '5. Extraction immédiate (césarienne ou voie basse si dilatation complète)'
-            ],
-            'severity_levels': [
-                {'rcf': 'Normal', 'action': 'Césarienne urgente, repousse manuelle'},
-                {'rcf': 'Bradycardie < 100', 'action': 'Césarienne extrême urgence'},
-                {'rcf': 'Absence d\'activité', 'action': 'Extraction immédiate quel que soit le moyen'}
-            ]
-        }
-    }
+    return EMERGENCY_PROTOCOLS